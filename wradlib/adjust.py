@@ -109,9 +109,11 @@ validation results::
 
 """
 
+# standard libraries
+import warnings
+
 # site packages
 import numpy as np
-from scipy.spatial import cKDTree
 from scipy.stats import linregress
 
 # wradlib modules
@@ -136,7 +138,8 @@ class AdjustBase(ipol.IpolBase):
         grid cells (in the neighbourhood of a rain gauge) which is used to
         compute the value of the radar observation AT a rain gauge.
     stat : string
-        Defaults to 'median'. Must be either 'mean', 'median', or 'best'.
+        Defaults to 'median'. Must be either 'mean', 'median', or 'best', or
+        one of the NaN-aware variants 'nanmean', 'nanmedian' or 'nanbest'.
         This parameter controls the statistic that is used to compute the value
         of the radar observation AT a rain gauge based on the neighbourhood
         specified by parameter ``nnear_raws``.
@@ -181,6 +184,9 @@ class AdjustBase(ipol.IpolBase):
     See :ref:`/notebooks/multisensor/wradlib_adjust_example.ipynb`.
 
     """
+    # leave-one-out predictions of all gauges can be derived from one
+    # interpolator (see xvalidate)
+    _fast_xvalidate = True
 
     def __init__(self, obs_coords, raw_coords,
                  nnear_raws=9, stat='median', mingages=5, minval=0.,
@@ -245,7 +251,9 @@ class AdjustBase(ipol.IpolBase):
             These are the indices of observation points with valid
             observation-radar pairs
         targets : array of floats of shape (number of target points, 2)
-            Target coordinates for the interpolation
+            Target coordinates for the interpolation. An instance of
+            wradlib.ipol.IpolBase is returned as is (used by xvalidate to
+            pass a leave-one-out interpolator).
 
         Returns
         -------
@@ -253,6 +261,8 @@ class AdjustBase(ipol.IpolBase):
             wradlib.ipol.IpolBase
 
         """
+        if isinstance(targets, ipol.IpolBase):
+            return targets
         #    first, set interpolation targets (default: the radar coordinates)
         targets_default = False
         if targets is None:
@@ -272,11 +282,14 @@ class AdjustBase(ipol.IpolBase):
         obs : flat (1-D) array of floats with shape (num gauges,)
             These are the gage observations used for adjustment. This array
             needs to be of the same length as the array "obs_coords" used to
-            initialize the adjustment object.
+            initialize the adjustment object. Several time steps can be
+            passed at once as array of shape (num gauges, num time steps).
         raw : flat (1-D) array of floats with shape (num radar cells,)
             These are the raw (unadjusted) radar rainfall values. This array
             needs to be of the same length as the array "raw_coords" used to
-            initialize the adjustment object.
+            initialize the adjustment object. For several time steps, the
+            shape is (num radar cells, num time steps) and the output is of
+            the same shape.
         targets : (INTERNAL - DO NOT USE)
             Array of floats. Coordinate pairs for locations on which the final
             adjustment product is interpolated
@@ -311,6 +324,46 @@ class AdjustBase(ipol.IpolBase):
                             util._idvalid(rawatobs, minval=self.minval))
         return rawatobs, ix
 
+    def _adjust_timesteps(self, obs, raw):
+        """INTERNAL: Adjusts several time steps at once
+
+        Time steps which share the same set of valid observation-radar pairs
+        are adjusted together, using the same interpolator for all of them.
+
+        Parameters
+        ----------
+        obs : array of floats of shape (num gauges, num time steps)
+        raw : array of floats of shape (num radar cells, num time steps)
+
+        Returns
+        -------
+        output : array of floats of shape (num radar cells, num time steps)
+
+        """
+        assert obs.ndim == 2 and raw.ndim == 2, \
+            'obs and raw must both be 2-d arrays for several time steps.'
+        assert obs.shape[1] == raw.shape[1], \
+            'obs and raw must have the same number of time steps.'
+        self._check_shape(obs, raw)
+        # radar values at gage locations
+        rawatobs = self.get_raw_at_obs(raw, obs)
+        valid = (util._validmask(obs, minval=self.minval) &
+                 util._validmask(rawatobs, minval=self.minval))
+        # group time steps by their valid observation-radar pairs
+        masks, groups = np.unique(valid.T, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        results = []
+        for i, mask in enumerate(masks):
+            cols = np.where(groups == i)[0]
+            results.append((cols, self.__call__(obs[:, cols], raw[:, cols],
+                                                None, rawatobs[:, cols],
+                                                np.where(mask)[0])))
+        dtype = np.result_type(*[res for _, res in results])
+        out = np.empty(raw.shape, dtype=dtype)
+        for cols, res in results:
+            out[:, cols] = res
+        return out
+
     def xvalidate(self, obs, raw):
         """Leave-One-Out Cross Validation, applicable to all gage adjustment
         classes.
@@ -349,6 +402,19 @@ class AdjustBase(ipol.IpolBase):
         if len(ix) <= (self.mingages - 1):
             # not enough gages for cross validation: return empty arrays
             return obs, estatobs
+        loo = None
+        if self._fast_xvalidate and len(ix) > 1:
+            loo = _get_loo_interpolator(self.obs_coords[ix], self.ipclass,
+                                        **self.ipargs)
+        if loo is not None:
+            # all valid pairs at once, each gage being estimated
+            # from all others
+            if len(ix) - 1 < self.mingages:
+                estatobs[ix] = raws_directly_at_obs[ix]
+            else:
+                estatobs[ix] = self.__call__(obs, raws_directly_at_obs[ix],
+                                             loo, rawatobs, ix)
+            return obs, estatobs
         # Now iterate over valid pairs
         for i in ix:
             # Pass all valid pairs except ONE which you pass as target
@@ -398,7 +464,10 @@ class AdjustAdd(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -456,7 +525,10 @@ class AdjustMultiply(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -540,7 +612,10 @@ class AdjustMixed(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -580,6 +655,9 @@ class AdjustMFB(AdjustBase):
     output : array of adjusted radar values
 
     """
+    # the correction factor depends on all gauges, so cross validation
+    # has to recompute it for each left out gauge
+    _fast_xvalidate = False
 
     def __call__(self, obs, raw, targets=None, rawatobs=None, ix=None):
         """Returns an array of ``raw`` values that are adjusted by ``obs``.
@@ -590,7 +668,10 @@ class AdjustMFB(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -601,6 +682,11 @@ class AdjustMFB(AdjustBase):
         # ip = self._checkip(ix, targets)
 
         # -----------------THIS IS THE ACTUAL ADJUSTMENT APPROACH--------------
+        if np.ndim(obs) > 1:
+            # the correction factor is computed for each time step
+            return np.column_stack([self.__call__(obs[:, i], raw[:, i],
+                                                  targets, rawatobs[:, i], ix)
+                                    for i in range(obs.shape[1])])
         # compute ratios for each valid observation point
         ratios = np.ma.masked_invalid(obs[ix] / rawatobs.ravel()[ix])
         if len(np.where(np.logical_not(ratios.mask))[0]) < self.mingages:
@@ -666,7 +752,10 @@ class AdjustNone(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -715,7 +804,10 @@ class GageOnly(AdjustBase):
 
         """
         # ----------------GENERIC PART FOR MOST __call__ methods---------------
-        if None in [ix, rawatobs]:
+        if ix is None or rawatobs is None:
+            if np.ndim(obs) > 1:
+                # adjust several time steps at once
+                return self._adjust_timesteps(obs, raw)
             # Check for valid observation-radar pairs in case this method has
             # not been called from self.xvalidate
             rawatobs, ix = self._get_valid_pairs(obs, raw)
@@ -743,13 +835,30 @@ class RawAtObs():
         number of neighbours which should be considered in the vicinity of each
         point in obs
     stat: string
-        function name
+        function name, e.g. 'mean', 'median' or 'best', or the NaN-aware
+        variants 'nanmean', 'nanmedian' or 'nanbest' which ignore invalid
+        raw values in the neighbourhood
+    raw_ix : array of int
+        precomputed neighbour indices of shape (num observation points,
+        nnear), e.g. from :func:`wradlib.georef.polar_neighbours_stencil`
+        for raw values on a polar grid. If given, ``raw_coords`` is not
+        used and no KD-tree is built.
+
+    Note
+    ----
+    The neighbour indices are stored in attribute `raw_ix` as int32 if the
+    number of raw points allows.
 
     """
 
-    def __init__(self, obs_coords, raw_coords, nnear=9, stat='median'):
+    def __init__(self, obs_coords, raw_coords, nnear=9, stat='median',
+                 raw_ix=None):
         self.statfunc = _get_statfunc(stat)
-        self.raw_ix = _get_neighbours_ix(obs_coords, raw_coords, nnear)
+        if raw_ix is None:
+            raw_ix = _get_neighbours_ix(obs_coords, raw_coords, nnear)
+        self.raw_ix = np.asarray(raw_ix)
+        if self.raw_ix.size and self.raw_ix.max() < np.iinfo(np.int32).max:
+            self.raw_ix = self.raw_ix.astype(np.int32)
 
     def __call__(self, raw, obs=None):
         """
@@ -758,7 +867,19 @@ class RawAtObs():
         Parameters
         ----------
         raw : array of float
-            raw values
+            raw values of shape (num raw points,) or stacked raw fields of
+            shape (num raw points, num time steps)
+        obs : array of float
+            observations of shape (num observation points,) or
+            (num observation points, num time steps), only needed for stat
+            'best'
+
+        Returns
+        -------
+        output : array of float
+            raw values at the observation locations of shape
+            (num observation points,) or
+            (num observation points, num time steps)
 
         """
         # get the values of the raw neighbours of obs
@@ -767,12 +888,112 @@ class RawAtObs():
         # by using a statistics option
         # (only needed in case nnear > 1, i.e. multiple neighbours
         # per observation location)
-        if raw_neighbs.ndim > 1:
+        if self.raw_ix.ndim > 1:
             return self.statfunc(obs, raw_neighbs)
         else:
             return raw_neighbs
 
 
+class _LeaveOneOut(ipol.IpolBase):
+    """INTERNAL: Leave-one-out interpolation between observation points.
+
+    Each point is estimated from all other points as given by the sparse
+    ``operator`` of shape (npoints, npoints) with zero diagonal.
+    """
+
+    def __init__(self, operator):
+        self.operator = operator
+        self.numsources, self.numtargets = operator.shape[1], operator.shape[0]
+
+    def __call__(self, vals):
+        self._check_shape(vals)
+        return self.operator.dot(vals)
+
+    def get_operator(self):
+        return self.operator
+
+
+def _get_loo_interpolator(coords, ipclass, **ipargs):
+    """INTERNAL: Returns a leave-one-out interpolator for ``coords``.
+
+    The result of interpolating values with this instance equals the
+    interpolation of each point from all other points by ``ipclass``. The
+    neighbours of all points are queried once with one additional neighbour
+    and the self-match is dropped. For
+    :class:`~wradlib.ipol.OrdinaryKriging`, the leave-one-out weights are
+    derived from the inverse of the kriging system which contains the left
+    out point.
+
+    Parameters
+    ----------
+    coords : array of floats of shape (number of points, 2)
+        coordinates of the (valid) observation points
+    ipclass : an interpolation class from :mod:`wradlib.ipol`
+    ipargs : keyword arguments to create an instance of ipclass
+
+    Returns
+    -------
+    output : an instance of _LeaveOneOut or None if ``ipclass`` is not
+        supported
+    """
+    if ipclass not in (ipol.Nearest, ipol.Idw, ipol.OrdinaryKriging):
+        return None
+    npoints = len(coords)
+    # the interpolator for one target provides tree and weighting
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        ip = ipclass(coords, coords[:1], **ipargs)
+    nnear = min(ip.nnearest, npoints - 1)
+    ip.nnearest = nnear + 1
+    dists, ix = ip._query(coords)
+    dists, ix = dists.reshape((npoints, -1)), ix.reshape((npoints, -1))
+    # make sure each point is part of its own neighbourhood (in case of
+    # duplicate locations)
+    self_ix = np.arange(npoints)
+    missing = ~np.any(ix == self_ix[:, np.newaxis], axis=1)
+    ix[missing, -1] = self_ix[missing]
+    dists[missing, -1] = 0.
+    isself = ix == self_ix[:, np.newaxis]
+    ip.nnearest = nnear
+    if ipclass is ipol.OrdinaryKriging:
+        weights = _loo_kriging_weights(ip, coords, ix, isself)
+    else:
+        dists = dists[~isself].reshape((npoints, nnear))
+        if ipclass is ipol.Nearest:
+            weights = np.ones(dists.shape)
+        else:
+            weights = ip._get_weights(dists)
+    ix = ix[~isself].reshape((npoints, nnear))
+    return _LeaveOneOut(ipol._neighbours_to_csr(weights, ix, npoints))
+
+
+def _loo_kriging_weights(ip, coords, ix, isself):
+    """INTERNAL: Leave-one-out ordinary kriging weights.
+
+    With :math:`A^{-1}` being the inverse of the kriging system of a
+    neighbourhood which contains point :math:`j`, the estimate of
+    :math:`z_j` from the other points :math:`m` is
+    :math:`-\\sum_{m \\neq j} A^{-1}_{jm} z_m / A^{-1}_{jj}`.
+
+    Returns the weights of shape (npoints, nnearest) of the neighbours
+    which are not flagged by ``isself``.
+    """
+    npoints, k = ix.shape
+    if k == npoints:
+        # all points form one neighbourhood, invert one system only
+        inv = np.linalg.inv(ip._krig_matrix(coords[np.newaxis])[0])
+        inv = inv[:-1, :-1]
+        weights = -inv[np.arange(npoints)[:, np.newaxis], ix]
+        weights /= np.diag(inv)[:, np.newaxis]
+    else:
+        weights = np.empty((npoints, k))
+        for chunk in ipol._chunk_slices(npoints, k + 1):
+            inv = np.linalg.inv(ip._krig_matrix(coords[ix[chunk]]))
+            rows = inv[:, :-1, :-1][isself[chunk]]
+            weights[chunk] = -rows / rows[isself[chunk]][:, np.newaxis]
+    return weights[~isself].reshape((npoints, k - 1))
+
+
 def _get_neighbours_ix(obs_coords, raw_coords, nnear):
     """Returns ``nnear`` neighbour indices per ``obs_coords`` coordinate pair
 
@@ -788,9 +1009,9 @@ def _get_neighbours_ix(obs_coords, raw_coords, nnear):
 
     """
     # plant a tree
-    tree = cKDTree(raw_coords)
+    tree = util.make_tree(raw_coords)
     # return nearest neighbour indices
-    return tree.query(obs_coords, k=nnear)[1]
+    return util.query_tree(tree, obs_coords, k=nnear)[1]
 
 
 def _get_statfunc(funcname):
@@ -813,6 +1034,8 @@ def _get_statfunc(funcname):
         # then try to find a function in this module with name funcname
         if funcname == 'best':
             newfunc = best
+        elif funcname == 'nanbest':
+            newfunc = nanbest
         else:
             # if no function can be found, raise an Exception
             raise NameError('Unknown function name option: ' + funcname)
@@ -827,13 +1050,54 @@ def best(x, y):
     Parameters
     ----------
     x : float or 1-d array of float
+        or 2-d array of shape (n, ntime) for stacked values
+    y : array of float
+        or 3-d array of shape (n, nnear, ntime) for stacked values
+
+    Returns
+    -------
+    output : 1-d array of float with length len(y)
+        or 2-d array of shape (n, ntime) for stacked values
+
+    """
+    return _best(x, y)
+
+
+def nanbest(x, y):
+    """Find the values of y which corresponds best to x, ignoring NaNs in y
+
+    Same as :func:`~wradlib.adjust.best`, but NaN is only returned if all
+    candidate values in y are NaN.
+
+    Parameters
+    ----------
+    x : float or 1-d array of float
+        or 2-d array of shape (n, ntime) for stacked values
     y : array of float
+        or 3-d array of shape (n, nnear, ntime) for stacked values
 
     Returns
     -------
     output : 1-d array of float with length len(y)
+        or 2-d array of shape (n, ntime) for stacked values
+
+    """
+    return _best(x, y, skipnan=True)
+
 
+def _best(x, y, skipnan=False):
+    """INTERNAL: Implementation of best and nanbest
     """
+    if isinstance(y, np.ndarray) and y.ndim == 3:
+        x = np.asanyarray(x)
+        assert x.shape == (y.shape[0], y.shape[2]), \
+            'x must be of shape (len(y), y.shape[2]) for 3-d y.'
+        diff = np.abs(x[:, np.newaxis] - y)
+        if skipnan:
+            diff[np.isnan(diff)] = np.inf
+        best_ix = np.argmin(diff, axis=1)
+        return y[np.arange(y.shape[0])[:, np.newaxis], best_ix,
+                 np.arange(y.shape[2])]
     if type(x) == np.ndarray:
         assert x.ndim == 1, 'x must be a 1-d array of floats or a float.'
         assert len(x) == len(y), 'Length of x and y must be equal.'
@@ -847,7 +1111,10 @@ def best(x, y):
         axis = None
     else:
         axis = 1
-    return y[np.arange(len(y)), np.argmin(np.abs(x - y), axis=axis)]
+    diff = np.abs(x - y)
+    if skipnan:
+        diff[np.isnan(diff)] = np.inf
+    return y[np.arange(len(y)), np.argmin(diff, axis=axis)]
 
 
 if __name__ == '__main__':
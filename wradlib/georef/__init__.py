@@ -13,6 +13,7 @@ Georeferencing
 .. automodule:: wradlib.georef.misc
 .. automodule:: wradlib.georef.polar
 .. automodule:: wradlib.georef.projection
+.. automodule:: wradlib.georef.regrid
 .. automodule:: wradlib.georef.raster
 .. automodule:: wradlib.georef.vector
 .. automodule:: wradlib.georef.rect
@@ -23,13 +24,17 @@ from .misc import (bin_altitude, bin_distance, site_distance, get_earth_radius)
 
 from .polar import (centroid_to_polyvert, spherical_to_xyz, spherical_to_proj,
                     spherical_to_polyvert, spherical_to_centroids,
-                    sweep_centroids)
+                    sweep_centroids, xyz_to_polar_index,
+                    polar_neighbours_stencil, PolarGeometryCache)
 
 from .rect import (get_radolan_coords, get_radolan_grid, xyz_to_spherical)
 
 from .projection import (create_osr, proj4_to_osr, reproject,
                          get_default_projection, epsg_to_osr,
-                         wkt_to_osr)
+                         wkt_to_osr, projection_cache_info,
+                         clear_projection_cache)
+
+from .regrid import PolarRegridder
 
 from .raster import (pixel_coordinates, pixel_to_map, pixel_to_map3d,
                      read_gdal_coordinates, read_gdal_values,
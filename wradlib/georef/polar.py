@@ -17,16 +17,53 @@ Polar Grid Functions
    spherical_to_centroids
    centroid_to_polyvert
    sweep_centroids
+   xyz_to_polar_index
+   polar_neighbours_stencil
+   PolarGeometryCache
 
 """
 
+import hashlib
+import os
+import tempfile
+
 import numpy as np
 import warnings
-from .projection import proj4_to_osr, reproject
+from ..util import _load_npz
+from .projection import (proj4_to_osr, reproject, wkt_to_osr, _srs_key,
+                         _LRUCache)
 from .misc import (get_default_projection, get_earth_radius,
                    bin_altitude, site_distance)
 
 
+def _get_site_projection(sitecoords, re=None):
+    """Returns the site centred aeqd projection and the earth's radius
+
+    If no radius is given, the approximate radius of the WGS84 ellipsoid for
+    the site's latitude is used together with a WGS84 aeqd projection,
+    otherwise a spherical aeqd projection with radius `re`.
+    """
+    # if no radius is given, get the approximate radius of the WGS84
+    # ellipsoid for the site's latitude
+    if re is None:
+        re = get_earth_radius(sitecoords[1])
+        # Set up aeqd-projection sitecoord-centered, wgs84 datum and ellipsoid
+        # use world azimuthal equidistant projection
+        rad = proj4_to_osr(('+proj=aeqd +lon_0={lon:f} ' +
+                            '+lat_0={lat:f} +ellps=WGS84 +datum=WGS84 ' +
+                            '+units=m +no_defs').format(lon=sitecoords[0],
+                                                        lat=sitecoords[1]))
+    else:
+        # Set up aeqd-projection sitecoord-centered, assuming spherical earth
+        # use Sphere azimuthal equidistant projection
+        rad = proj4_to_osr(('+proj=aeqd +lon_0={lon:f} ' +
+                            '+lat_0={lat:f} +a={a:f} +b={b:f}' +
+                            '+units=m +no_defs').format(lon=sitecoords[0],
+                                                        lat=sitecoords[1],
+                                                        a=re, b=re))
+    return rad, re
+
+
 def spherical_to_xyz(r, phi, theta, sitecoords, re=None, ke=4./3.):
     """Transforms spherical coordinates (r, phi, theta) to cartesian
     coordinates (x, y, z) centered at sitecoords (aeqd).
@@ -69,24 +106,7 @@ def spherical_to_xyz(r, phi, theta, sitecoords, re=None, ke=4./3.):
     except IndexError:
         centalt = 0.
 
-    # if no radius is given, get the approximate radius of the WGS84
-    # ellipsoid for the site's latitude
-    if re is None:
-        re = get_earth_radius(sitecoords[1])
-        # Set up aeqd-projection sitecoord-centered, wgs84 datum and ellipsoid
-        # use world azimuthal equidistant projection
-        rad = proj4_to_osr(('+proj=aeqd +lon_0={lon:f} ' +
-                            '+lat_0={lat:f} +ellps=WGS84 +datum=WGS84 ' +
-                            '+units=m +no_defs').format(lon=sitecoords[0],
-                                                        lat=sitecoords[1]))
-    else:
-        # Set up aeqd-projection sitecoord-centered, assuming spherical earth
-        # use Sphere azimuthal equidistant projection
-        rad = proj4_to_osr(('+proj=aeqd +lon_0={lon:f} ' +
-                            '+lat_0={lat:f} +a={a:f} +b={b:f}' +
-                            '+units=m +no_defs').format(lon=sitecoords[0],
-                                                        lat=sitecoords[1],
-                                                        a=re, b=re))
+    rad, re = _get_site_projection(sitecoords, re=re)
 
     r = np.asarray(r)
     theta = np.asarray(theta)
@@ -521,3 +541,384 @@ def sweep_centroids(nrays, rscale, nbins, elangle):
     coordinates[:, :, 1] = np.transpose(np.tile(azimuths, (nbins, 1)))
     coordinates[:, :, 2] = elangle
     return coordinates
+
+
+def _cartesian_to_polar(x, y, sitecoords, theta=0., z=None, proj=None,
+                        re=None, ke=4./3.):
+    """Returns azimuth, slant range and aeqd coordinates of cartesian points
+
+    Inverts the beam propagation model of :func:`spherical_to_xyz`. Without
+    `z` the points are assumed to lie in the beam of elevation `theta`,
+    otherwise the slant range to the point (x, y, z) is computed.
+    """
+    try:
+        sitealt = sitecoords[2]
+    except IndexError:
+        sitealt = 0.
+    rad, re = _get_site_projection(sitecoords, re=re)
+
+    x = np.asanyarray(x, dtype=np.float64)
+    y = np.asanyarray(y, dtype=np.float64)
+    if proj is not None:
+        x, y = reproject(x, y, projection_source=proj,
+                         projection_target=rad)
+
+    reff = ke * re
+    sr = reff + sitealt
+    # angle at the centre of the (effective) earth
+    gamma = np.hypot(x, y) / reff
+    if z is None:
+        beta = np.radians(theta) + gamma
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rng = np.where(beta < np.pi / 2,
+                           sr * np.sin(gamma) / np.cos(beta), np.nan)
+    else:
+        rr = reff + np.asanyarray(z, dtype=np.float64)
+        rng = np.hypot(rr * np.sin(gamma), rr * np.cos(gamma) - sr)
+    phi = np.degrees(np.arctan2(x, y)) % 360.
+    return phi, rng, x, y
+
+
+def _polar_index(phi, rng, r, az, clip=False):
+    """Returns azimuth and range indices of bins containing (phi, rng)
+
+    `r` are the exterior boundaries of the range bins, `az` the centres of
+    the (equidistant, continuously clockwise) azimuth bins.
+    """
+    naz, nr = len(az), len(r)
+    dr = _get_range_resolution(r)
+    daz = _get_azimuth_resolution(az)
+    # angular offset from the left edge of the first ray
+    offset = (phi - az[0] + 0.5 * daz) % 360.
+    with np.errstate(invalid='ignore'):
+        ri = np.floor((rng - (r[0] - dr)) / dr)
+        ai = np.floor(offset / daz)
+        if clip:
+            ri = np.clip(np.where(np.isnan(ri), nr - 1, ri), 0, nr - 1)
+            # points outside a sector scan go to the nearer edge ray
+            outside = ai >= naz
+            ai[outside] = np.where(offset[outside] - naz * daz <
+                                   360. - offset[outside], naz - 1, 0)
+            return ai.astype(np.intp), ri.astype(np.intp)
+        invalid = (np.isnan(ri) | (ri < 0) | (ri >= nr) | (ai >= naz))
+    ai[invalid] = -1
+    ri[invalid] = -1
+    return ai.astype(np.intp), ri.astype(np.intp)
+
+
+def xyz_to_polar_index(x, y, r, az, sitecoords, theta=0., z=None, proj=None,
+                       re=None, ke=4./3., clip=False):
+    """Returns the indices of the polar bins containing cartesian points.
+
+    Instead of searching the nearest bin centroid (e.g. using a KD-tree),
+    the points are transformed to azimuth and slant range by inverting the
+    4/3 earth beam propagation model of :func:`spherical_to_xyz`, the bin
+    indices follow from the azimuth and range resolution.
+
+    Parameters
+    ----------
+    x : :class:`numpy:numpy.ndarray`
+        Array of x coordinates of the points.
+    y : :class:`numpy:numpy.ndarray`
+        Array of y coordinates of the points.
+    r : :class:`numpy:numpy.ndarray`
+        Array of ranges [m]; r defines the exterior boundaries of the range
+        bins, see :func:`spherical_to_centroids`.
+    az : :class:`numpy:numpy.ndarray`
+        Array of equidistant azimuth angles [deg] of the rays.
+    sitecoords : a sequence of three floats
+        the lon/lat/alt coordinates of the radar location
+    theta : float
+        Elevation angle of scan [deg], used if `z` is not given.
+    z : :class:`numpy:numpy.ndarray`
+        Array of altitudes of the points [m], optional.
+    proj : osr object
+        Projection of x and y, defaults to None (radar centred aeqd).
+    re : float
+        earth's radius [m]
+    ke : float
+        adjustment factor to account for the refractivity gradient
+    clip : bool
+        If True, points outside the sweep get the index of the nearest
+        range gate or edge ray, otherwise both indices are -1.
+
+    Returns
+    -------
+    az_idx : :class:`numpy:numpy.ndarray`
+        azimuth indices of shape x.shape
+    r_idx : :class:`numpy:numpy.ndarray`
+        range indices of shape x.shape
+    """
+    r, az = _check_polar_coords(r, az)
+    phi, rng, _, _ = _cartesian_to_polar(x, y, sitecoords, theta=theta, z=z,
+                                         proj=proj, re=re, ke=ke)
+    return _polar_index(phi, rng, r, az, clip=clip)
+
+
+def polar_neighbours_stencil(x, y, r, az, sitecoords, k=9, theta=0.,
+                             proj=None, re=None, ke=4./3.):
+    """Returns the k nearest polar bins of cartesian points.
+
+    This replaces a KD-tree over all bin centroids. The bin containing each
+    point is located with :func:`xyz_to_polar_index`, the bins next to it
+    give an upper bound of the distance to the k-th neighbour, and only the
+    rays and range gates within this bound are searched. The cost per point
+    does not depend on the number of bins. Distances are measured between
+    the points and the bin centroids in the radar centred aeqd projection.
+
+    Parameters
+    ----------
+    x : :class:`numpy:numpy.ndarray`
+        Array of x coordinates of the points.
+    y : :class:`numpy:numpy.ndarray`
+        Array of y coordinates of the points.
+    r : :class:`numpy:numpy.ndarray`
+        Array of ranges [m]; r defines the exterior boundaries of the range
+        bins, see :func:`spherical_to_centroids`.
+    az : :class:`numpy:numpy.ndarray`
+        Array of equidistant azimuth angles [deg] of the rays.
+    sitecoords : a sequence of three floats
+        the lon/lat/alt coordinates of the radar location
+    k : int
+        number of neighbours
+    theta : float
+        Elevation angle of scan [deg]
+    proj : osr object
+        Projection of x and y, defaults to None (radar centred aeqd).
+    re : float
+        earth's radius [m]
+    ke : float
+        adjustment factor to account for the refractivity gradient
+
+    Returns
+    -------
+    dist : :class:`numpy:numpy.ndarray`
+        distances of shape (num points, k), sorted ascending
+    ix : :class:`numpy:numpy.ndarray`
+        indices of shape (num points, k) into the flattened
+        (num azimuths, num ranges) sweep
+
+    Note
+    ----
+    For k=1 the trailing dimension is dropped, like for
+    :func:`wradlib.util.query_tree`.
+    """
+    r, az = _check_polar_coords(r, az)
+    try:
+        sitealt = sitecoords[2]
+    except IndexError:
+        sitealt = 0.
+    phi, rng, px, py = _cartesian_to_polar(np.ravel(x), np.ravel(y),
+                                           sitecoords, theta=theta,
+                                           proj=proj, re=re, ke=ke)
+    ai, ri = _polar_index(phi, rng, r, az, clip=True)
+
+    naz, nr = len(az), len(r)
+    if k > naz * nr:
+        raise ValueError('k={0} exceeds the number of bins '
+                         '{1}.'.format(k, naz * nr))
+
+    # ground distance of the bin centroids
+    if re is None:
+        re = get_earth_radius(sitecoords[1])
+    rc = r - 0.5 * _get_range_resolution(r)
+    s = site_distance(rc, theta, bin_altitude(rc, theta, sitealt, re, ke=ke),
+                      re, ke=ke)
+    daz = np.radians(_get_azimuth_resolution(az))
+    full = np.isclose(naz * daz, 2 * np.pi)
+
+    npts = len(px)
+    dist = np.empty((npts, k))
+    ix = np.empty((npts, k), dtype=np.intp)
+    chunksize = 2 ** 16
+    for start in range(0, npts, chunksize):
+        sl = slice(start, min(start + chunksize, npts))
+        dist[sl], ix[sl] = _polar_neighbours(phi[sl], np.hypot(px[sl], py[sl]),
+                                             ai[sl], ri[sl], s, az, daz, k,
+                                             full)
+    if k == 1:
+        return dist[:, 0], ix[:, 0]
+    return dist, ix
+
+
+def _polar_neighbours(phi, rho, ai, ri, s, az, daz, k, full):
+    """Returns distances and flat indices of the k nearest bin centroids
+
+    Points are given by azimuth `phi` [deg] and ground distance `rho`, bin
+    centroids by their ground distance `s` and azimuth `az`.
+    """
+    naz, nr = len(az), len(s)
+    npts = len(rho)
+    # any block of k bins next to the point's bin gives an upper bound of
+    # the distance to the k-th neighbour
+    delta = np.radians(phi - az[ai])
+    gate = np.abs(np.diff(s)).max() if nr > 1 else 0.
+    bound = np.full(npts, np.inf)
+    if nr >= k:
+        # k gates along the point's own ray
+        bound = np.hypot(rho * np.sin(delta),
+                         np.abs(rho * np.cos(delta) - s[ri]) + k * gate)
+    delta = np.abs((delta + np.pi) % (2 * np.pi) - np.pi)
+    for nray in range(2, min(k, naz) + 1):
+        ngate = -(-k // nray)
+        if ngate > nr:
+            continue
+        # distance along the gate's arc plus radial distance
+        far = np.abs(s[ri]) + (ngate - 1) * gate
+        bound = np.minimum(bound, np.abs(rho - s[ri]) + (ngate - 1) * gate +
+                           far * (delta + (nray - 1) * daz))
+    bound = bound * (1. + 1e-9) + 1e-6
+
+    # rays within the bound, the distance to the ray is rho * sin(angle)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dmax = np.where(bound < rho, np.arcsin(np.minimum(bound / rho, 1.)),
+                        np.pi)
+    half = np.minimum(np.ceil(dmax / daz) + 1, naz).astype(np.intp)
+    if full:
+        nray = np.minimum(2 * half + 1, naz)
+        ray0 = np.where(nray == naz, 0, ai - half)
+    else:
+        ray0 = np.maximum(ai - half, 0)
+        nray = np.minimum(ai + half + 1, naz) - ray0
+    pnt = np.repeat(np.arange(npts), nray)
+    ray = (np.repeat(ray0, nray) + np.arange(nray.sum()) -
+           np.repeat(np.cumsum(nray) - nray, nray)) % naz
+
+    # gates within the bound on each candidate ray
+    delta = np.radians(phi[pnt] - az[ray])
+    along = rho[pnt] * np.cos(delta)
+    lateral = rho[pnt] * np.sin(delta)
+    width = np.sqrt(np.maximum(bound[pnt] ** 2 - lateral ** 2, 0.))
+    lo = np.searchsorted(s, along - width, side='left')
+    ngate = np.searchsorted(s, along + width, side='right') - lo
+    cand = np.repeat(np.arange(len(ray)), ngate)
+    gate = (np.repeat(lo, ngate) + np.arange(ngate.sum()) -
+            np.repeat(np.cumsum(ngate) - ngate, ngate))
+
+    # k nearest candidates per point
+    d = np.hypot(along[cand] - s[gate], lateral[cand])
+    # candidates are grouped by point, sort by distance within the groups
+    key = pnt[cand] + d / (d.max() * (1. + 1e-6) + 1e-6)
+    order = np.argsort(key)
+    count = np.bincount(pnt[cand], minlength=npts)
+    sel = order[(np.cumsum(count) - count)[:, None] + np.arange(k)]
+    return d[sel], ray[cand[sel]] * nr + gate[sel]
+
+
+def _geometry_key(name, proj, *args, **kwargs):
+    """Return a hash of a geometry function name and its arguments"""
+    h = hashlib.sha1(name.encode('utf-8'))
+    for arg in args:
+        arr = np.ascontiguousarray(arg, dtype=np.float64)
+        h.update(repr(arr.shape).encode('utf-8'))
+        h.update(arr.tobytes())
+    srs = None if proj is None else _srs_key(proj)
+    h.update(repr(srs).encode('utf-8'))
+    h.update(repr(sorted(kwargs.items())).encode('utf-8'))
+    return h.hexdigest()
+
+
+class PolarGeometryCache(object):
+    """Memoizes the georeferencing of radar sweeps.
+
+    The results of :func:`spherical_to_proj`, :func:`spherical_to_centroids`
+    and :func:`spherical_to_polyvert` are kept in memory, keyed by a hash
+    of the input arguments. With `cachedir` they are additionally stored as
+    uncompressed npz files, which are memory-mapped when loaded again, so
+    that several processes share the same pages.
+
+    The returned arrays are read-only and shared between calls.
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of geometries kept in memory
+    cachedir : string
+        directory for the npz files, created if it does not exist,
+        defaults to None (memory only)
+    mmap_mode : {None, 'r', 'c'}
+        memory-map mode used for loading npz files, defaults to 'r'
+
+    Examples
+    --------
+    >>> cache = PolarGeometryCache()  # doctest: +SKIP
+    >>> coords, rad = cache.spherical_to_centroids(r, az, el,
+    ...                                            site)  # doctest: +SKIP
+    """
+    def __init__(self, maxsize=32, cachedir=None, mmap_mode='r'):
+        self._cache = _LRUCache(maxsize=maxsize)
+        self.cachedir = cachedir
+        self.mmap_mode = mmap_mode
+
+    def spherical_to_proj(self, r, phi, theta, sitecoords, proj=None,
+                          re=None, ke=4. / 3.):
+        """Cached version of :func:`spherical_to_proj`"""
+        return self._get(spherical_to_proj, r, phi, theta, sitecoords,
+                         proj=proj, re=re, ke=ke)
+
+    def spherical_to_centroids(self, r, phi, theta, sitecoords, proj=None):
+        """Cached version of :func:`spherical_to_centroids`"""
+        return self._get(spherical_to_centroids, r, phi, theta, sitecoords,
+                         proj=proj)
+
+    def spherical_to_polyvert(self, r, phi, theta, sitecoords, proj=None):
+        """Cached version of :func:`spherical_to_polyvert`"""
+        return self._get(spherical_to_polyvert, r, phi, theta, sitecoords,
+                         proj=proj)
+
+    def info(self):
+        """Return CacheInfo(hits, misses, maxsize, currsize) of the
+        in-memory cache"""
+        return self._cache.info()
+
+    def clear(self):
+        """Clear the in-memory cache, files in `cachedir` are kept"""
+        self._cache.clear()
+
+    def _get(self, func, r, phi, theta, sitecoords, proj=None, **kwargs):
+        key = _geometry_key(func.__name__, proj, r, phi, theta, sitecoords,
+                            **kwargs)
+        arrays = self._cache.get(
+            key, lambda: self._load_or_compute(key, func, r, phi, theta,
+                                               sitecoords, proj=proj,
+                                               **kwargs))
+        if 'rad' in arrays:
+            return arrays['coords'], wkt_to_osr(str(arrays['rad'][0]))
+        return arrays['coords']
+
+    def _filename(self, key):
+        return os.path.join(self.cachedir, 'polar_{0}.npz'.format(key))
+
+    def _load_or_compute(self, key, func, *args, **kwargs):
+        if self.cachedir is not None and os.path.exists(self._filename(key)):
+            arrays = _load_npz(self._filename(key), mmap_mode=self.mmap_mode)
+        else:
+            res = func(*args, **kwargs)
+            if isinstance(res, tuple):
+                arrays = dict(coords=np.asarray(res[0]),
+                              rad=np.array([res[1].ExportToWkt()]))
+            else:
+                arrays = dict(coords=np.asarray(res))
+            if self.cachedir is not None:
+                self._save(key, arrays)
+        for arr in arrays.values():
+            arr.flags.writeable = False
+        return arrays
+
+    def _save(self, key, arrays):
+        filename = self._filename(key)
+        try:
+            os.makedirs(self.cachedir)
+        except OSError:
+            # already existing (or just created by another process)
+            if not os.path.isdir(self.cachedir):
+                raise
+        # unique per process and thread, renamed once completely written
+        fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=self.cachedir)
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        try:
+            os.rename(tmpname, filename)
+        except OSError:
+            # another process was faster
+            os.remove(tmpname)
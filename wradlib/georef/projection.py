@@ -16,11 +16,143 @@ Projection Functions
    proj4_to_osr
    epsg_to_osr
    wkt_to_osr
+   projection_cache_info
+   clear_projection_cache
 """
 
+import threading
+from collections import OrderedDict, namedtuple
+from multiprocessing.pool import ThreadPool
+
 from osgeo import osr, ogr
 import numpy as np
 
+from ..util import import_optional, OptionalModuleStub
+
+pyproj = import_optional('pyproj')
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize',
+                                     'currsize'])
+
+
+class _LRUCache(object):
+    """Thread-safe least recently used cache
+
+    Values are created by a factory on a cache miss. The factory is called
+    outside of the lock, so concurrent misses of the same key may build the
+    value twice, the last one wins.
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of cached items
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, factory):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self._misses += 1
+            else:
+                self._data[key] = value
+                self._hits += 1
+                return value
+        value = factory()
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize,
+                             len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+_srs_cache = _LRUCache(maxsize=128)
+_transform_cache = _LRUCache(maxsize=128)
+
+
+def _thread_local_item(key, factory):
+    """Return the object created by `factory` for `key` and the current
+    thread
+
+    The transformation cache holds one :class:`threading.local` per key, so
+    that objects which are not thread-safe are created once per thread.
+    """
+    local = _transform_cache.get(key, threading.local)
+    try:
+        return local.item
+    except AttributeError:
+        local.item = factory()
+        return local.item
+
+
+def _cached_srs(key, factory):
+    """Return a copy of the cached spatial reference for `key`
+
+    The cached object is cloned, so callers may modify the returned
+    spatial reference without touching the cache.
+    """
+    return _srs_cache.get(key, factory).Clone()
+
+
+def _srs_key(srs):
+    strategy = getattr(srs, 'GetAxisMappingStrategy', None)
+    return (srs.ExportToWkt(), strategy() if strategy else None)
+
+
+def _get_transformation(projection_source, projection_target):
+    """Return a cached osr.CoordinateTransformation
+
+    Transformation objects are not thread-safe, so every thread gets its own.
+    """
+    key = (_srs_key(projection_source), _srs_key(projection_target))
+    return _thread_local_item(
+        key, lambda: osr.CoordinateTransformation(projection_source,
+                                                  projection_target))
+
+
+def projection_cache_info():
+    """Return statistics of the spatial reference and transformation caches
+
+    :func:`proj4_to_osr`, :func:`epsg_to_osr`, :func:`wkt_to_osr` and
+    :func:`get_default_projection` keep their results in a least recently
+    used cache, :func:`reproject` does so with the coordinate
+    transformation objects, keyed by source and target and holding one
+    object per thread.
+
+    Returns
+    -------
+    info : dict
+        CacheInfo(hits, misses, maxsize, currsize) for the keys
+        'srs' and 'transform'
+    """
+    return dict(srs=_srs_cache.info(), transform=_transform_cache.info())
+
+
+def clear_projection_cache():
+    """Clear the spatial reference and transformation caches and reset
+    their statistics.
+    """
+    _srs_cache.clear()
+    _transform_cache.clear()
+
 
 def create_osr(projname, **kwargs):
     """Conveniently supports the construction of osr spatial reference objects
@@ -132,6 +264,10 @@ def proj4_to_osr(proj4str):
     See :ref:`/notebooks/radolan/radolan_grid.ipynb#PROJ.4`.
 
     """
+    return _cached_srs(('proj4', proj4str), lambda: _proj4_to_osr(proj4str))
+
+
+def _proj4_to_osr(proj4str):
     proj = osr.SpatialReference()
     proj.ImportFromProj4(proj4str)
     proj.AutoIdentifyEPSG()
@@ -173,6 +309,16 @@ def reproject(*args, **kwargs):
         defaults to EPSG(4326)
     projection_target : osr object
         defaults to EPSG(4326)
+    chunksize : int
+        number of points transformed at once, defaults to 65536
+    nthreads : int
+        number of threads transforming the chunks in parallel,
+        defaults to None (serial)
+    use_pyproj : bool
+        use the array based :class:`pyproj.Transformer` if pyproj is
+        installed and the axis order can be matched, defaults to False.
+        Results may differ slightly from the OSR transformation, e.g. if
+        pyproj and GDAL use different PROJ versions or datum grids.
 
     Returns
     -------
@@ -194,10 +340,11 @@ def reproject(*args, **kwargs):
         C = np.asanyarray(args[0])
         cshape = C.shape
         numCols = C.shape[-1]
-        C = C.reshape(-1, numCols)
         if numCols < 2 or numCols > 3:
             raise TypeError('Input Array column mismatch '
                             'to %s' % ('reproject'))
+        C = C.reshape(-1, numCols)
+        cols = [C[:, i] for i in range(numCols)]
     else:
         if len(args) == 2:
             X, Y = (np.asanyarray(arg) for arg in args)
@@ -218,27 +365,24 @@ def reproject(*args, **kwargs):
         if 'Z' in locals():
             if xshape != zshape:
                 raise TypeError('Incompatible Z input to %s' % ('reproject'))
-            C = np.concatenate([X.ravel()[:, None],
-                                Y.ravel()[:, None],
-                                Z.ravel()[:, None]], axis=1)
+            cols = [X.ravel(), Y.ravel(), Z.ravel()]
         else:
-            C = np.concatenate([X.ravel()[:, None],
-                                Y.ravel()[:, None]], axis=1)
+            cols = [X.ravel(), Y.ravel()]
 
     projection_source = kwargs.get('projection_source',
                                    get_default_projection())
     projection_target = kwargs.get('projection_target',
                                    get_default_projection())
+    chunksize = kwargs.get('chunksize', 2 ** 16)
+    nthreads = kwargs.get('nthreads', None)
+    use_pyproj = kwargs.get('use_pyproj', False)
 
-    ct = osr.CoordinateTransformation(projection_source, projection_target)
-    trans = np.array(ct.TransformPoints(C))
+    trans = _transform_chunked(cols, projection_source, projection_target,
+                               chunksize=chunksize, nthreads=nthreads,
+                               use_pyproj=use_pyproj)
 
     if len(args) == 1:
-        # here we could do this one
-        # return(np.array(ct.TransformPoints(C))[...,0:numCols]))
-        # or this one
-        trans = trans[:, 0:numCols].reshape(cshape)
-        return trans
+        return trans.reshape(cshape)
     else:
         X = trans[:, 0].reshape(xshape)
         Y = trans[:, 1].reshape(yshape)
@@ -249,10 +393,115 @@ def reproject(*args, **kwargs):
             return X, Y, Z
 
 
+def _pyproj_always_xy(projection_source, projection_target):
+    """Return pyproj's `always_xy` matching the OSR axis order
+
+    Returns None if the OSR axis mapping can't be reproduced by pyproj.
+    """
+    strategies = set()
+    for srs in (projection_source, projection_target):
+        strategy = getattr(srs, 'GetAxisMappingStrategy', None)
+        strategies.add(strategy() if strategy else None)
+    if len(strategies) != 1:
+        return None
+    strategy = strategies.pop()
+    if strategy is None or strategy == getattr(osr,
+                                               'OAMS_TRADITIONAL_GIS_ORDER',
+                                               None):
+        return True
+    if strategy == getattr(osr, 'OAMS_AUTHORITY_COMPLIANT', None):
+        return False
+    return None
+
+
+def _get_pyproj_transformer(projection_source, projection_target,
+                            always_xy):
+    """Return a cached pyproj.Transformer, one per thread"""
+    key = ('pyproj', _srs_key(projection_source),
+           _srs_key(projection_target), always_xy)
+    return _thread_local_item(
+        key, lambda: pyproj.Transformer.from_crs(
+            projection_source.ExportToWkt(), projection_target.ExportToWkt(),
+            always_xy=always_xy))
+
+
+def _transform_chunked(cols, projection_source, projection_target,
+                       chunksize=2 ** 16, nthreads=None, use_pyproj=False):
+    """Transform coordinate columns chunk by chunk into a preallocated array
+
+    Parameters
+    ----------
+    cols : list
+        list of 2 or 3 flat :class:`numpy:numpy.ndarray` with x, y (and z)
+    projection_source : osr.SpatialReference
+    projection_target : osr.SpatialReference
+    chunksize : int
+        number of points transformed at once
+    nthreads : int
+        number of threads working on the chunks, defaults to serial
+        processing
+    use_pyproj : bool
+        use the array based pyproj.Transformer if pyproj is installed
+
+    Returns
+    -------
+    out : :class:`numpy:numpy.ndarray`
+        array of shape (n, len(cols)) with the transformed coordinates
+    """
+    npts = len(cols[0])
+    ncols = len(cols)
+    out = np.empty((npts, ncols), dtype=np.float64)
+    chunksize = max(int(chunksize), 1)
+    chunks = [slice(i, min(i + chunksize, npts))
+              for i in range(0, npts, chunksize)]
+
+    always_xy = None
+    if use_pyproj and not isinstance(pyproj, OptionalModuleStub):
+        always_xy = _pyproj_always_xy(projection_source, projection_target)
+
+    if always_xy is not None:
+        def transform(sl):
+            trf = _get_pyproj_transformer(projection_source,
+                                          projection_target, always_xy)
+            res = trf.transform(*[np.asarray(c[sl], dtype=np.float64)
+                                  for c in cols])
+            for i in range(ncols):
+                out[sl, i] = res[i]
+    else:
+        def transform(sl):
+            ct = _get_transformation(projection_source, projection_target)
+            chunk = np.empty((sl.stop - sl.start, ncols), dtype=np.float64)
+            for i in range(ncols):
+                chunk[:, i] = cols[i][sl]
+            out[sl] = np.array(ct.TransformPoints(chunk))[:, :ncols]
+
+    if nthreads and nthreads > 1 and len(chunks) > 1:
+        pool = ThreadPool(min(nthreads, len(chunks)))
+        try:
+            pool.map(transform, chunks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for sl in chunks:
+            transform(sl)
+    return out
+
+
 def get_default_projection():
     """Create a default projection object (wgs84)"""
+    return _cached_srs(('epsg', 4326), lambda: _epsg_to_osr(4326))
+
+
+def _epsg_to_osr(epsg):
+    proj = osr.SpatialReference()
+    proj.ImportFromEPSG(epsg)
+    return proj
+
+
+def _wkt_to_osr(wkt):
     proj = osr.SpatialReference()
-    proj.ImportFromEPSG(4326)
+    proj.ImportFromWkt(wkt)
     return proj
 
 
@@ -271,8 +520,8 @@ def epsg_to_osr(epsg=None):
     """
     proj = None
     if epsg:
-        proj = osr.SpatialReference()
-        proj.ImportFromEPSG(epsg)
+        epsg = int(epsg)
+        proj = _cached_srs(('epsg', epsg), lambda: _epsg_to_osr(epsg))
     else:
         proj = get_default_projection()
     return proj
@@ -294,8 +543,7 @@ def wkt_to_osr(wkt=None):
     """
     proj = None
     if wkt:
-        proj = osr.SpatialReference()
-        proj.ImportFromWkt(wkt)
+        proj = _cached_srs(('wkt', wkt), lambda: _wkt_to_osr(wkt))
     else:
         proj = get_default_projection()
     return proj
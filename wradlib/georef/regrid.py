@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# Copyright (c) 2011-2018, wradlib developers.
+# Distributed under the MIT License. See LICENSE.txt for more info.
+
+"""
+Polar Regridding
+^^^^^^^^^^^^^^^^
+
+.. autosummary::
+   :nosignatures:
+   :toctree: generated/
+
+   PolarRegridder
+
+"""
+
+import numpy as np
+from scipy import sparse
+
+from ..util import _load_npz
+from .polar import (spherical_to_polyvert, _cartesian_to_polar, _polar_index,
+                    _check_polar_coords, _get_range_resolution,
+                    _get_azimuth_resolution)
+
+
+class PolarRegridder(object):
+    """Precomputed sparse operator mapping a polar sweep onto a raster.
+
+    The mapping from the bins of a sweep to the target grid is computed once
+    and held as a :class:`scipy:scipy.sparse.csr_matrix` of shape
+    (number of grid points, number of bins). Regridding a stack of scans of
+    the same geometry is then a single sparse matrix product.
+
+    Parameters
+    ----------
+    r : :class:`numpy:numpy.ndarray`
+        Array of ranges [m]; r defines the exterior boundaries of the range
+        bins, see :func:`~wradlib.georef.spherical_to_centroids`.
+    az : :class:`numpy:numpy.ndarray`
+        Array of equidistant azimuth angles [deg] of the rays.
+    sitecoords : a sequence of three floats
+        the lon/lat/alt coordinates of the radar location
+    x : :class:`numpy:numpy.ndarray`
+        x coordinates of the grid points
+    y : :class:`numpy:numpy.ndarray`
+        y coordinates of the grid points, same shape as x
+    method : string
+        'nearest' (bin containing the grid point), 'bilinear' (bilinear in
+        azimuth and range between the bin centroids) or 'area' (mean of the
+        bins weighted by their overlap with the grid cells)
+    theta : float
+        Elevation angle of scan [deg]
+    proj : osr object
+        Projection of x and y, defaults to None (radar centred aeqd).
+    re : float
+        earth's radius [m]
+    ke : float
+        adjustment factor to account for the refractivity gradient
+
+    Note
+    ----
+    The method 'area' needs a regular grid (as from :func:`numpy.meshgrid`)
+    of cell centres. The bin polygons come from
+    :func:`~wradlib.georef.spherical_to_polyvert` and thus always use the
+    default earth model, `re` and `ke` are ignored.
+
+    Grid points which are not covered by the sweep are set to
+    ``fill_value`` on evaluation. NaN values in the sweep propagate to all
+    grid points they contribute to.
+
+    Examples
+    --------
+    >>> regridder = PolarRegridder(r, az, site, x, y,
+    ...                            method='bilinear')  # doctest: +SKIP
+    >>> grids = regridder(sweeps)  # doctest: +SKIP
+    >>> regridder.dump('regridder.npz')  # doctest: +SKIP
+    >>> regridder = PolarRegridder.load('regridder.npz')  # doctest: +SKIP
+    """
+    def __init__(self, r, az, sitecoords, x, y, method='nearest', theta=0.,
+                 proj=None, re=None, ke=4. / 3.):
+        x = np.asanyarray(x, dtype=np.float64)
+        y = np.asanyarray(y, dtype=np.float64)
+        if x.shape != y.shape:
+            raise ValueError('x and y need to have the same shape.')
+        r, az = _check_polar_coords(r, az)
+        self.method = method
+        self.polar_shape = (len(az), len(r))
+        self.grid_shape = x.shape
+        if method == 'nearest':
+            weights, ix = self._nearest(r, az, sitecoords, x, y, theta,
+                                        proj, re, ke)
+        elif method == 'bilinear':
+            weights, ix = self._bilinear(r, az, sitecoords, x, y, theta,
+                                         proj, re, ke)
+        elif method == 'area':
+            self.operator = _area_operator(r, az, sitecoords, x, y, theta,
+                                           proj)
+            return
+        else:
+            raise ValueError("Unknown method %r, use 'nearest', 'bilinear' "
+                             "or 'area'." % method)
+        npts, k = weights.shape
+        operator = sparse.csr_matrix(
+            (weights.ravel(), ix.ravel(), np.arange(0, npts * k + 1, k)),
+            shape=(npts, len(az) * len(r)))
+        operator.sum_duplicates()
+        operator.eliminate_zeros()
+        self.operator = operator
+
+    def __call__(self, vals, fill_value=np.nan):
+        """Regrid one or a stack of sweeps.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of shape (..., number of azimuths, number of ranges)
+        fill_value : float
+            value of grid points not covered by the sweep
+
+        Returns
+        -------
+        output : :class:`numpy:numpy.ndarray`
+            array of shape (...,) + grid shape
+        """
+        vals = np.asanyarray(vals)
+        if tuple(vals.shape[-2:]) != self.polar_shape:
+            raise ValueError('Shape of vals %s does not match the sweep '
+                             'geometry %s.' % (vals.shape, self.polar_shape))
+        stack = vals.shape[:-2]
+        v = vals.reshape((-1, self.operator.shape[1])).T
+        out = np.asarray(self.operator.dot(v))
+        empty = np.diff(self.operator.indptr) == 0
+        if np.any(empty):
+            out[empty] = fill_value
+        return out.T.reshape(stack + self.grid_shape)
+
+    def get_operator(self):
+        """Return the sparse operator of shape (number of grid points,
+        number of bins)"""
+        return self.operator
+
+    def dump(self, filename):
+        """Save the regridder to an uncompressed npz file
+
+        The operator is stored like by :func:`wradlib.ipol.save_operator`,
+        so :func:`wradlib.ipol.load_operator` can read it as well.
+
+        Parameters
+        ----------
+        filename : string
+            path of the output file
+        """
+        operator = sparse.csr_matrix(self.operator)
+        with open(filename, 'wb') as f:
+            np.savez(f, data=operator.data, indices=operator.indices,
+                     indptr=operator.indptr,
+                     shape=np.array(operator.shape),
+                     grid_shape=np.array(self.grid_shape, dtype=np.intp),
+                     polar_shape=np.array(self.polar_shape, dtype=np.intp),
+                     method=np.array(self.method))
+
+    @classmethod
+    def load(cls, filename, mmap_mode='r'):
+        """Create a regridder saved by :meth:`~PolarRegridder.dump`
+
+        Parameters
+        ----------
+        filename : string
+            path of the npz file
+        mmap_mode : {None, 'r', 'r+', 'c'}
+            memory-map the stored arrays, defaults to 'r'
+
+        Returns
+        -------
+        obj : :class:`PolarRegridder`
+        """
+        arrays = _load_npz(filename, mmap_mode=mmap_mode)
+        obj = cls.__new__(cls)
+        obj.method = str(arrays['method'])
+        obj.grid_shape = tuple(int(i) for i in arrays['grid_shape'])
+        obj.polar_shape = tuple(int(i) for i in arrays['polar_shape'])
+        obj.operator = sparse.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=tuple(int(i) for i in arrays['shape']))
+        return obj
+
+    @staticmethod
+    def _nearest(r, az, sitecoords, x, y, theta, proj, re, ke):
+        phi, rng, _, _ = _cartesian_to_polar(x.ravel(), y.ravel(),
+                                             sitecoords, theta=theta,
+                                             proj=proj, re=re, ke=ke)
+        ai, ri = _polar_index(phi, rng, r, az)
+        valid = ai >= 0
+        ix = np.where(valid, ai * len(r) + ri, 0)
+        return valid[:, None].astype(np.float64), ix[:, None]
+
+    @staticmethod
+    def _bilinear(r, az, sitecoords, x, y, theta, proj, re, ke):
+        naz, nr = len(az), len(r)
+        phi, rng, _, _ = _cartesian_to_polar(x.ravel(), y.ravel(),
+                                             sitecoords, theta=theta,
+                                             proj=proj, re=re, ke=ke)
+        # only points inside the sweep get weights
+        ai, _ = _polar_index(phi, rng, r, az)
+        valid = ai >= 0
+
+        # fractional position between the bin centroids, points in the outer
+        # half of the first and last gates and rays are extrapolated
+        # constantly
+        dr = _get_range_resolution(r)
+        fr = np.clip((np.where(valid, rng, 0.) - (r[0] - 0.5 * dr)) / dr, 0,
+                     nr - 1)
+        i0 = np.minimum(np.floor(fr), max(nr - 2, 0)).astype(np.intp)
+        i1 = np.minimum(i0 + 1, nr - 1)
+        t = fr - i0
+
+        daz = _get_azimuth_resolution(az)
+        fa = ((phi - az[0]) % 360.) / daz
+        if np.isclose(naz * daz, 360.):
+            j0 = np.floor(fa).astype(np.intp) % naz
+            u = fa - np.floor(fa)
+            j1 = (j0 + 1) % naz
+        else:
+            # sector scan, the offset is negative for the left half ray
+            fa = np.where(fa > naz, fa - 360. / daz, fa)
+            fa = np.clip(fa, 0, naz - 1)
+            j0 = np.minimum(np.floor(fa), max(naz - 2, 0)).astype(np.intp)
+            j1 = np.minimum(j0 + 1, naz - 1)
+            u = fa - j0
+
+        weights = np.stack(((1 - u) * (1 - t), (1 - u) * t,
+                            u * (1 - t), u * t), axis=-1)
+        weights[~valid] = 0.
+        ix = np.stack((j0 * nr + i0, j0 * nr + i1,
+                       j1 * nr + i0, j1 * nr + i1), axis=-1)
+        return weights, ix
+
+
+def _area_operator(r, az, sitecoords, x, y, theta, proj,
+                   maxitems=2 ** 18):
+    """Returns the area weighted operator of polar bins and grid cells"""
+    if x.ndim != 2:
+        raise ValueError("Method 'area' needs 2-D grids of cell centres.")
+    ny, nx = x.shape
+    dx = x[0, 1] - x[0, 0] if nx > 1 else 0.
+    dy = y[1, 0] - y[0, 0] if ny > 1 else 0.
+    ref_x = x[0, 0] + dx * np.arange(nx)[None, :]
+    ref_y = y[0, 0] + dy * np.arange(ny)[:, None]
+    if (dx == 0 or dy == 0 or not np.allclose(x, ref_x) or
+            not np.allclose(y, ref_y)):
+        raise ValueError("Method 'area' needs a regular grid.")
+
+    polyvert = spherical_to_polyvert(r, az, theta, sitecoords, proj=proj)
+    if proj is None:
+        polyvert = polyvert[0]
+    # bin corners in grid index space, cells are unit squares there
+    quads = np.empty(polyvert.shape[:1] + (4, 2))
+    quads[..., 0] = (polyvert[:, :4, 1] - y[0, 0]) / dy
+    quads[..., 1] = (polyvert[:, :4, 0] - x[0, 0]) / dx
+    lo = np.maximum(np.floor(quads.min(axis=1) + 0.5), 0).astype(np.intp)
+    hi = np.minimum(np.floor(quads.max(axis=1) + 0.5),
+                    [ny - 1, nx - 1]).astype(np.intp)
+    ncells = np.maximum(hi - lo + 1, 0).prod(axis=1)
+
+    rows, cols, data = [], [], []
+    start = 0
+    nbins = len(quads)
+    while start < nbins:
+        # bins in chunks of about maxitems bin/cell pairs
+        stop = start + max(1, np.count_nonzero(
+            np.cumsum(ncells[start:]) <= maxitems))
+        sel = slice(start, stop)
+        nc = ncells[sel]
+        width = (hi[sel, 1] - lo[sel, 1] + 1)
+        pair = np.repeat(np.arange(start, stop), nc)
+        j = np.arange(nc.sum()) - np.repeat(np.cumsum(nc) - nc, nc)
+        cell = np.stack((lo[pair, 0] + j // np.repeat(width, nc),
+                         lo[pair, 1] + j % np.repeat(width, nc)), axis=-1)
+        area = _clipped_area(quads[pair], cell - 0.5, cell + 0.5)
+        keep = area > 0
+        rows.append(cell[keep, 0] * nx + cell[keep, 1])
+        cols.append(pair[keep])
+        data.append(area[keep])
+        start = stop
+
+    operator = sparse.csr_matrix((np.concatenate(data),
+                                  (np.concatenate(rows),
+                                   np.concatenate(cols))),
+                                 shape=(nx * ny, nbins))
+    # area weighted mean of the bins overlapping a cell
+    wsum = np.asarray(operator.sum(axis=1)).ravel()
+    wsum[wsum == 0] = 1.
+    return sparse.diags(1. / wsum).dot(operator).tocsr()
+
+
+def _clipped_area(poly, lo, hi):
+    """Returns the areas of convex polygons clipped to rectangles
+
+    Parameters
+    ----------
+    poly : :class:`numpy:numpy.ndarray`
+        polygon vertices of shape (n, nvert, 2)
+    lo : :class:`numpy:numpy.ndarray`
+        lower corners of the rectangles of shape (n, 2)
+    hi : :class:`numpy:numpy.ndarray`
+        upper corners of the rectangles of shape (n, 2)
+
+    Returns
+    -------
+    area : :class:`numpy:numpy.ndarray`
+        array of shape (n,)
+    """
+    n, nvert = poly.shape[:2]
+    count = np.full(n, nvert, dtype=np.intp)
+    rows = np.arange(n)[:, None]
+    for dim, bound, sign in [(0, lo, 1.), (0, hi, -1.),
+                             (1, lo, 1.), (1, hi, -1.)]:
+        # Sutherland-Hodgman clipping at one edge of the rectangles
+        m = poly.shape[1]
+        idx = np.arange(m)
+        nxt = np.where(idx + 1 < count[:, None], idx + 1, 0)
+        cur_pt = poly
+        nxt_pt = poly[rows, nxt]
+        dcur = sign * (cur_pt[..., dim] - bound[:, dim, None])
+        dnxt = sign * (nxt_pt[..., dim] - bound[:, dim, None])
+        used = idx < count[:, None]
+        inside = dcur >= 0
+        cross = used & (inside != (dnxt >= 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.where(cross, dcur / (dcur - dnxt), 0.)
+        isec = cur_pt + frac[..., None] * (nxt_pt - cur_pt)
+        out = np.stack((cur_pt, isec), axis=2).reshape(n, 2 * m, 2)
+        mask = np.stack((used & inside, cross), axis=2).reshape(n, 2 * m)
+        count = mask.sum(axis=1)
+        order = np.argsort(~mask, axis=1, kind='mergesort')
+        width = max(int(count.max()), 1)
+        poly = out[rows, order[:, :width]]
+    idx = np.arange(poly.shape[1])
+    used = idx < count[:, None]
+    nxt = poly[rows, np.where(idx + 1 < count[:, None], idx + 1, 0)]
+    cross = poly[..., 0] * nxt[..., 1] - nxt[..., 0] * poly[..., 1]
+    return 0.5 * np.abs(np.where(used, cross, 0.).sum(axis=1))
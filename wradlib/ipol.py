@@ -25,18 +25,26 @@ This includes for example:
    Linear
    OrdinaryKriging
    ExternalDriftKriging
+   KrigingCache
+   SparseOperator
+   save_operator
+   load_operator
    interpolate
    interpolate_polar
+   PolarFiller
    cart_to_irregular_interp
    cart_to_irregular_spline
 
 """
 
+from collections import OrderedDict
 from functools import reduce
+import hashlib
+import os
 import re
 import scipy
-from scipy.spatial import cKDTree
-from scipy.interpolate import LinearNDInterpolator
+from scipy import sparse
+from scipy.spatial import Delaunay
 from scipy.ndimage.interpolation import map_coordinates
 from scipy.interpolate import griddata
 import numpy as np
@@ -96,6 +104,74 @@ class IpolBase:
         self._check_shape(vals)
         return None
 
+    def get_operator(self):
+        """
+        Return the interpolation as sparse linear operator.
+
+        Applying the interpolator to ``vals`` is equivalent to the matrix
+        product of the operator with ``vals``. Targets without any
+        contributing source point are represented by empty rows.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        raise NotImplementedError('wradlib.ipol: <%s> does not provide '
+                                  'a sparse operator.' %
+                                  self.__class__.__name__)
+
+    def _query(self, trg):
+        """
+        Queries the ``nnearest`` neighbours of ``trg`` from the tree.
+
+        Returns distances and indices of shape (numpoints, nnearest), or of
+        shape (numpoints,) for plain nearest neighbours (float32/int32 if the
+        interpolator is ``compact``).
+        """
+        dists, ix = util.query_tree(self.tree, trg, k=self.nnearest)
+        # avoid bug, if there is only one neighbor at all
+        if self.nnearest > 1 and dists.ndim == 1:
+            dists = dists[:, np.newaxis]
+            ix = ix[:, np.newaxis]
+        if getattr(self, 'compact', False):
+            dists = dists.astype(np.float32)
+            ix = ix.astype(np.int32)
+        return dists, ix
+
+    def _iter_chunks(self):
+        """
+        Iterates over blocks of targets.
+
+        Yields the target slice together with the neighbour distances and
+        indices. Without ``chunksize`` this is a single block using the
+        precomputed neighbours, otherwise the neighbours of each block are
+        queried on the fly.
+        """
+        chunksize = getattr(self, 'chunksize', None)
+        if chunksize is None:
+            yield slice(None), self.dists, self.ix
+            return
+        for start in range(0, self.numtargets, chunksize):
+            chunk = slice(start, min(start + chunksize, self.numtargets))
+            dists, ix = self._query(self.trg[chunk])
+            yield chunk, dists, ix
+
+    def _make_out(self, vals, out, dtype):
+        """
+        Returns an output array of shape (numtargets,) + vals.shape[1:].
+
+        If ``out`` is given, its shape is checked and it is returned as is.
+        """
+        shape = (self.numtargets,) + vals.shape[1:]
+        if out is None:
+            return np.empty(shape, dtype=dtype)
+        assert out.shape == shape, \
+            ('Shape of output array %s does not correspond to expected '
+             'shape %s' % (out.shape, shape))
+        return out
+
     def _check_shape(self, vals):
         """
         Checks whether the values correspond to the source points
@@ -162,7 +238,7 @@ class IpolBase:
 
 class Nearest(IpolBase):
     """
-    Nearest(src, trg)
+    Nearest(src, trg, chunksize=None, compact=False)
 
     Nearest-neighbour interpolation in N dimensions.
 
@@ -172,6 +248,14 @@ class Nearest(IpolBase):
         Data point coordinates of the source points.
     trg : ndarray of floats, shape (npoints, ndims)
         Data point coordinates of the target points.
+    chunksize : int
+        If given, the neighbours are not precomputed for all targets, but
+        queried and evaluated block-wise for ``chunksize`` targets at a time
+        on each call. This limits the memory footprint for very large target
+        sets (e.g. 3-D grids). Defaults to None.
+    compact : bool
+        If True, distances and indices are stored as float32 and int32.
+        Defaults to False.
 
     Examples
     --------
@@ -180,11 +264,12 @@ class Nearest(IpolBase):
 
     Note
     ----
-    Uses :class:`scipy:scipy.spatial.cKDTree`
+    Uses :class:`scipy:scipy.spatial.cKDTree` via
+    :func:`~wradlib.util.make_tree` and :func:`~wradlib.util.query_tree`
 
     """
 
-    def __init__(self, src, trg):
+    def __init__(self, src, trg, chunksize=None, compact=False):
         src = self._make_coord_arrays(src)
         trg = self._make_coord_arrays(trg)
         # remember some things
@@ -194,11 +279,17 @@ class Nearest(IpolBase):
         self.numsources = len(src)
         if self.numsources == 0:
             raise MissingSourcesError
+        self.chunksize = chunksize
+        self.compact = compact
+        self.nnearest = 1
         # plant a tree
-        self.tree = cKDTree(src)
-        self.dists, self.ix = self.tree.query(trg, k=1)
+        self.tree = util.make_tree(src)
+        if chunksize is None:
+            self.dists, self.ix = self._query(trg)
+        else:
+            self.trg = trg
 
-    def __call__(self, vals, maxdist=None):
+    def __call__(self, vals, maxdist=None, out=None):
         """
         Evaluate interpolator for values given at the source points.
 
@@ -217,6 +308,9 @@ class Nearest(IpolBase):
         maxdist : the maximum distance up to which an interpolated values is
             assigned - if maxdist is exceeded, np.nan will be assigned
             If maxdist==None, values will be assigned everywhere
+        out : ndarray of shape (numtargetpoints, ...)
+            optional output array (e.g. a :class:`numpy:numpy.memmap`) the
+            result is written into
 
         Returns
         -------
@@ -224,16 +318,35 @@ class Nearest(IpolBase):
 
         """
         self._check_shape(vals)
-        out = vals[self.ix]
-        if maxdist is None:
-            return out
-        else:
-            return np.where(self.dists > maxdist, np.nan, out)
+        out = self._make_out(vals, out, vals.dtype if maxdist is None
+                             else np.result_type(vals.dtype, np.float32))
+        for chunk, dists, ix in self._iter_chunks():
+            res = vals[ix]
+            if maxdist is not None:
+                toofar = (dists > maxdist).reshape((-1,) +
+                                                   (1,) * (vals.ndim - 1))
+                res = np.where(toofar, np.nan, res)
+            out[chunk] = res
+        return out
+
+    def get_operator(self):
+        """
+        Return the nearest neighbour mapping as sparse linear operator.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        ix = np.concatenate([ix for _, _, ix in self._iter_chunks()])
+        return _neighbours_to_csr(np.ones((self.numtargets, 1)),
+                                  ix.reshape((-1, 1)), self.numsources)
 
 
 class Idw(IpolBase):
     """
-    Idw(src, trg, nnearest=4, p=2.)
+    Idw(src, trg, nnearest=4, p=2., chunksize=None, compact=False)
 
     Inverse distance weighting interpolation in N dimensions.
 
@@ -245,6 +358,14 @@ class Idw(IpolBase):
         Data point coordinates of the target points.
     nnearest : integer - max. number of neighbours to be considered
     p : float - inverse distance power used in 1/dist**p
+    chunksize : int
+        If given, the neighbours are not precomputed for all targets, but
+        queried and evaluated block-wise for ``chunksize`` targets at a time
+        on each call. This limits the memory footprint for very large target
+        sets (e.g. 3-D grids). Defaults to None.
+    compact : bool
+        If True, distances and indices are stored as float32 and int32.
+        Defaults to False.
 
     Examples
     --------
@@ -252,11 +373,13 @@ class Idw(IpolBase):
 
     Note
     ----
-    Uses :class:`scipy:scipy.spatial.cKDTree`
+    Uses :class:`scipy:scipy.spatial.cKDTree` via
+    :func:`~wradlib.util.make_tree` and :func:`~wradlib.util.query_tree`
 
     """
 
-    def __init__(self, src, trg, nnearest=4, p=2.):
+    def __init__(self, src, trg, nnearest=4, p=2., chunksize=None,
+                 compact=False):
         src = self._make_coord_arrays(src)
         trg = self._make_coord_arrays(trg)
         # remember some things
@@ -277,15 +400,16 @@ class Idw(IpolBase):
         else:
             self.nnearest = nnearest
         self.p = p
+        self.chunksize = chunksize
+        self.compact = compact
         # plant a tree
-        self.tree = cKDTree(src)
-        self.dists, self.ix = self.tree.query(trg, k=self.nnearest)
-        # avoid bug, if there is only one neighbor at all
-        if self.dists.ndim == 1:
-            self.dists = self.dists[:, np.newaxis]
-            self.ix = self.ix[:, np.newaxis]
+        self.tree = util.make_tree(src)
+        if chunksize is None:
+            self.dists, self.ix = self._query(trg)
+        else:
+            self.trg = trg
 
-    def __call__(self, vals):
+    def __call__(self, vals, out=None):
         """
         Evaluate interpolator for values given at the source points.
 
@@ -301,57 +425,72 @@ class Idw(IpolBase):
         ----------
         vals : ndarray of float, shape (numsourcepoints, ...)
             Values at the source points which to interpolate
-        maxdist : the maximum distance up to which an interpolated values is
-            assigned - if maxdist is exceeded, np.nan will be assigned
-            If maxdist==None, values will be assigned everywhere
+        out : ndarray of shape (numtargetpoints, ...)
+            optional output array (e.g. a :class:`numpy:numpy.memmap`) the
+            result is written into
 
         Returns
         -------
         output : ndarray of float with shape (numtargetpoints,...)
 
         """
-
-        # self distances: a list of arrays of distances of the nearest points
-        # which are indicated by self.ix
         self._check_shape(vals)
-        outshape = list(vals.shape)
-        outshape[0] = len(self.dists)
-        interpol = (np.repeat(np.nan, util._shape_to_size(outshape)).
-                    reshape(tuple(outshape)).astype('f4'))
-        # weights is the container for the weights (a list)
-        weights = list(range(len(self.dists)))
-        # sources is the container for the source point indices
-        src_ix = list(range(len(self.dists)))
-        # jinterpol is the jth element of interpol
-        jinterpol = 0
-        for dist, ix in zip(self.dists, self.ix):
-            valid_dists = np.where(np.isfinite(dist))[0]
-            dist = dist[valid_dists]
-            ix = ix[valid_dists]
-            if self.nnearest == 1:
-                # defaults to nearest neighbour
-                wz = vals[ix]
-                w = 1.
-            elif dist[0] < 1e-10:
-                # if a target point coincides with a source point
-                wz = vals[ix[0]]
-                w = 1.
-            else:
-                # weight z values by (1/dist)**p --
-                w = 1. / dist ** self.p
-                w /= np.sum(w)
-                wz = np.dot(w, vals[ix])
-            interpol[jinterpol] = wz.ravel()
-            weights[jinterpol] = w
-            src_ix[jinterpol] = ix
-            jinterpol += 1
-        return interpol  # if self.qdim > 1  else interpol[0]
+        out = self._make_out(vals, out, 'f4')
+        for chunk, dists, ix in self._iter_chunks():
+            w = self._get_weights(dists)
+            # neighbours at infinite distance are flagged with numsources
+            ix = np.where(ix < self.numsources, ix, 0)
+            w = w.reshape(w.shape + (1,) * (vals.ndim - 1))
+            # zero weights must not propagate invalid neighbour values
+            wz = np.where(w != 0, w * vals[ix], 0.)
+            out[chunk] = np.sum(wz, axis=1)
+        return out
+
+    def _get_weights(self, dists):
+        """Returns the normalized inverse distance weights for the neighbour
+        distances ``dists`` of shape (numtargets, nnearest).
+
+        The weights follow the nearest neighbour rule for ``nnearest=1`` and
+        for targets coinciding with a source point. Neighbours at infinite
+        distance get zero weight.
+        """
+        valid = np.isfinite(dists)
+        if self.nnearest == 1:
+            return valid.astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = np.where(valid, 1. / dists.astype(np.float64) ** self.p, 0.)
+            w /= np.sum(w, axis=1, keepdims=True)
+        # if a target point coincides with a source point
+        coincide = dists[:, 0] < 1e-10
+        w[coincide] = 0.
+        w[coincide, 0] = 1.
+        return w
+
+    def get_operator(self):
+        """
+        Return the inverse distance weighting as sparse linear operator.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        weights, ix = zip(*[(self._get_weights(dists), ix)
+                            for _, dists, ix in self._iter_chunks()])
+        return _neighbours_to_csr(np.concatenate(weights),
+                                  np.concatenate(ix), self.numsources)
 
 
 class Linear(IpolBase):
     """
-    Interface to the :class:`scipy:scipy.interpolate.LinearNDInterpolator`
-    class.
+    Linear barycentric interpolation in N dimensions.
+
+    The sources are triangulated once on initialization (Delaunay), the
+    enclosing simplex of each target is located and the barycentric weights
+    are stored together with the vertex indices. Calling the interpolator is
+    then a weighted gather for any number of fields, which gives the same
+    results as :class:`scipy:scipy.interpolate.LinearNDInterpolator`.
 
     We provide this class in order to achieve a uniform interface for all
     Interpolator classes
@@ -366,6 +505,10 @@ class Linear(IpolBase):
     Examples
     --------
     See :ref:`/notebooks/interpolation/wradlib_ipol_example.ipynb`.
+
+    Note
+    ----
+    Uses :class:`scipy:scipy.spatial.Delaunay`
     """
 
     def __init__(self, src, trg):
@@ -378,6 +521,21 @@ class Linear(IpolBase):
         self.numsources = len(src)
         if self.numsources == 0:
             raise MissingSourcesError
+        # triangulate the sources and locate the enclosing simplices
+        tri = Delaunay(self.src)
+        simplex = tri.find_simplex(self.trg)
+        self.outside = simplex < 0
+        inside = ~self.outside
+        ndim = self.src.shape[1]
+        trans = tri.transform[simplex[inside]]
+        bary = np.einsum('ijk,ik->ij', trans[:, :ndim, :],
+                         self.trg[inside] - trans[:, ndim, :])
+        # barycentric weights and vertex indices, zero outside the hull
+        self.weights = np.zeros((self.numtargets, ndim + 1))
+        self.weights[inside, :ndim] = bary
+        self.weights[inside, ndim] = 1. - bary.sum(axis=1)
+        self.ix = np.zeros((self.numtargets, ndim + 1), dtype=np.intp)
+        self.ix[inside] = tri.simplices[simplex[inside]]
 
     def __call__(self, vals, fill_value=np.nan):
         """
@@ -404,8 +562,25 @@ class Linear(IpolBase):
 
         """
         self._check_shape(vals)
-        ip = LinearNDInterpolator(self.src, vals, fill_value=fill_value)
-        return ip(self.trg)
+        w = self.weights.reshape(self.weights.shape + (1,) * (vals.ndim - 1))
+        out = np.sum(w * vals[self.ix], axis=1)
+        out[self.outside] = fill_value
+        return out
+
+    def get_operator(self):
+        """
+        Return the linear barycentric interpolation as sparse linear operator.
+
+        Targets outside the convex hull of the sources are represented by
+        empty rows.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        return _neighbours_to_csr(self.weights, self.ix, self.numsources)
 
 
 # -----------------------------------------------------------------------------
@@ -535,6 +710,194 @@ def cov_cau(h, sill=1., rng=1., alpha=1., beta=1.0):
     return sill * (1 + (h / rng) ** alpha) ** (-beta / alpha)
 
 
+def _distance_matrices(pts):
+    """Returns the euclidean distance matrices of stacked point
+    configurations of shape (nsystems, npoints, ndims)."""
+    diff = pts[:, :, np.newaxis, :] - pts[:, np.newaxis, :, :]
+    return np.sqrt(np.sum(diff ** 2, axis=-1))
+
+
+def _chunk_slices(nsystems, size, maxitems=2 ** 22):
+    """Yields slices over ``nsystems`` linear systems of dimension ``size``
+    such that each chunk holds at most ``maxitems`` matrix elements."""
+    chunksize = max(1, maxitems // (size * size))
+    for start in range(0, nsystems, chunksize):
+        yield slice(start, min(start + chunksize, nsystems))
+
+
+class KrigingCache(object):
+    """
+    KrigingCache(maxsize=10000)
+
+    Least recently used cache for kriging weights.
+
+    The kriging weights of a target only depend on the configuration of its
+    neighbouring source points, the covariance model and the right hand side
+    of its kriging system. Passing the same cache to subsequent interpolator
+    instances (e.g. for a slowly changing set of valid gauges) reuses the
+    weights of all unchanged systems instead of solving them again.
+
+    Caching is opt-in, pass an instance as ``cache`` to
+    :class:`~wradlib.ipol.OrdinaryKriging` or
+    :class:`~wradlib.ipol.ExternalDriftKriging`. Each item holds one weight
+    vector, choose ``maxsize`` according to the number of targets. As a cache
+    lookup costs about as much as solving a small system, caching mainly pays
+    off for large ``nnearest``.
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of cached kriging systems
+
+    Attributes
+    ----------
+    hits : int
+        number of kriging systems retrieved from the cache
+    misses : int
+        number of kriging systems which had to be solved
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_many(self, keys):
+        """Returns a list of the cached items for ``keys`` (None for keys
+        which are not cached)"""
+        data = self._data
+        values = [data.get(key) for key in keys]
+        for key, value in zip(keys, values):
+            if value is not None:
+                # re-insert as most recently used item
+                del data[key]
+                data[key] = value
+        nhits = sum(value is not None for value in values)
+        self.hits += nhits
+        self.misses += len(values) - nhits
+        return values
+
+    def put_many(self, keys, values):
+        """Stores the rows of ``values`` under ``keys`` and discards the
+        least recently used items if ``maxsize`` is exceeded"""
+        if self.maxsize <= 0:
+            return
+        data = self._data
+        # one copy for all items instead of one per item
+        for key, value in zip(keys, np.array(values)):
+            data[key] = value
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def clear(self):
+        """Removes all items and resets the counters"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Returns a dictionary with hits, misses, maxsize and currsize"""
+        return dict(hits=self.hits, misses=self.misses,
+                    maxsize=self.maxsize, currsize=len(self._data))
+
+
+def _array_key(arr):
+    """Returns a hashable key of the shape, dtype and content of arr"""
+    return arr.shape, arr.dtype.str, arr.tobytes()
+
+
+def _solve_systems(matrices, rhs, nan_on_singular=False):
+    """Solves the stacked linear systems ``matrices`` (nsystems, n, n) for
+    the right hand sides ``rhs`` (nsystems, n) in one batched call.
+
+    If ``nan_on_singular`` is True, singular systems result in nan weights,
+    otherwise :class:`numpy:numpy.linalg.LinAlgError` is raised.
+    """
+    try:
+        return np.linalg.solve(matrices, rhs[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        if not nan_on_singular:
+            raise
+    # fall back to solving system by system in order to flag only the
+    # singular ones
+    weights = np.empty_like(rhs)
+    for i in range(len(rhs)):
+        try:
+            weights[i] = np.linalg.solve(matrices[i], rhs[i])
+        except np.linalg.LinAlgError:
+            weights[i] = np.nan
+    return weights
+
+
+def _solve_neighbourhoods(ix, rhs, make_matrix, make_key=None, cache=None,
+                          nan_on_singular=False):
+    """Solves kriging systems, setting up the matrix of each distinct
+    neighbourhood only once.
+
+    Parameters
+    ----------
+    ix : ndarray of ints, shape (nsystems, k)
+        neighbour source indices of each target
+    rhs : ndarray of floats, shape (nsystems, n)
+        right hand sides; the first k entries correspond to the neighbours in
+        the order of ``ix``
+    make_matrix : callable
+        returns the kriging matrices (nunique, n, n) for sorted neighbour
+        index arrays (nunique, k)
+    make_key : callable
+        returns a hashable key for a sorted neighbour index array, only
+        needed with ``cache``
+    cache : :class:`~wradlib.ipol.KrigingCache`
+        cache of previously solved systems, defaults to None (no caching)
+    nan_on_singular : bool
+        if True, singular systems result in nan weights, otherwise
+        :class:`numpy:numpy.linalg.LinAlgError` is raised
+
+    Returns
+    -------
+    weights : ndarray of floats, shape (nsystems, n)
+        weights in the order of ``ix``
+    """
+    k = ix.shape[1]
+    rows = np.arange(len(ix))[:, np.newaxis]
+    # neighbourhoods are identified by their sorted source indices
+    order = np.argsort(ix, axis=1)
+    ix_sorted = ix[rows, order]
+    rhs_sorted = rhs.copy()
+    rhs_sorted[:, :k] = rhs[rows, order]
+    weights_sorted = np.empty_like(rhs_sorted)
+
+    missing = np.arange(len(ix))
+    if cache is not None:
+        uniq, inverse = np.unique(ix_sorted, axis=0, return_inverse=True)
+        nkeys = [make_key(u) for u in uniq]
+        keys = [(nkeys[i], row.tobytes())
+                for i, row in zip(inverse.reshape(-1), rhs_sorted)]
+        cached = cache.get_many(keys)
+        found = np.array([w is not None for w in cached], dtype=bool)
+        if found.any():
+            weights_sorted[found] = [w for w in cached if w is not None]
+        missing = missing[~found]
+
+    if len(missing):
+        uniq, inverse = np.unique(ix_sorted[missing], axis=0,
+                                  return_inverse=True)
+        matrices = make_matrix(uniq)[inverse.reshape(-1)]
+        weights_sorted[missing] = _solve_systems(
+            matrices, rhs_sorted[missing], nan_on_singular=nan_on_singular)
+        if cache is not None:
+            cache.put_many([keys[i] for i in missing],
+                           weights_sorted[missing])
+
+    weights = weights_sorted.copy()
+    weights[rows, order] = weights_sorted[:, :k]
+    return weights
+
+
 class OrdinaryKriging(IpolBase):
     r"""
     OrdinaryKriging(src, trg, cov='1.0 Exp(10000.)', nnearest=12)
@@ -577,6 +940,9 @@ class OrdinaryKriging(IpolBase):
         covariance (variogram) model string in the syntax ``gstat``
         uses.
     nnearest : integer - max. number of neighbours to be considered
+    cache : :class:`~wradlib.ipol.KrigingCache`
+        reuse the weights of kriging systems solved by previous instances
+        sharing this cache, defaults to None (no caching)
 
     Note
     ----
@@ -589,14 +955,21 @@ class OrdinaryKriging(IpolBase):
     different from that of the Idw or Nearest Interpolators.
 
     After initialization the estimation variance at each interpolation target
-    may be retrieved from the attribute `estimation_variance`.
+    may be retrieved from the attribute `estimation_variance`. The kriging
+    weights (including the lagrange multiplier) are available as array of
+    shape (numtargets, nnearest + 1) from the attribute `weights`.
+
+    The kriging systems of all targets are set up and solved in chunks of
+    stacked matrices instead of one system at a time. The matrix of each
+    distinct neighbourhood is only set up once.
 
     Examples
     --------
     See :ref:`/notebooks/interpolation/wradlib_ipol_example.ipynb`.
     """
 
-    def __init__(self, src, trg, cov='1.0 Exp(10000.)', nnearest=12):
+    def __init__(self, src, trg, cov='1.0 Exp(10000.)', nnearest=12,
+                 cache=None):
         """"""
         self.src = self._make_coord_arrays(src)
         self.trg = self._make_coord_arrays(trg)
@@ -619,51 +992,53 @@ class OrdinaryKriging(IpolBase):
         else:
             self.nnearest = nnearest
         # plant a tree
-        self.tree = cKDTree(src)
-        self.dists, self.ix = self.tree.query(trg, k=self.nnearest)
-        # avoid bug, if there is only one neighbor at all
-        if self.dists.ndim == 1:
-            self.dists = self.dists[:, np.newaxis]
-            self.ix = self.ix[:, np.newaxis]
+        self.tree = util.make_tree(src)
+        self.dists, self.ix = self._query(trg)
         # parse covariogram function string
+        self.cov = cov
         self.cov_func = parse_covariogram(cov)
-        self.weights = []
-        self.estimation_variance = []
+        self.cache = cache
         # do the kriging
         self._krige()
 
     def _krig_matrix(self, src):
-        """Sets up the kriging system for a configuration of source points.
+        """Sets up the kriging systems for stacked configurations of source
+        points of shape (nsystems, nnearest, ndims).
         """
-        var_matrix = self.cov_func(scipy.spatial.distance_matrix(src, src))
-
-        ok_matrix = np.ones((len(src) + 1, len(src) + 1))
+        nsys, k = src.shape[:2]
+        ok_matrix = np.ones((nsys, k + 1, k + 1))
 
-        ok_matrix[:-1, :-1] = var_matrix
-        ok_matrix[-1, -1] = 0.
+        ok_matrix[:, :-1, :-1] = self.cov_func(_distance_matrices(src))
+        ok_matrix[:, -1, -1] = 0.
 
         return ok_matrix
 
     def _krig_rhs(self, dists):
-        """Sets up a right hand side of the kriging system given the distances
-        of the target to the source points. To be used in conjunction with
-        `_krig_matrix`."""
-        rhs = self.cov_func(dists)
-        ok_rhs = np.concatenate([rhs, [1.]])
+        """Sets up the right hand sides of the kriging systems given the
+        distances of the targets to their source points, shape
+        (nsystems, nnearest). To be used in conjunction with `_krig_matrix`."""
+        ok_rhs = np.ones((dists.shape[0], dists.shape[1] + 1))
+        ok_rhs[:, :-1] = self.cov_func(dists)
 
         return ok_rhs
 
     def _krige(self):
-        """Sets up the kriging system and solves it in order to obtain the
+        """Sets up the kriging systems and solves them in order to obtain the
         interpolation weights of ordinary kriging.
         Also calculates the kriging estimation variance from the results"""
-        for dist, ix in zip(self.dists, self.ix):
-            matrix = self._krig_matrix(self.src[ix, :])
-            rhs = self._krig_rhs(dist)
-            weights = np.linalg.solve(matrix, rhs)
-            self.weights.append(weights)
-            self.estimation_variance.append(self.cov_func(0.) -
-                                            np.sum(weights * rhs))
+        nsys, k = self.ix.shape
+        self.weights = np.empty((nsys, k + 1))
+        self.estimation_variance = np.empty(nsys)
+        for chunk in _chunk_slices(nsys, k + 1):
+            rhs = self._krig_rhs(self.dists[chunk])
+            weights = _solve_neighbourhoods(
+                self.ix[chunk], rhs,
+                lambda ix: self._krig_matrix(self.src[ix]),
+                lambda ix: ('OK', self.cov, _array_key(self.src[ix])),
+                cache=self.cache)
+            self.weights[chunk] = weights
+            self.estimation_variance[chunk] = (self.cov_func(0.) -
+                                               np.sum(weights * rhs, axis=1))
 
     def __call__(self, vals):
         """
@@ -694,20 +1069,32 @@ class OrdinaryKriging(IpolBase):
         v = self._make_2d(vals)
         self._check_shape(v)
         # calculate estimator
-        weights = np.array(self.weights)
-        ip = np.add.reduce(weights[:, :-1, np.newaxis] * v[self.ix, ...],
-                           axis=1)
+        ip = np.add.reduce(self.weights[:, :-1, np.newaxis] *
+                           v[self.ix, ...], axis=1)
 
         if vals.ndim == 1:
             return ip.ravel()
         else:
             return ip
 
+    def get_operator(self):
+        """
+        Return the kriging weights as sparse linear operator.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        return _neighbours_to_csr(self.weights[:, :-1], self.ix,
+                                  self.numsources)
+
 
 class ExternalDriftKriging(IpolBase):
     """
     ExternalDriftKriging(src, trg, cov='1.0 Exp(10000.)', nnearest=12,
-                         drift_src=None, drift_trg=None)
+                         drift_src=None, drift_trg=None, cache=None)
 
     Kriging with external drift
 
@@ -726,6 +1113,9 @@ class ExternalDriftKriging(IpolBase):
         values of the external drift at each source point
     trg_drift : ndarray of floats, shape (ntrgpoints,)
         values of the external drift at each target point
+    cache : :class:`~wradlib.ipol.KrigingCache`
+        reuse the weights of kriging systems solved by previous instances
+        sharing this cache, defaults to None (no caching)
 
     See Also
     --------
@@ -749,7 +1139,7 @@ class ExternalDriftKriging(IpolBase):
     """
 
     def __init__(self, src, trg, cov='1.0 Exp(10000.)', nnearest=12,
-                 src_drift=None, trg_drift=None):
+                 src_drift=None, trg_drift=None, cache=None):
         """"""
         self.src = self._make_coord_arrays(src)
         self.trg = self._make_coord_arrays(trg)
@@ -774,63 +1164,69 @@ class ExternalDriftKriging(IpolBase):
         else:
             self.nnearest = nnearest
         # plant a tree
-        self.tree = cKDTree(src)
-        self.dists, self.ix = self.tree.query(trg, k=self.nnearest)
-        # avoid bug, if there is only one neighbor at all
-        if self.dists.ndim == 1:
-            self.dists = self.dists[:, np.newaxis]
-            self.ix = self.ix[:, np.newaxis]
+        self.tree = util.make_tree(src)
+        self.dists, self.ix = self._query(trg)
         # parse covariogram function string
+        self.cov = cov
         self.cov_func = parse_covariogram(cov)
+        self.cache = cache
         self.weights = []
         self.estimation_variance = []
 
     def _krig_matrix(self, src, drift):
-        """Sets up the kriging system for a configuration of source points.
+        """Sets up the kriging systems for stacked configurations of source
+        points of shape (nsystems, nnearest, ndims) and their drifts of shape
+        (nsystems, nnearest).
         """
+        nsys, k = src.shape[:2]
+        # the extended matrix, initialized to zeros
+        edk_matrix = np.zeros((nsys, k + 2, k + 2))
+
         # the basic covariance matrix
-        var_matrix = self.cov_func(scipy.spatial.distance_matrix(src, src))
-        # the extended matrix, initialized to ones
-        edk_matrix = np.ones((len(src) + 2, len(src) + 2))
+        edk_matrix[:, :-2, :-2] = self.cov_func(_distance_matrices(src))
 
         # adding entries for the first lagrange multiplier for the ordinary
         # kriging part
-        edk_matrix[:-2, :-2] = var_matrix
-        edk_matrix[-2, -2] = 0.
+        edk_matrix[:, :-2, -2] = 1.
+        edk_matrix[:, -2, :-2] = 1.
 
         # adding entries for the second lagrange multiplier for the  edk part
-        edk_matrix[:-2, -1] = drift
-        edk_matrix[-1, :-2] = drift
-        edk_matrix[-2:, -1] = 0.
-        edk_matrix[-1, -2:] = 0.
+        edk_matrix[:, :-2, -1] = drift
+        edk_matrix[:, -1, :-2] = drift
 
         return edk_matrix
 
     def _krig_rhs(self, dists, drift):
-        """Sets up a right hand side of the kriging system given the distances
-        of the target to the source points. To be used in conjunction with
-        `_krig_matrix`."""
-        rhs = self.cov_func(dists)
-        edk_rhs = np.concatenate([rhs, np.array([1., drift])])
+        """Sets up the right hand sides of the kriging systems given the
+        distances of the targets to their source points, shape
+        (nsystems, nnearest), and the target drifts, shape (nsystems,).
+        To be used in conjunction with `_krig_matrix`."""
+        edk_rhs = np.ones((dists.shape[0], dists.shape[1] + 2))
+        edk_rhs[:, :-2] = self.cov_func(dists)
+        edk_rhs[:, -1] = drift
 
         return edk_rhs
 
     def _krige(self, src_drift, trg_drift):
-        """Sets up the kriging system and solves it in order to obtain the
-        interpolation weights of ordinary kriging.
+        """Sets up the kriging systems and solves them in order to obtain the
+        interpolation weights of external drift kriging.
         Also calculates the kriging estimation variance from the results"""
-        all_weights = []
-        estimation_variances = []
-        for dist, ix, td in zip(self.dists, self.ix, trg_drift):
-            matrix = self._krig_matrix(self.src[ix, :], src_drift[ix])
-            rhs = self._krig_rhs(dist, td)
-            try:
-                weights = np.linalg.solve(matrix, rhs)
-            except np.linalg.LinAlgError:
-                weights = np.repeat(np.nan, len(rhs))
-            all_weights.append(weights)
-            estimation_variances.append(self.cov_func(0.) -
-                                        np.sum(weights * rhs))
+        src_drift = np.asanyarray(src_drift).reshape(-1)
+        trg_drift = np.asanyarray(trg_drift).reshape(-1)
+        nsys, k = self.ix.shape
+        all_weights = np.empty((nsys, k + 2))
+        estimation_variances = np.empty(nsys)
+        for chunk in _chunk_slices(nsys, k + 2):
+            rhs = self._krig_rhs(self.dists[chunk], trg_drift[chunk])
+            weights = _solve_neighbourhoods(
+                self.ix[chunk], rhs,
+                lambda ix: self._krig_matrix(self.src[ix], src_drift[ix]),
+                lambda ix: ('EDK', self.cov, _array_key(self.src[ix]),
+                            _array_key(src_drift[ix])),
+                cache=self.cache, nan_on_singular=True)
+            all_weights[chunk] = weights
+            estimation_variances[chunk] = (self.cov_func(0.) -
+                                           np.sum(weights * rhs, axis=1))
 
         return all_weights, estimation_variances
 
@@ -883,41 +1279,274 @@ class ExternalDriftKriging(IpolBase):
         trg_d = self._make_2d(trg_drift)
         self._check_shape(src_d)
 
-        # re-initialize weights and variances to ensure that these only reflect
-        # the results of the current call and not any previous call
-        self.weights = []
-        self.estimation_variance = []
-
         # if drifts are constant, we can save time by solving the kriging
         # system once
         if src_d.shape[1] == 1:
-            wght, variances = self._krige(src_d.squeeze(), trg_d.squeeze())
-            self.weights = wght
-            self.estimation_variance = variances
-            weights = np.array(self.weights)
-            ip = np.add.reduce(weights[:, :-2, np.newaxis] * v[self.ix, ...],
-                               axis=1)
+            self.weights, self.estimation_variance = self._krige(src_d, trg_d)
+            ip = np.add.reduce(self.weights[:, :-2, np.newaxis] *
+                               v[self.ix, ...], axis=1)
         # otherwise we need to setup and solve the kriging system for each
         # field individually
         else:
             ip = np.empty((self.trg.shape[0], v.shape[1]))
             assert ((v.shape[1] == src_d.shape[1]) and
                     (v.shape[1] == trg_d.shape[1]))
+            self.weights = np.empty((v.shape[1],) + self.ix.shape[:1] +
+                                    (self.ix.shape[1] + 2,))
+            self.estimation_variance = np.empty((v.shape[1],
+                                                 self.ix.shape[0]))
             for i in range(v.shape[1]):
-                wght, variances = self._krige(src_d[:, i].squeeze(),
-                                              trg_d[:, i].squeeze())
-
-                weights = np.array(wght)
+                weights, variances = self._krige(src_d[:, i], trg_d[:, i])
                 ip[:, i] = np.add.reduce(weights[:, :-2] * v[self.ix, i],
                                          axis=1)
-                self.weights.append(weights)
-                self.estimation_variance.append(variances)
+                self.weights[i] = weights
+                self.estimation_variance[i] = variances
 
         if vals.ndim == 1:
             return ip.ravel()
         else:
             return ip
 
+    def get_operator(self, src_drift=None, trg_drift=None):
+        """
+        Return the kriging weights as sparse linear operator.
+
+        The weights depend on the drift, so only a single (1-D) drift
+        per source and target point is supported. If the drift is not given
+        it is taken from the values passed on initialization.
+
+        Parameters
+        ----------
+        src_drift : ndarray of floats, shape (nsrcpoints,)
+            values of the external drift at each source point
+        trg_drift : ndarray of floats, shape (ntrgpoints,)
+            values of the external drift at each target point
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        if src_drift is None:
+            src_drift = self.src_drift
+        if trg_drift is None:
+            trg_drift = self.trg_drift
+        if src_drift is None or trg_drift is None:
+            raise ValueError('src_drift and trg_drift must be specified '
+                             'either on initialization or when requesting '
+                             'the operator.')
+        src_drift = np.asanyarray(src_drift)
+        trg_drift = np.asanyarray(trg_drift)
+        if src_drift.ndim > 1 or trg_drift.ndim > 1:
+            raise ValueError('The sparse operator can only be derived for '
+                             'one-dimensional drift terms.')
+        weights, _ = self._krige(src_drift, trg_drift)
+        return _neighbours_to_csr(weights[:, :-2], self.ix, self.numsources)
+
+
+# -----------------------------------------------------------------------------
+# Sparse interpolation operators
+# -----------------------------------------------------------------------------
+def _neighbours_to_csr(weights, ix, numsources):
+    """Assembles a sparse operator from per target weights and neighbours.
+
+    Parameters
+    ----------
+    weights : ndarray of floats, shape (numtargets, k)
+        weights of the k neighbours of each target
+    ix : ndarray of ints, shape (numtargets, k)
+        source indices of the k neighbours of each target
+    numsources : int
+        number of source points
+
+    Returns
+    -------
+    operator : :class:`scipy:scipy.sparse.csr_matrix`
+        sparse matrix of shape (numtargets, numsources)
+    """
+    numtargets, k = weights.shape
+    # neighbours at infinite distance are flagged with ix == numsources
+    valid = ix < numsources
+    ix = np.where(valid, ix, 0)
+    weights = np.where(valid, weights, 0.)
+    indptr = np.arange(0, numtargets * k + 1, k)
+    op = sparse.csr_matrix((weights.ravel(), ix.ravel(), indptr),
+                           shape=(numtargets, numsources))
+    op.sum_duplicates()
+    op.eliminate_zeros()
+    return op
+
+
+def _hash_arguments(*args, **kwargs):
+    """Returns a hexadecimal digest of arrays, classes and parameters."""
+    sha = hashlib.sha1()
+
+    def update(item):
+        if isinstance(item, np.ndarray):
+            item = np.ascontiguousarray(item)
+            sha.update(repr((item.shape, item.dtype.str)).encode())
+            sha.update(item.tobytes())
+        elif isinstance(item, type):
+            sha.update(('%s.%s' % (item.__module__,
+                                   item.__name__)).encode())
+        elif isinstance(item, (list, tuple)):
+            sha.update(repr(type(item)).encode())
+            for it in item:
+                update(it)
+        else:
+            sha.update(repr(item).encode())
+
+    for arg in args:
+        update(arg)
+    for key in sorted(kwargs):
+        sha.update(key.encode())
+        update(kwargs[key])
+    return sha.hexdigest()
+
+
+def save_operator(filename, operator):
+    """Save a sparse interpolation operator to an uncompressed npz file.
+
+    Parameters
+    ----------
+    filename : string
+        path of the output file
+    operator : :class:`scipy:scipy.sparse.csr_matrix`
+        operator as returned by the `get_operator` method of the
+        interpolation classes
+    """
+    operator = sparse.csr_matrix(operator)
+    with open(filename, 'wb') as f:
+        np.savez(f, data=operator.data, indices=operator.indices,
+                 indptr=operator.indptr, shape=np.array(operator.shape))
+
+
+def load_operator(filename):
+    """Load a sparse interpolation operator saved by
+    :func:`~wradlib.ipol.save_operator`.
+
+    Parameters
+    ----------
+    filename : string
+        path of the npz file
+
+    Returns
+    -------
+    operator : :class:`scipy:scipy.sparse.csr_matrix`
+    """
+    with np.load(filename) as f:
+        return sparse.csr_matrix((f['data'], f['indices'], f['indptr']),
+                                 shape=tuple(f['shape']))
+
+
+class SparseOperator(IpolBase):
+    """
+    SparseOperator(src, trg, baseclass=Idw, cachedir=None, **ipargs)
+
+    Interpolation by a precomputed sparse operator.
+
+    The interpolation weights of ``baseclass`` are computed once and held as
+    a :class:`scipy:scipy.sparse.csr_matrix` of shape
+    (numtargets, numsources). Evaluating the interpolator is a single sparse
+    matrix product for any number of fields.
+
+    If ``cachedir`` is given, the operator is stored in this directory,
+    keyed by a hash of the source and target coordinates, the interpolation
+    class and its parameters. Creating an instance for the same configuration
+    again then only reloads the operator from disk.
+
+    As the class shares the signature of the other interpolation classes,
+    it can be passed as ``ipclass`` wherever an interpolation class is
+    expected, e.g. in :mod:`wradlib.adjust`, :func:`wradlib.comp.togrid` or
+    :class:`wradlib.vpr.CartesianVolume`.
+
+    Parameters
+    ----------
+    src : ndarray of floats, shape (npoints, ndims)
+        Data point coordinates of the source points.
+    trg : ndarray of floats, shape (npoints, ndims)
+        Data point coordinates of the target points.
+    baseclass : a class which inherits from IpolBase
+        interpolation class used to derive the operator, defaults to
+        :class:`~wradlib.ipol.Idw`
+    cachedir : string
+        directory for caching the operator, defaults to None (no caching)
+    ipargs : keyword arguments of baseclass (see class documentation)
+
+    Note
+    ----
+    Targets without any contributing source point (e.g. outside the convex
+    hull for :class:`~wradlib.ipol.Linear`) are set to ``fill_value``.
+
+    Examples
+    --------
+    >>> src = np.arange(10)[:, None]
+    >>> trg = np.linspace(0, 9, 20)[:, None]
+    >>> ip = SparseOperator(src, trg, baseclass=Idw, nnearest=2)
+    >>> res = ip(np.sin(src))
+    """
+
+    def __init__(self, src, trg, baseclass=Idw, cachedir=None, **ipargs):
+        src = self._make_coord_arrays(src)
+        trg = self._make_coord_arrays(trg)
+        self.numtargets = len(trg)
+        if self.numtargets == 0:
+            raise MissingTargetsError
+        self.numsources = len(src)
+        if self.numsources == 0:
+            raise MissingSourcesError
+        self.cachefile = None
+        if cachedir is not None:
+            key = _hash_arguments(baseclass, src, trg, **ipargs)
+            self.cachefile = os.path.join(cachedir,
+                                          'wradlib_ipol_%s.npz' % key)
+            if os.path.exists(self.cachefile):
+                self.operator = load_operator(self.cachefile)
+                return
+        self.operator = baseclass(src, trg, **ipargs).get_operator()
+        if self.cachefile is not None:
+            if not os.path.isdir(cachedir):
+                os.makedirs(cachedir)
+            save_operator(self.cachefile, self.operator)
+
+    def __call__(self, vals, fill_value=np.nan):
+        """
+        Evaluate interpolator for values given at the source points.
+
+        Parameters
+        ----------
+        vals : ndarray of float, shape (numsourcepoints, ...)
+            Values at the source points which to interpolate
+        fill_value : float
+            value for targets without contributing source points;
+            defaults to np.nan
+
+        Returns
+        -------
+        output : ndarray of float with shape (numtargetpoints,...)
+
+        """
+        self._check_shape(vals)
+        v = vals.reshape((self.numsources, -1))
+        out = np.asarray(self.operator.dot(v))
+        empty = np.diff(self.operator.indptr) == 0
+        if np.any(empty):
+            out[empty] = fill_value
+        return out.reshape((self.numtargets,) + vals.shape[1:])
+
+    def get_operator(self):
+        """
+        Return the precomputed sparse operator.
+
+        Returns
+        -------
+        operator : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (numtargets, numsources)
+
+        """
+        return self.operator
+
 
 # -----------------------------------------------------------------------------
 # Wrapper functions
@@ -944,14 +1573,15 @@ def interpolate(src, trg, vals, ipclass, *args, **kwargs):
     care of the remaining np.nan in your interpolation result. This is done by
     this convenience function.
 
+    Fields (i.e. all trailing dimensions of *vals* flattened) which share the
+    same pattern of missing source values are re-interpolated together, so
+    that the interpolator is only instantiated once per distinct pattern and
+    only for those targets which are affected by missing values.
+
     Alternatively, you have to make sure that your *vals* argument does not
     contain any *np.nan* values OR you have to post-process missing values in
     your interpolation result in another way.
 
-    Warning
-    -------
-    Works only for one- and two-dimensional *vals* arrays, yet.
-
     Parameters
     ----------
     src : ndarray of floats, shape (npoints, ndims)
@@ -991,35 +1621,171 @@ def interpolate(src, trg, vals, ipclass, *args, **kwargs):
         ix_valid = np.where(np.isfinite(vals))[0]
         ip = ipclass(src[ix_valid], trg, *args, **kwargs)
         result = ip(vals[ix_valid])
-    elif vals.ndim == 2:
-        # this implementation for 2 dimensions needs generalization
-        ip = ipclass(src, trg, *args, **kwargs)
-        result = ip(vals)
-        nan_in_result = np.where(np.isnan(result))
-        # nan_in_vals = np.where(np.isnan(vals))
-        for i in np.unique(nan_in_result[-1]):
-            ix_good = np.where(np.isfinite(vals[..., i]))[0]
-            ix_broken_targets = (nan_in_result[0]
-                                 [np.where(nan_in_result[-1] == i)[0]])
-            ip = ipclass(src[ix_good],
-                         trg[nan_in_result[0]
-                         [np.where(nan_in_result[-1] == i)[0]]],
-                         *args, **kwargs)
-            tmp = ip(vals[ix_good, i].reshape((len(ix_good), -1)))
-            result[ix_broken_targets, i] = tmp.ravel()
     else:
-        if np.any(np.isnan(vals.ravel())):
-            raise NotImplementedError('WRADLIB: At the moment, <interpolate> '
-                                      'can only deal with NaN values in <vals>'
-                                      ' if <vals> has less than 3 dimension.')
-        else:
-            # if no NaN value are in <vals> we can safely apply the
-            # ipclass as is
-            ip = ipclass(src, trg, *args, **kwargs)
-            result = ip(vals)
+        # treat all trailing dimensions as separate fields
+        fields = vals.reshape((vals.shape[0], -1))
+        ip = ipclass(src, trg, *args, **kwargs)
+        res = ip(fields).reshape((-1, fields.shape[1]))
+        res = _reinterpolate_invalid(src, trg, fields, res, ipclass,
+                                     *args, **kwargs)
+        result = res.reshape((res.shape[0],) + vals.shape[1:])
     return result
 
 
+def _reinterpolate_invalid(src, trg, fields, res, ipclass, *args, **kwargs):
+    """Re-interpolates results which are affected by invalid source values.
+
+    Fields sharing the same pattern of invalid source values are handled by
+    one instance of ``ipclass`` which is restricted to the affected targets.
+
+    Parameters
+    ----------
+    src : ndarray of floats, shape (nsrc, ndims)
+    trg : ndarray of floats, shape (ntrg, ndims)
+    fields : ndarray of floats, shape (nsrc, nfields)
+        source values
+    res : ndarray of floats, shape (ntrg, nfields)
+        interpolation result using all source points, modified in place
+
+    Returns
+    -------
+    res : ndarray of floats, shape (ntrg, nfields)
+    """
+    invalid = ~np.isfinite(fields)
+    # only fields with invalid source values need to be re-interpolated
+    cols = np.where(np.any(invalid, axis=0) &
+                    np.any(np.isnan(res), axis=0))[0]
+    if len(cols):
+        # group fields by their pattern of invalid source values
+        masks, groups = np.unique(invalid[:, cols].T, axis=0,
+                                  return_inverse=True)
+        groups = groups.reshape(-1)
+        for i, mask in enumerate(masks):
+            gcols = cols[groups == i]
+            broken = np.isnan(res[:, gcols])
+            ix_broken = np.where(np.any(broken, axis=1))[0]
+            ix_good = np.where(~mask)[0]
+            ip = ipclass(src[ix_good], trg[ix_broken], *args, **kwargs)
+            tmp = ip(fields[ix_good][:, gcols])
+            tmp = tmp.reshape((len(ix_broken), len(gcols)))
+            sub = np.ix_(ix_broken, gcols)
+            res[sub] = np.where(broken[ix_broken], tmp, res[sub])
+    return res
+
+
+class PolarFiller(object):
+    """
+    PolarFiller(mask, ipclass=Nearest, **ipargs)
+
+    Reusable filler for masked bins of polar data with a fixed geometry.
+
+    The bin coordinates, the split into source (unmasked) and target (masked)
+    bins and the interpolator are set up once for the given ``mask``. Calling
+    the instance fills the masked bins of one or many scans in one
+    vectorized call. This is useful e.g. for filling a static clutter map
+    scan by scan. :func:`~wradlib.ipol.interpolate_polar` gives the same
+    results for a single scan.
+
+    Parameters
+    ----------
+    mask : array
+        boolean array (azimuth, ranges) with pixels to be interpolated set
+        to True
+    ipclass : a class which inherits from IpolBase
+        defaults to :class:`~wradlib.ipol.Nearest`
+    ipargs : keyword arguments of ipclass (see class documentation)
+
+    Examples
+    --------
+    >>> mask = np.zeros((4, 3), dtype=bool)
+    >>> mask[0, 2] = mask[3, 0] = True
+    >>> filler = PolarFiller(mask, ipclass=Nearest)
+    >>> scans = np.arange(36.).reshape(3, 4, 3)
+    >>> filled = filler(scans)
+    """
+
+    def __init__(self, mask, ipclass=Nearest, **ipargs):
+        self.mask = np.asanyarray(mask, dtype=bool)
+        self.shape = self.mask.shape
+        self.ipclass = ipclass
+        self.ipargs = ipargs
+        naz, nrng = self.shape
+        # construct the ranges for every bin
+        ranges = np.tile(np.arange(0.5, nrng + 0.5), naz)
+        # construct the angles for every bin
+        angles = np.repeat(np.radians(np.arange(0, 360, 360. / naz)), nrng)
+        # calculate cartesian coordinates for every bin
+        self.coords = np.column_stack((np.cos(angles) * ranges,
+                                       np.sin(angles) * ranges))
+        # split into unmasked source and masked target bins
+        self.src_ix = np.where(~self.mask.ravel())[0]
+        self.trg_ix = np.where(self.mask.ravel())[0]
+        self.src = self.coords[self.src_ix]
+        self.trg = self.coords[self.trg_ix]
+        self.ip = ipclass(self.src, self.trg, **ipargs)
+        self._nearest = None
+
+    @property
+    def nearest(self):
+        """Nearest neighbour interpolator for targets which ``ipclass``
+        leaves undefined (e.g. outside the convex hull for Linear)"""
+        if self._nearest is None:
+            self._nearest = Nearest(self.src, self.trg)
+        return self._nearest
+
+    def __call__(self, data):
+        """
+        Fill the masked bins of ``data``.
+
+        Parameters
+        ----------
+        data : ndarray
+            array of shape (..., azimuth, ranges), e.g. a stack of scans of
+            shape (ntime, azimuth, ranges)
+
+        Returns
+        -------
+        filled_data : ndarray
+            array of the same shape with interpolated values for the masked
+            bins
+        """
+        values = np.ma.getdata(data)
+        assert values.shape[-2:] == self.shape, \
+            ('Shape of data %s does not correspond to shape of mask %s' %
+             (values.shape, self.shape))
+        # (bins, scans)
+        filled = values.reshape((-1, self.mask.size)).T.copy()
+        srcvals = filled[self.src_ix]
+        # interpolate masked bins
+        filling = np.asarray(self.ip(srcvals)).reshape((len(self.trg_ix),
+                                                        -1))
+        filling = _reinterpolate_invalid(self.src, self.trg, srcvals,
+                                         filling, self.ipclass, **self.ipargs)
+        filled[self.trg_ix] = filling.astype(filled.dtype)
+        # in case of nans as processed at the rim when interpolating linear,
+        # these values are finally interpolated by nearest Neighbor
+        # interpolation
+        nan = np.isnan(filled)
+        if np.any(nan):
+            valid = np.all(np.isfinite(srcvals), axis=0)
+            # scans with valid sources only lack values at masked bins
+            fast = valid & np.any(nan, axis=0)
+            if np.any(fast):
+                sub = filled[self.trg_ix][:, fast]
+                sub = np.where(nan[self.trg_ix][:, fast],
+                               srcvals[self.nearest.ix][:, fast], sub)
+                filled[np.ix_(self.trg_ix, np.where(fast)[0])] = sub
+            for i in np.where(~valid & np.any(nan, axis=0))[0]:
+                pos = np.where(nan[:, i])[0]
+                filled[pos, i] = interpolate(self.src, self.coords[pos],
+                                             srcvals[:, i], Nearest)
+        filled = filled.T.reshape(values.shape)
+        if isinstance(data, np.ma.MaskedArray):
+            filled = np.ma.array(filled, mask=(np.ma.getmaskarray(data) &
+                                               ~self.mask))
+        return filled
+
+
 def interpolate_polar(data, mask=None, ipclass=Nearest):
     """
     Convenience function to interpolate polar data
@@ -1041,6 +1807,10 @@ def interpolate_polar(data, mask=None, ipclass=Nearest):
     filled_data : 2d-array
         array with interpolated values for the values set to True in the mask
 
+    See Also
+    --------
+    PolarFiller : reusable filler for a fixed mask and stacks of scans
+
     Examples
     --------
     >>> import numpy as np  # noqa
@@ -1067,38 +1837,7 @@ def interpolate_polar(data, mask=None, ipclass=Nearest):
     elif not np.any(mask):
         # mask contains no True values, so there is nothing to fill
         return data
-    clutter_indices = np.where(mask.ravel())
-    # construct the ranges for every bin
-    ranges = np.tile(np.arange(0.5, data.shape[1] + 0.5), data.shape[0])
-    # construct the angles for every bin
-    angles = np.repeat(np.radians(np.arange(0, 360, 360. / data.shape[0])),
-                       data.shape[1])
-    # calculate cartesian coordinates for every bin
-    binx = np.cos(angles) * ranges
-    biny = np.sin(angles) * ranges
-    # calculate cartesian coordinates for bins, which are not masked
-    src_coord = np.array([(np.delete(binx, clutter_indices)),
-                          (np.delete(biny, clutter_indices))]).transpose()
-    # calculate cartesian coordinates for bins, which are masked
-    trg_coord = np.array([binx[clutter_indices],
-                          biny[clutter_indices]]).transpose()
-    # data values for bins, which are not masked
-    values_list = np.delete(data, clutter_indices)
-    filled_data = data.copy().ravel()
-    # interpolate masked bins
-    filling = interpolate(src_coord, trg_coord, values_list, ipclass)
-    # fill data with the interpolations
-    filled_data[clutter_indices] = filling.astype(filled_data.dtype)
-    # in case of nans as processed at the rim when interpolating linear,
-    # these values are finally interpolated by nearest Neighbor interpolation
-    if np.any(np.isnan(filled_data)):
-        trg_coord = (np.array([binx[np.where(np.isnan(filled_data))],
-                              biny[np.where(np.isnan(filled_data))]])
-                     .transpose())
-        filling = interpolate(src_coord, trg_coord, values_list,
-                              ipclass=Nearest)
-        filled_data[np.where(np.isnan(filled_data))] = filling
-    return filled_data.reshape(data.shape[0], data.shape[1])
+    return PolarFiller(mask, ipclass=ipclass)(data)
 
 
 def cart_to_irregular_interp(cartgrid, values, newgrid, **kwargs):
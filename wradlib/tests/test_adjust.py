@@ -4,6 +4,7 @@
 
 import unittest
 import wradlib.adjust as adjust
+import wradlib.ipol as ipol
 import numpy as np
 
 # Arguments to be used throughout all test classes
@@ -42,11 +43,45 @@ class AdjustBaseTest(unittest.TestCase):
     def test___call__(self):
         pass
 
+    def test__adjust_timesteps(self):
+        obs = np.column_stack((self.obs[:, 0], self.obs[:, 0] * 2,
+                               self.obs[:, 0], self.obs[:, 0]))
+        obs[0, 2] = np.nan
+        obs[:, 3] = np.nan
+        raw = np.column_stack((self.raw[:, 0],) * 4)
+        for adjclass in [adjust.AdjustAdd, adjust.AdjustMultiply,
+                         adjust.AdjustMixed, adjust.AdjustMFB]:
+            adj = adjclass(self.obs_coords, self.raw_coords,
+                           nnear_raws=self.nnear_raws,
+                           mingages=self.mingages,
+                           mfb_args=dict(method='mean'))
+            res = adj(obs, raw)
+            self.assertEqual(res.shape, raw.shape)
+            for i in range(obs.shape[1]):
+                np.testing.assert_allclose(res[:, i], adj(obs[:, i],
+                                                          raw[:, i]))
+            # too few valid gages
+            np.testing.assert_allclose(res[:, 3], raw[:, 3])
+
     def test__get_valid_pairs(self):
         pass
 
     def test_xvalidate(self):
-        pass
+        for ipclass, ipargs in [(ipol.Idw, {}),
+                                (ipol.Nearest, {}),
+                                (ipol.OrdinaryKriging,
+                                 dict(cov='1.0 Exp(2.)'))]:
+            for adjclass in [adjust.AdjustAdd, adjust.AdjustMixed]:
+                adj = adjclass(self.obs_coords, self.raw_coords,
+                               nnear_raws=self.nnear_raws,
+                               mingages=self.mingages,
+                               ipclass=ipclass, **ipargs)
+                obs, fast = adj.xvalidate(self.obs[:, 0], self.raw[:, 0])
+                # compare to leaving out one gage after another
+                adj._fast_xvalidate = False
+                obs, loop = adj.xvalidate(self.obs[:, 0], self.raw[:, 0])
+                np.testing.assert_allclose(fast, loop, rtol=1e-6)
+                self.assertFalse(np.all(np.isnan(fast)))
 
 
 class AdjustAddTest(unittest.TestCase):
@@ -227,6 +262,36 @@ class GageOnlyTest(unittest.TestCase):
         self.assertTrue(np.allclose(res, shouldbe))
 
 
+class RawAtObsTest(unittest.TestCase):
+    def test_RawAtObs(self):
+        stacked_raw = raw.copy()
+        stacked_raw[4, 1] = np.nan
+        stacked_raw[9, 1] = 2.
+        stacked_obs = obs.copy()
+        stacked_obs[0, 1] = np.nan
+        for stat in ['median', 'mean', 'best', 'nanmedian', 'nanmean',
+                     'nanbest']:
+            rawatobs = adjust.RawAtObs(obs_coords, raw_coords,
+                                       nnear=nnear_raws, stat=stat)
+            self.assertEqual(rawatobs.raw_ix.dtype, np.int32)
+            res = rawatobs(stacked_raw, stacked_obs)
+            self.assertEqual(res.shape, stacked_obs.shape)
+            for i in range(stacked_obs.shape[1]):
+                np.testing.assert_allclose(res[:, i],
+                                           rawatobs(stacked_raw[:, i],
+                                                    stacked_obs[:, i]))
+        # nan-aware statistics ignore invalid neighbours
+        rawatobs = adjust.RawAtObs(obs_coords, raw_coords, nnear=4,
+                                   stat='nanbest')
+        np.testing.assert_array_equal(
+            np.isnan(rawatobs(stacked_raw, stacked_obs)), False)
+        # precomputed neighbour indices
+        raw_ix = adjust._get_neighbours_ix(obs_coords, raw_coords, 4)
+        rawatobs1 = adjust.RawAtObs(obs_coords, None, nnear=4,
+                                    stat='nanbest', raw_ix=raw_ix)
+        np.testing.assert_array_equal(rawatobs1.raw_ix, rawatobs.raw_ix)
+
+
 class AdjustHelperTest(unittest.TestCase):
     def test__get_neighbours_ix(self):
         pass
@@ -241,6 +306,10 @@ class AdjustHelperTest(unittest.TestCase):
         x = 7.5
         y = np.array([0., 1., 0., 1., 0., 7.7, 8., 8., 8., 8.])
         self.assertEqual(adjust.best(x, y), 7.7)
+        y = np.array([[0., np.nan, 7.], [np.nan, np.nan, np.nan]])
+        x = np.array([6., 1.])
+        np.testing.assert_array_equal(adjust.nanbest(x, y),
+                                      np.array([7., np.nan]))
 
 
 if __name__ == '__main__':
@@ -2,10 +2,14 @@
 # Copyright (c) 2011-2018, wradlib developers.
 # Distributed under the MIT License. See LICENSE.txt for more info.
 
+import os
 import sys
+import shutil
+import tempfile
 import unittest
 import wradlib.georef as georef
 import wradlib.util as util
+import wradlib.ipol as ipol
 from wradlib.io import (read_generic_hdf5, open_raster, gdal_create_dataset,
                         open_vector)
 import numpy as np
@@ -194,6 +198,89 @@ class CoordinateHelperTest(unittest.TestCase):
                            [1.0049995e+04, 0., 6.]]])
         np.testing.assert_array_almost_equal(centroids, arr, decimal=4)
 
+    def test_polar_geometry_cache(self):
+        r = np.array([10000., 10100.])
+        az = np.array([45., 90.])
+        sitecoords = (9., 48., 0.)
+        tmpdir = tempfile.mkdtemp()
+        # the cache directory is created on demand
+        cachedir = os.path.join(tmpdir, 'geometry')
+        try:
+            cache = georef.PolarGeometryCache(cachedir=cachedir)
+            centroids, rad = cache.spherical_to_centroids(r, az, 0,
+                                                          sitecoords)
+            centroids1, rad1 = cache.spherical_to_centroids(r, az, 0,
+                                                            sitecoords)
+            self.assertIs(centroids1, centroids)
+            self.assertFalse(centroids.flags.writeable)
+            self.assertTrue(rad1.IsSame(rad))
+            ref, _ = georef.spherical_to_centroids(r, az, 0, sitecoords)
+            np.testing.assert_array_equal(centroids, ref)
+            self.assertEqual(tuple(cache.info())[:2], (1, 1))
+
+            # a second cache picks up the files
+            cache = georef.PolarGeometryCache(cachedir=cachedir)
+            polyvert = cache.spherical_to_polyvert(r, az, 0, sitecoords,
+                                                   proj=rad)
+            polyvert1 = georef.PolarGeometryCache(
+                cachedir=cachedir).spherical_to_polyvert(r, az, 0,
+                                                         sitecoords, proj=rad)
+            self.assertIsInstance(polyvert1, np.memmap)
+            np.testing.assert_array_equal(polyvert1, polyvert)
+            coords = cache.spherical_to_proj(r, az, 0, sitecoords)
+            np.testing.assert_array_equal(
+                coords, georef.spherical_to_proj(r, az, 0, sitecoords))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_xyz_to_polar_index(self):
+        r = np.arange(1, 101) * 1000.
+        az = np.arange(0.5, 360., 1.)
+        sitecoords = (9., 48., 100.)
+        centroids, rad = georef.spherical_to_centroids(r, az, 1.,
+                                                       sitecoords)
+        ai, ri = georef.xyz_to_polar_index(centroids[..., 0],
+                                           centroids[..., 1], r, az,
+                                           sitecoords, theta=1.)
+        ai_ref, ri_ref = np.indices((360, 100))
+        np.testing.assert_array_equal(ai, ai_ref)
+        np.testing.assert_array_equal(ri, ri_ref)
+        # with altitudes the elevation is not needed
+        ai, ri = georef.xyz_to_polar_index(centroids[..., 0],
+                                           centroids[..., 1], r, az,
+                                           sitecoords, z=centroids[..., 2])
+        np.testing.assert_array_equal(ri, ri_ref)
+        # outside of the sweep
+        ai, ri = georef.xyz_to_polar_index(np.array([0., 2e5]),
+                                           np.array([500., -1000.]), r, az,
+                                           sitecoords)
+        np.testing.assert_array_equal(ai, [0, -1])
+        np.testing.assert_array_equal(ri, [0, -1])
+        ai, ri = georef.xyz_to_polar_index(np.array([0., 2e5]),
+                                           np.array([500., -1000.]), r, az,
+                                           sitecoords, clip=True)
+        np.testing.assert_array_equal(ai, [0, 90])
+        np.testing.assert_array_equal(ri, [0, 99])
+
+    def test_polar_neighbours_stencil(self):
+        r = np.arange(1, 101) * 500.
+        az = np.arange(0.5, 360., 1.)
+        sitecoords = (9., 48., 100.)
+        centroids, rad = georef.spherical_to_centroids(r, az, 0.,
+                                                       sitecoords)
+        tree = util.make_tree(centroids[..., :2].reshape(-1, 2))
+        np.random.seed(42)
+        x, y = np.random.uniform(-6e4, 6e4, (2, 1000))
+        for k in [1, 4, 9]:
+            dist, ix = georef.polar_neighbours_stencil(x, y, r, az,
+                                                       sitecoords, k=k)
+            dist1, ix1 = util.query_tree(tree, np.column_stack((x, y)), k=k)
+            self.assertEqual(ix.shape, ix1.shape)
+            np.testing.assert_allclose(dist, dist1, atol=1e-1)
+        self.assertRaises(ValueError,
+                          lambda: georef.polar_neighbours_stencil(
+                              x, y, r[:2], az[:2], sitecoords, k=5))
+
     def test_sweep_centroids(self):
         self.assertTrue(np.allclose(georef.sweep_centroids(1, 100., 1, 2.0),
                                     np.array([[[50., 3.14159265, 2.]]])))
@@ -358,6 +445,32 @@ class ProjectionsTest(unittest.TestCase):
                                                    [np.arange(10)],
                                                    [np.arange(11)]))
 
+    def test_reproject_chunked(self):
+        proj_gk = georef.epsg_to_osr(31466)
+        lon, lat = np.meshgrid(np.linspace(6., 8., 50),
+                               np.linspace(50., 52., 40))
+        x, y = georef.reproject(lon, lat, projection_target=proj_gk,
+                                chunksize=10 ** 6)
+        x1, y1 = georef.reproject(lon, lat, projection_target=proj_gk,
+                                  chunksize=77, nthreads=4)
+        np.testing.assert_array_equal(x1, x)
+        np.testing.assert_array_equal(y1, y)
+        self.assertEqual(x1.shape, lon.shape)
+        # one cache entry per pair of spatial references, shared by all
+        # threads
+        georef.clear_projection_cache()
+        for i in range(3):
+            georef.reproject(lon, lat, projection_target=proj_gk,
+                             chunksize=77, nthreads=4)
+        info = georef.projection_cache_info()['transform']
+        self.assertEqual((info.misses, info.currsize), (1, 1))
+        if isinstance(georef.projection.pyproj, util.OptionalModuleStub):
+            return
+        x2, y2 = georef.reproject(lon, lat, projection_target=proj_gk,
+                                  use_pyproj=True, chunksize=77, nthreads=4)
+        np.testing.assert_allclose(x2, x, atol=1e-3)
+        np.testing.assert_allclose(y2, y, atol=1e-3)
+
     def test_get_default_projection(self):
         self.assertEqual(georef.get_default_projection().ExportToWkt(),
                          ('GEOGCS["WGS 84",DATUM["WGS_1984",'
@@ -406,6 +519,118 @@ class ProjectionsTest(unittest.TestCase):
         self.assertTrue(
             georef.wkt_to_osr().IsSame(georef.get_default_projection()))
 
+    def test__LRUCache(self):
+        cache = georef.projection._LRUCache(maxsize=2)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('b', lambda: 2), 2)
+        self.assertEqual(cache.get('a', lambda: 3), 1)
+        # 'b' is least recently used and gets evicted
+        self.assertEqual(cache.get('c', lambda: 4), 4)
+        self.assertEqual(cache.get('b', lambda: 5), 5)
+        self.assertEqual(tuple(cache.info()), (1, 4, 2, 2))
+        cache.clear()
+        self.assertEqual(tuple(cache.info()), (0, 0, 2, 0))
+
+    def test_projection_cache(self):
+        georef.clear_projection_cache()
+        proj4 = '+proj=aeqd +lon_0=7 +lat_0=53 +ellps=WGS84'
+        srs1 = georef.proj4_to_osr(proj4)
+        srs2 = georef.proj4_to_osr(proj4)
+        self.assertIsNot(srs1, srs2)
+        self.assertTrue(srs1.IsSame(srs2))
+        georef.epsg_to_osr(31466)
+        georef.epsg_to_osr(31466)
+        info = georef.projection_cache_info()
+        self.assertEqual(info['srs'].hits, 2)
+        self.assertEqual(info['srs'].misses, 2)
+
+        for i in range(3):
+            x, y = georef.reproject(7., 53., projection_target=srs1)
+        self.assertAlmostEqual(x, 0.)
+        self.assertAlmostEqual(y, 0.)
+        info = georef.projection_cache_info()
+        self.assertEqual(info['transform'].hits, 2)
+        self.assertEqual(info['transform'].misses, 1)
+        georef.clear_projection_cache()
+        info = georef.projection_cache_info()
+        self.assertEqual(info['srs'].currsize, 0)
+        self.assertEqual(info['transform'].currsize, 0)
+
+
+class PolarRegridderTest(unittest.TestCase):
+    def setUp(self):
+        self.r = np.arange(1, 51) * 1000.
+        self.az = np.arange(0.5, 360., 1.)
+        self.site = (9., 48., 100.)
+        self.x, self.y = np.meshgrid(np.arange(-60000., 60001., 2000.),
+                                     np.arange(60000., -60001., -2000.))
+        np.random.seed(42)
+        self.data = np.random.random((len(self.az), len(self.r)))
+
+    def test_methods(self):
+        for method in ['nearest', 'bilinear', 'area']:
+            regridder = georef.PolarRegridder(self.r, self.az, self.site,
+                                              self.x, self.y, method=method)
+            op = regridder.get_operator()
+            self.assertEqual(op.shape, (self.x.size, self.data.size))
+            wsum = np.asarray(op.sum(axis=1)).ravel()
+            np.testing.assert_allclose(wsum[op.getnnz(axis=1) > 0], 1.)
+            grid = regridder(self.data)
+            self.assertEqual(grid.shape, self.x.shape)
+            # outside of the sweep
+            self.assertTrue(np.isnan(grid[0, 0]))
+            self.assertEqual(regridder(self.data, fill_value=-1.)[0, 0], -1.)
+            # stack of scans
+            stack = regridder(np.stack((self.data, 2 * self.data)))
+            np.testing.assert_allclose(stack[1], 2 * grid)
+        self.assertRaises(ValueError,
+                          lambda: georef.PolarRegridder(self.r, self.az,
+                                                        self.site, self.x,
+                                                        self.y,
+                                                        method='cubic'))
+        self.assertRaises(ValueError, lambda: regridder(self.data[1:]))
+
+    def test_nearest_bilinear(self):
+        centroids, _ = georef.spherical_to_centroids(self.r, self.az, 0.,
+                                                     self.site)
+        for method in ['nearest', 'bilinear']:
+            regridder = georef.PolarRegridder(self.r, self.az, self.site,
+                                              centroids[..., 0],
+                                              centroids[..., 1],
+                                              method=method)
+            np.testing.assert_allclose(regridder(self.data), self.data,
+                                       atol=1e-4)
+
+    def test_area(self):
+        # constant fields are preserved
+        regridder = georef.PolarRegridder(self.r, self.az, self.site,
+                                          self.x, self.y, method='area')
+        grid = regridder(np.ones_like(self.data))
+        np.testing.assert_allclose(grid[~np.isnan(grid)], 1.)
+        self.assertRaises(ValueError,
+                          lambda: georef.PolarRegridder(self.r, self.az,
+                                                        self.site,
+                                                        self.x ** 2, self.y,
+                                                        method='area'))
+
+    def test_dump_load(self):
+        regridder = georef.PolarRegridder(self.r, self.az, self.site,
+                                          self.x, self.y, method='bilinear')
+        tmp = tempfile.NamedTemporaryFile(suffix='.npz', delete=False)
+        tmp.close()
+        try:
+            regridder.dump(tmp.name)
+            loaded = georef.PolarRegridder.load(tmp.name)
+            self.assertEqual(loaded.method, 'bilinear')
+            self.assertEqual(loaded.grid_shape, self.x.shape)
+            np.testing.assert_array_equal(loaded(self.data),
+                                          regridder(self.data))
+            op = ipol.load_operator(tmp.name)
+            self.assertEqual((op != regridder.get_operator()).nnz, 0)
+            del loaded
+        finally:
+            os.remove(tmp.name)
+
 
 class PixMapTest(unittest.TestCase):
     def test_pixel_coordinates(self):
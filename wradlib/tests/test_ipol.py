@@ -8,6 +8,9 @@ import wradlib.ipol as ipol
 import wradlib.georef as georef
 import unittest
 import warnings
+import os
+import shutil
+import tempfile
 
 
 class InterpolationTest(unittest.TestCase):
@@ -124,6 +127,34 @@ class InterpolationTest(unittest.TestCase):
         res = ip(self.vals[:, 2])
         self.assertTrue(np.allclose(res, np.array([3., 2., 2.8, 1.])))
 
+    def test_chunked(self):
+        """testing block-wise evaluation and compact storage"""
+        src = np.random.RandomState(42).rand(50, 2)
+        trg = np.random.RandomState(43).rand(103, 2)
+        vals = np.random.RandomState(44).rand(50, 3)
+        for cls, kwargs in [(ipol.Nearest, {}), (ipol.Idw, dict(nnearest=4))]:
+            ref = cls(src, trg, **kwargs)
+            ip = cls(src, trg, chunksize=10, compact=True, **kwargs)
+            self.assertFalse(hasattr(ip, 'ix'))
+            np.testing.assert_allclose(ip(vals), ref(vals), rtol=1e-6)
+            np.testing.assert_allclose(ip(vals[:, 0]), ref(vals[:, 0]),
+                                       rtol=1e-6)
+            np.testing.assert_allclose(ip.get_operator().toarray(),
+                                       ref.get_operator().toarray(),
+                                       rtol=1e-6)
+            ip = cls(src, trg, compact=True, **kwargs)
+            self.assertEqual(ip.ix.dtype, np.int32)
+            self.assertEqual(ip.dists.dtype, np.float32)
+            out = np.zeros((103, 3))
+            res = ip(vals, out=out)
+            self.assertTrue(res is out)
+            np.testing.assert_allclose(out, ref(vals), rtol=1e-6)
+            self.assertRaises(AssertionError, ip, vals, out=np.zeros(103))
+        ip = ipol.Nearest(src, trg, chunksize=7)
+        res = ip(vals, maxdist=0.05)
+        self.assertTrue(np.all(np.isnan(res[ipol.Nearest(src, trg).dists >
+                                            0.05])))
+
     def test_Linear_1(self):
         """testing the basic behaviour of the Linear class"""
 
@@ -139,6 +170,22 @@ class InterpolationTest(unittest.TestCase):
         res = ip(self.vals_lin[:, 2])
         self.assertTrue(np.allclose(res, np.array([3., 2., 2.5, 1.])))
 
+    def test_Linear_2(self):
+        """testing Linear against scipy's LinearNDInterpolator"""
+        from scipy.interpolate import LinearNDInterpolator
+        src = np.random.RandomState(42).rand(40, 2)
+        trg = np.random.RandomState(43).rand(100, 2) * 1.2 - 0.1
+        vals = np.random.RandomState(44).rand(40, 3)
+        vals[5, 1] = np.nan
+        ip = ipol.Linear(src, trg)
+        res = ip(vals)
+        ref = LinearNDInterpolator(src, vals)(trg)
+        np.testing.assert_allclose(res, ref)
+        self.assertTrue(np.any(ip.outside))
+        res = ip(vals[:, 0], fill_value=-1.)
+        ref = LinearNDInterpolator(src, vals[:, 0], fill_value=-1.)(trg)
+        np.testing.assert_allclose(res, ref)
+
     def test_OrdinaryKriging_1(self):
         """testing the basic behaviour of the OrdinaryKriging class"""
 
@@ -195,6 +242,79 @@ class InterpolationTest(unittest.TestCase):
                  src_drift=src_d[:, 2], trg_drift=trg_d[:, 2])
         self.assertTrue(np.allclose(res, np.array([3., 1., -1., -3.])))
 
+    def test_Kriging_weights(self):
+        """testing the shape of the batched kriging results"""
+        ip = ipol.OrdinaryKriging(self.src, self.trg, '1.0 Lin(2.0)')
+        self.assertEqual(ip.weights.shape, (4, 3))
+        self.assertEqual(ip.estimation_variance.shape, (4,))
+        np.testing.assert_allclose(ip.weights[:, :-1].sum(axis=1), 1.)
+        np.testing.assert_allclose(ip.estimation_variance[[0, 3]], 0.,
+                                   atol=1e-12)
+        src_d = np.array([[0., 0., 0.],
+                          [1., 1., 1.]])
+        trg_d = np.array([[0., 0., 0.],
+                          [1., 1., 1.],
+                          [2., 2., 2.],
+                          [3., 3., 3.]])
+        ip = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                       src_drift=src_d, trg_drift=trg_d)
+        ip(self.vals)
+        self.assertEqual(ip.weights.shape, (3, 4, 4))
+        self.assertEqual(ip.estimation_variance.shape, (3, 4))
+        # singular systems result in nan weights
+        ip = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                       src_drift=np.ones(2),
+                                       trg_drift=np.ones(4))
+        ip(self.vals)
+        self.assertTrue(np.all(np.isnan(ip.weights)))
+
+    def test_KrigingCache(self):
+        cache = ipol.KrigingCache()
+        ip1 = ipol.OrdinaryKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                   cache=cache)
+        self.assertEqual(cache.info(), dict(hits=0, misses=4,
+                                            maxsize=cache.maxsize,
+                                            currsize=4))
+        # reordered sources give other systems
+        ip2 = ipol.OrdinaryKriging(self.src[::-1], self.trg, '1.0 Lin(2.0)',
+                                   cache=cache)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 8)
+        # reordered targets are retrieved from the cache
+        ip3 = ipol.OrdinaryKriging(self.src, self.trg[::-1], '1.0 Lin(2.0)',
+                                   cache=cache)
+        self.assertEqual(cache.hits, 4)
+        np.testing.assert_allclose(ip1(self.vals), ip2(self.vals[::-1]))
+        np.testing.assert_allclose(ip1(self.vals), ip3(self.vals)[::-1])
+        ref = ipol.OrdinaryKriging(self.src, self.trg, '1.0 Lin(2.0)')
+        np.testing.assert_allclose(ip3.weights[::-1], ref.weights)
+        # a different covariance model is a different system
+        ipol.OrdinaryKriging(self.src, self.trg, '1.0 Lin(3.0)', cache=cache)
+        self.assertEqual(cache.misses, 12)
+        self.assertEqual(len(cache), 12)
+        ip = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                       src_drift=self.src_d,
+                                       trg_drift=self.trg_d, cache=cache)
+        ip(self.vals)
+        ip_ref = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                           src_drift=self.src_d,
+                                           trg_drift=self.trg_d)
+        ip_ref(self.vals)
+        np.testing.assert_allclose(ip.weights, ip_ref.weights)
+        self.assertEqual(len(cache), 16)
+        cache.maxsize = 2
+        cache.put_many(['test'], np.zeros((1, 3)))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_many(['test', 'other'])[1], None)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        # equal bytes with another shape or dtype give different keys
+        arr = np.arange(4.)
+        self.assertNotEqual(ipol._array_key(arr),
+                            ipol._array_key(arr.reshape(2, 2)))
+        self.assertNotEqual(ipol._array_key(arr),
+                            ipol._array_key(arr.view(np.int64)))
+
     def test_ExternalDriftKriging_3(self):
         """testing the basic behaviour of the ExternalDriftKriging class
         with missing drift terms"""
@@ -204,6 +324,59 @@ class InterpolationTest(unittest.TestCase):
 
         self.assertRaises(ValueError, ip, self.vals)
 
+    def test_get_operator(self):
+        for ip in [ipol.Nearest(self.src, self.trg),
+                   ipol.Idw(self.src, self.trg),
+                   ipol.OrdinaryKriging(self.src, self.trg, '1.0 Lin(2.0)')]:
+            op = ip.get_operator()
+            self.assertEqual(op.shape, (len(self.trg), len(self.src)))
+            np.testing.assert_allclose(op.dot(self.vals), ip(self.vals))
+        ip = ipol.Linear(self.src_lin, self.trg_lin)
+        np.testing.assert_allclose(ip.get_operator().dot(self.vals_lin),
+                                   ip(self.vals_lin))
+        ip = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)',
+                                       src_drift=self.src_d,
+                                       trg_drift=self.trg_d)
+        np.testing.assert_allclose(ip.get_operator().dot(self.vals),
+                                   ip(self.vals))
+        ip = ipol.ExternalDriftKriging(self.src, self.trg, '1.0 Lin(2.0)')
+        self.assertRaises(ValueError, ip.get_operator)
+        ip = ipol.IpolBase(self.src, self.trg)
+        self.assertRaises(NotImplementedError, ip.get_operator)
+
+    def test_SparseOperator(self):
+        ip = ipol.SparseOperator(self.src, self.trg, nnearest=2)
+        np.testing.assert_allclose(ip(self.vals),
+                                   ipol.Idw(self.src, self.trg)(self.vals))
+        np.testing.assert_allclose(ip(self.vals[:, 2]),
+                                   np.array([3., 2., 2.8, 1.]))
+        # targets outside the convex hull are filled
+        trg = np.vstack((self.trg_lin, [[10., 10.]]))
+        ip = ipol.SparseOperator(self.src_lin, trg, baseclass=ipol.Linear)
+        res = ip(self.vals_lin)
+        self.assertTrue(np.all(np.isnan(res[-1])))
+        np.testing.assert_allclose(res[:-1],
+                                   ipol.Linear(self.src_lin,
+                                               self.trg_lin)(self.vals_lin))
+        # caching on disk
+        cachedir = tempfile.mkdtemp()
+        try:
+            ip1 = ipol.SparseOperator(self.src, self.trg, cachedir=cachedir,
+                                      baseclass=ipol.OrdinaryKriging,
+                                      cov='1.0 Lin(2.0)')
+            self.assertTrue(os.path.exists(ip1.cachefile))
+            ip2 = ipol.SparseOperator(self.src, self.trg, cachedir=cachedir,
+                                      baseclass=ipol.OrdinaryKriging,
+                                      cov='1.0 Lin(2.0)')
+            self.assertEqual(ip1.cachefile, ip2.cachefile)
+            np.testing.assert_allclose(ip2(self.vals), ip1(self.vals))
+            ip3 = ipol.SparseOperator(self.src, self.trg, cachedir=cachedir,
+                                      baseclass=ipol.OrdinaryKriging,
+                                      cov='1.0 Lin(3.0)')
+            self.assertNotEqual(ip1.cachefile, ip3.cachefile)
+        finally:
+            shutil.rmtree(cachedir)
+
     def test_MissingErrors(self):
         self.assertRaises(ipol.MissingSourcesError,
                           ipol.Nearest, np.array([]), self.trg)
@@ -277,9 +450,28 @@ class WrapperFunctionTest(unittest.TestCase):
 
         vals = np.dstack((np.sin(src), 10. + np.sin(src)))
         vals[3:5, :, 1] = np.nan
-        self.assertRaises(NotImplementedError,
-                          lambda: ipol.interpolate(src, trg, vals, ipol.Idw,
-                                                   nnearest=2))
+        ipol_result = ipol.interpolate(src, trg, vals, ipol.Idw, nnearest=2)
+        self.assertEqual(ipol_result.shape, (40, 1, 2))
+        np.testing.assert_allclose(ipol_result[3:5, 0, 1],
+                                   np.array([10.880571, 10.909137]))
+
+    def test_interpolate_nan_patterns(self):
+        src = np.arange(10)[:, None]
+        trg = np.linspace(0, 20, 40)[:, None]
+        vals = np.sin(src) + np.arange(6)[None, :]
+        vals[3, [0, 2, 4]] = np.nan
+        vals[7, [1, 3]] = np.nan
+        res = ipol.interpolate(src, trg, vals, ipol.Idw, nnearest=2)
+        self.assertFalse(np.any(np.isnan(res)))
+        for i in range(vals.shape[1]):
+            np.testing.assert_allclose(res[:, i],
+                                       ipol.interpolate(src, trg, vals[:, i],
+                                                        ipol.Idw,
+                                                        nnearest=2),
+                                       rtol=1e-6)
+        res3d = ipol.interpolate(src, trg, vals.reshape((10, 2, 3)),
+                                 ipol.Idw, nnearest=2)
+        np.testing.assert_allclose(res3d.reshape((40, 6)), res)
 
     def test_interpolate_polar(self):
         data = np.arange(12.).reshape(4, 3)
@@ -296,6 +488,21 @@ class WrapperFunctionTest(unittest.TestCase):
 
         np.testing.assert_allclose(filled_a, filled_b)
 
+    def test_PolarFiller(self):
+        data = np.arange(12.).reshape(4, 3)
+        mask = (data == 2) | (data == 9)
+        stack = np.stack([data, 2 * data, data[::-1]])
+        stack[2, 1, 1] = np.nan
+        filler = ipol.PolarFiller(mask, ipclass=ipol.Linear)
+        filled = filler(stack)
+        self.assertEqual(filled.shape, stack.shape)
+        self.assertFalse(np.any(np.isnan(filled)))
+        for scan, res in zip(stack, filled):
+            np.testing.assert_allclose(
+                res, ipol.interpolate_polar(scan, mask=mask,
+                                            ipclass=ipol.Linear))
+        np.testing.assert_allclose(filled[1][~mask], stack[1][~mask])
+
 
 class RegularToIrregularTest(unittest.TestCase):
     def setUp(self):
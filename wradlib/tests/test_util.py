@@ -2,7 +2,11 @@
 # Copyright (c) 2011-2018, wradlib developers.
 # Distributed under the MIT License. See LICENSE.txt for more info.
 
+import io
 import os
+import shutil
+import tempfile
+import zipfile
 import numpy as np
 import wradlib.util as util
 import unittest
@@ -24,6 +28,13 @@ class HelperFunctionsTest(unittest.TestCase):
             np.allclose(util._idvalid(data, isinvalid=[-9999], maxval=5.),
                         np.array([2, 6, 7, 8, 9])))
 
+    def test__validmask(self):
+        data = np.array([[np.inf, np.nan, -99., 5.], [-9999., 0., -1., 2.]])
+        np.testing.assert_array_equal(
+            util._validmask(data, minval=0.),
+            np.array([[False, False, False, True],
+                      [False, True, False, True]]))
+
     def test_issequence(self):
         self.assertTrue(util.issequence([0, 1, 2]))
         self.assertFalse(util.issequence(1))
@@ -122,6 +133,55 @@ class HelperFunctionsTest(unittest.TestCase):
                              [1., 11., 12., 14., 16., 17.]])
         np.testing.assert_allclose(result, shouldbe)
 
+    def test_make_tree(self):
+        coords = np.array([[0., 0.], [1., 0.], [0., 1.], [5., 5.]])
+        tree = util.make_tree(coords.tolist())
+        dists, ix = util.query_tree(tree, [[0.1, 0.], [4., 3.9]], k=2)
+        np.testing.assert_array_equal(ix, np.array([[0, 1], [3, 1]]))
+        np.testing.assert_allclose(dists[0], np.array([0.1, 0.9]))
+        dists, ix = util.query_tree(tree, np.array([[0.1, 0.], [4., 3.9]]),
+                                    k=2, maxdist=2., workers=1)
+        np.testing.assert_array_equal(ix, np.array([[0, 1], [3, 4]]))
+        self.assertTrue(np.isinf(dists[1, 1]))
+        dists, ix = util.query_tree(util.make_tree(np.arange(3.)), [1.2])
+        self.assertEqual(ix, 1)
+
+    def test__load_npz(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            f = os.path.join(tmpdir, 'test.npz')
+            a = np.arange(10.)
+            b = np.asfortranarray(np.arange(6).reshape(2, 3))
+            np.savez(f, a=a, b=b, c=np.array('abc'), d=np.zeros(0))
+            for mmap_mode in [None, 'r']:
+                arrays = util._load_npz(f, mmap_mode=mmap_mode)
+                self.assertEqual(sorted(arrays), ['a', 'b', 'c', 'd'])
+                np.testing.assert_array_equal(arrays['a'], a)
+                np.testing.assert_array_equal(arrays['b'], b)
+                self.assertEqual(str(arrays['c']), 'abc')
+                self.assertEqual(arrays['d'].shape, (0,))
+                self.assertEqual(isinstance(arrays['a'], np.memmap),
+                                 mmap_mode is not None)
+                del arrays
+            # compressed members are read into memory
+            np.savez_compressed(f, a=a)
+            arrays = util._load_npz(f, mmap_mode='r')
+            self.assertNotIsInstance(arrays['a'], np.memmap)
+            np.testing.assert_array_equal(arrays['a'], a)
+            # unknown extra fields in the local header
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, a)
+            info = zipfile.ZipInfo('a.npy')
+            info.extra = b'\xfe\xca\x04\x00abcd'
+            with zipfile.ZipFile(f, 'w') as zf:
+                zf.writestr(info, buf.getvalue())
+            arrays = util._load_npz(f, mmap_mode='r')
+            self.assertIsInstance(arrays['a'], np.memmap)
+            np.testing.assert_array_equal(arrays['a'], a)
+            del arrays
+        finally:
+            shutil.rmtree(tmpdir)
+
     def test_gradient_from_smoothed(self):
         x = np.arange(10).reshape((2, 5)).astype("f4") ** 2
         result = util.gradient_from_smoothed(x)
@@ -63,6 +63,26 @@ class PolarNeighboursTest(unittest.TestCase):
         np.testing.assert_allclose(by[0], resy0)
         np.testing.assert_allclose(by[1], resy1)
 
+    def test_geographic_proj(self):
+        proj = georef.epsg_to_osr(4326)
+        x = np.array([9.7843, 9.7835])
+        y = np.array([48.5865, 48.5858])
+        pn = verify.PolarNeighbours(self.r, self.az, self.site, proj,
+                                    x, y, nnear=4)
+        # neighbours and distances refer to the units of proj (degrees)
+        bx, by = pn.get_bincoords()
+        dist = np.hypot(bx - x[:, np.newaxis], by - y[:, np.newaxis])
+        np.testing.assert_allclose(pn.dist[:, 0], dist.min(axis=1))
+        bx, by = pn.get_bincoords_at_points()
+        np.testing.assert_allclose(pn.dist, np.hypot(bx - x[:, np.newaxis],
+                                                     by - y[:, np.newaxis]))
+        self.assertTrue(np.all(pn.dist < 0.01))
+        # the stencil lookup works in metres
+        pn = verify.PolarNeighbours(self.r, self.az, self.site, proj,
+                                    x, y, nnear=4, stencil=True)
+        self.assertEqual(pn.ix.shape, (2, 4))
+        self.assertTrue(np.all(pn.dist[:, -1] > 1.))
+
 
 class ErrorMetricsTest(unittest.TestCase):
     def setUp(self):
@@ -58,6 +58,13 @@ class DataSourceTest(unittest.TestCase):
             np.allclose(self.ds.get_data_by_att('index', 0), self.box0))
         self.assertTrue(
             np.allclose(self.ds.get_data_by_att('index', 1), self.box1))
+        # values must not be truncated to the field type
+        self.assertEqual(len(self.ds.get_data_by_att('index', 0.5)), 0)
+        self.ds._attr_index['name'] = (np.array(['ab', 'ab', 'cd']),
+                                       np.array([2, 0, 1]))
+        np.testing.assert_array_equal(
+            self.ds._get_fids_by_att('name', 'ab'), [0, 2])
+        self.assertEqual(len(self.ds._get_fids_by_att('name', 'abc')), 0)
 
     def test_get_data_by_geom(self):
         lyr = self.ds.ds.GetLayer()
@@ -69,6 +76,21 @@ class DataSourceTest(unittest.TestCase):
             self.assertTrue(
                 np.allclose(self.ds.get_data_by_geom(geom), self.data[i]))
 
+    def test_index(self):
+        ds = zonalstats.DataSource(self.data, index=True)
+        self.assertTrue(ds.use_index)
+        np.testing.assert_array_equal(ds.index.query((2600000., 2600001.,
+                                                      5630000., 5630001.)),
+                                      [0])
+        self.assertTrue(np.allclose(ds.get_data_by_att('index', 1),
+                                    self.box1))
+        geom = georef.numpy_to_ogr(self.box0 + 5000., 'Polygon')
+        self.assertTrue(np.allclose(ds.get_data_by_geom(geom),
+                                    self.ds.get_data_by_geom(geom)))
+        ds.set_attribute('test', self.values2)
+        self.assertTrue(np.allclose(ds.get_data_by_att('test', 15.08),
+                                    self.box1))
+
     def test_set_attribute(self):
         self.ds.set_attribute('test', self.values1)
         self.assertTrue(
@@ -76,6 +98,11 @@ class DataSourceTest(unittest.TestCase):
         self.ds.set_attribute('test', self.values2)
         self.assertTrue(
             np.allclose(self.ds.get_attributes(['test']), self.values2))
+        self.ds.set_attribute(['test1', 'test2'],
+                              np.stack([self.values1, self.values2], axis=-1))
+        self.assertTrue(
+            np.allclose(self.ds.get_attributes(['test1', 'test2']),
+                        [self.values1, self.values2]))
 
     def test_get_attributes(self):
         self.ds.set_attribute('test', self.values2)
@@ -256,6 +283,40 @@ class ZonalDataPolyTest(unittest.TestCase):
                          ([np.array([0]), np.array([1])],
                           [np.array([25000000.]), np.array([25000000.])]))
 
+    def test__get_csr_idx_weights(self):
+        zdp = zonalstats.ZonalDataPoly(self.src, self.trg, srs=self.proj)
+        indptr, indices, weights = zdp._get_csr_idx_weights()
+        np.testing.assert_array_equal(indptr, [0, 1, 2])
+        np.testing.assert_array_equal(indices, [0, 1])
+        np.testing.assert_allclose(weights, [25000000., 25000000.])
+
+    def test_dump_weights(self):
+        zdp = zonalstats.ZonalDataPoly(self.src, self.trg, srs=self.proj)
+        f = tempfile.NamedTemporaryFile(mode='w+b', suffix='.npz').name
+        zdp.dump_weights(f, geometries=True)
+        zsl = zonalstats.ZonalStatsPoly.load_weights(
+            f, fingerprint=zdp.fingerprint)
+        for res, ref in zip(zsl._get_csr(), zdp._get_csr_idx_weights()):
+            np.testing.assert_allclose(res, ref)
+        with np.load(f) as npz:
+            self.assertEqual(len(npz['isec_offsets']), 3)
+        zdp2 = zonalstats.ZonalDataPoly(self.src[::-1], self.trg,
+                                        srs=self.proj)
+        self.assertNotEqual(zdp.fingerprint, zdp2.fingerprint)
+
+    def test_chunked(self):
+        zdp = zonalstats.ZonalDataPoly(self.src, self.trg, srs=self.proj)
+        for processes in [1, 2]:
+            progress = []
+            zdc = zonalstats.ZonalDataPoly(
+                self.src, self.trg, srs=self.proj, processes=processes,
+                chunksize=1, callback=lambda *args: progress.append(args[0]))
+            self.assertEqual(progress, [0.5, 1.])
+            self.assertEqual(zdc.count_intersections, 2)
+            for res, ref in zip(zdc._get_csr_idx_weights(),
+                                zdp._get_csr_idx_weights()):
+                np.testing.assert_allclose(res, ref)
+
 
 @unittest.skipIf(not util.has_geos(), "GDAL without GEOS")
 class ZonalDataPointTest(unittest.TestCase):
@@ -379,6 +440,119 @@ class ZonalStatsBaseTest(unittest.TestCase):
                                 np.array([0, 0]))
 
 
+class ZonalStatsBaseWeightsTest(unittest.TestCase):
+    def test_get_weights(self):
+        zsb = zonalstats.ZonalStatsBase(ix=[np.array([0, 2]), np.array([]),
+                                            np.array([1])],
+                                        w=[np.array([1., 3.]), np.array([]),
+                                           np.array([2.])])
+        weights = zsb.get_weights()
+        self.assertEqual(weights.shape, (3, 3))
+        np.testing.assert_equal(weights.toarray(),
+                                np.array([[1., 0., 3.],
+                                          [0., 0., 0.],
+                                          [0., 2., 0.]]))
+        self.assertEqual(zsb.get_weights(5).shape, (3, 5))
+        np.testing.assert_equal(zsb.check_empty(),
+                                np.array([False, True, False]))
+
+    def test_mean_var_timesteps(self):
+        ix = [np.array([0, 2]), np.array([]), np.array([1, 2, 3])]
+        w = [np.array([1., 3.]), np.array([]), np.array([2., 1., 1.])]
+        zsb = zonalstats.ZonalStatsBase(ix=ix, w=w)
+        vals = np.array([[1., 2., np.nan],
+                         [4., np.nan, np.nan],
+                         [5., 6., np.nan],
+                         [8., 9., 10.]])
+        mean = zsb.mean(vals)
+        var = zsb.var(vals)
+        self.assertEqual(mean.shape, (3, 3))
+        self.assertTrue(np.all(np.isnan(mean[1])))
+        self.assertTrue(np.isnan(mean[0, 2]))
+        # compare with renormalised weighted statistics of each time step
+        for i in [0, 2]:
+            for j in range(3):
+                v = vals[ix[i], j]
+                valid = ~np.isnan(v)
+                if not valid.any():
+                    continue
+                m = np.average(v[valid], weights=w[i][valid])
+                np.testing.assert_allclose(mean[i, j], m)
+                np.testing.assert_allclose(
+                    var[i, j], np.average((v[valid] - m) ** 2,
+                                          weights=w[i][valid]))
+        np.testing.assert_allclose(zsb.mean(vals[:, 0]), mean[:, 0])
+        np.testing.assert_allclose(zsb.var(vals[:, 0]), var[:, 0])
+        # more than one trailing dimension
+        vals3 = np.arange(40.).reshape(4, 5, 2) ** 1.5
+        vals3[1, 2, 0] = np.nan
+        mean3 = zsb.mean(vals3)
+        var3 = zsb.var(vals3)
+        self.assertEqual(mean3.shape, (3, 5, 2))
+        self.assertEqual(var3.shape, (3, 5, 2))
+        flat = vals3.reshape(4, -1)
+        np.testing.assert_allclose(mean3.reshape(3, -1), zsb.mean(flat))
+        np.testing.assert_allclose(var3.reshape(3, -1), zsb.var(flat))
+
+    def test_dump_load_weights(self):
+        ix = [np.array([0, 2]), np.array([]), np.array([1, 2, 3])]
+        w = [np.array([1., 3.]), np.array([]), np.array([2., 1., 1.])]
+        zsb = zonalstats.ZonalStatsBase(ix=ix, w=w)
+        zsb.fingerprint = 'abc'
+        f = tempfile.NamedTemporaryFile(mode='w+b', suffix='.npz').name
+        zsb.dump_weights(f, ids=['a', 'b', 'c'])
+        for mmap_mode in [None, 'r']:
+            zsl = zonalstats.ZonalStatsPoly.load_weights(
+                f, fingerprint='abc', mmap_mode=mmap_mode)
+            self.assertIsInstance(zsl, zonalstats.ZonalStatsPoly)
+            self.assertIsNone(zsl.zdata)
+            self.assertEqual(zsl.fingerprint, 'abc')
+            np.testing.assert_array_equal(zsl.ids, ['a', 'b', 'c'])
+            for res, ref in zip(zsl.ix, ix):
+                np.testing.assert_array_equal(res, ref)
+            vals = np.arange(4.)
+            np.testing.assert_array_equal(zsl.mean(vals), zsb.mean(vals))
+        self.assertRaises(ValueError, zonalstats.ZonalStatsBase.load_weights,
+                          f, fingerprint='abd')
+        self.assertRaises(ValueError, lambda: zsb.dump_weights(f, ids=[0]))
+
+    def test_reducers(self):
+        ix = [np.array([0, 2]), np.array([]), np.array([1, 2, 3])]
+        w = [np.array([1., 3.]), np.array([]), np.array([2., 1., 1.])]
+        zsb = zonalstats.ZonalStatsBase(ix=ix, w=w)
+        vals = np.array([[1., 2., np.nan],
+                         [4., np.nan, np.nan],
+                         [5., 6., np.nan],
+                         [8., 9., 10.]])
+        nan = np.nan
+        np.testing.assert_equal(zsb.min(vals), np.array([[1., 2., nan],
+                                                         [nan, nan, nan],
+                                                         [4., 6., 10.]]))
+        np.testing.assert_equal(zsb.max(vals), np.array([[5., 6., nan],
+                                                         [nan, nan, nan],
+                                                         [8., 9., 10.]]))
+        np.testing.assert_equal(zsb.sum(vals), np.array([[6., 8., nan],
+                                                         [nan, nan, nan],
+                                                         [17., 15., 10.]]))
+        np.testing.assert_equal(zsb.count(vals), np.array([[2, 2, 0],
+                                                           [0, 0, 0],
+                                                           [3, 2, 1]]))
+        np.testing.assert_equal(zsb.coverage(vals),
+                                np.array([[1., 1., 0.],
+                                          [nan, nan, nan],
+                                          [1., 0.5, 0.25]]))
+        np.testing.assert_equal(zsb.exceedance(vals, 4.5),
+                                np.array([[0.75, 0.75, nan],
+                                          [nan, nan, nan],
+                                          [0.5, 1., 1.]]))
+        np.testing.assert_equal(zsb.quantile(vals, 0.5),
+                                np.array([[5., 6., nan],
+                                          [nan, nan, nan],
+                                          [4., 6., 10.]]))
+        np.testing.assert_equal(zsb.quantile(vals[:, 0], 0.9),
+                                np.array([5., nan, 8.]))
+
+
 @unittest.skipIf(not util.has_geos(), "GDAL without GEOS")
 class ZonalDataTest(unittest.TestCase):
     def setUp(self):
@@ -528,6 +702,49 @@ class ZonalStatsUtilTest(unittest.TestCase):
 
         self.ogrobj = georef.numpy_to_ogr(self.npobj, 'Polygon')
 
+    def test__spatial_chunks(self):
+        x, y = np.meshgrid(np.arange(10.), np.arange(10.))
+        env = np.stack([x.ravel(), x.ravel() + 1,
+                        y.ravel(), y.ravel() + 1], axis=-1)
+        chunks = zonalstats._spatial_chunks(env, 25)
+        self.assertEqual(len(chunks), 4)
+        np.testing.assert_array_equal(np.sort(np.concatenate(chunks)),
+                                      np.arange(100))
+        # Z-order on a regular grid gives the four quadrants
+        for chunk in chunks:
+            self.assertEqual(np.ptp(x.ravel()[chunk]), 4)
+            self.assertEqual(np.ptp(y.ravel()[chunk]), 4)
+        # sources overlapping the chunk extent, split by size
+        index = zonalstats._GridIndex(env)
+        tasks = zonalstats._split_chunk(chunks[0], env, index, np.ones(100),
+                                        np.ones(100), 100)
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(len(tasks[0][1]), 36)
+        tasks = zonalstats._split_chunk(chunks[0], env, index, np.ones(100),
+                                        np.ones(100), 40)
+        self.assertTrue(len(tasks) > 1)
+        for idx, cand in tasks:
+            self.assertTrue(len(idx) + len(cand) <= 40)
+        np.testing.assert_array_equal(
+            np.concatenate([t[0] for t in tasks]), chunks[0])
+
+    def test__GridIndex(self):
+        rng = np.random.RandomState(42)
+        ll = rng.uniform(0., 100., (1000, 2))
+        size = rng.uniform(0., 2., (1000, 2))
+        size[:5] *= 20.
+        env = np.stack([ll[:, 0], ll[:, 0] + size[:, 0],
+                        ll[:, 1], ll[:, 1] + size[:, 1]], axis=-1)
+        index = zonalstats._GridIndex(env)
+        for bbox in [(10., 12., 20., 21.), (-5., 0.5, 99., 120.),
+                     (0., 100., 0., 100.), (200., 300., 0., 1.)]:
+            ref = np.nonzero((env[:, 0] <= bbox[1]) & (env[:, 1] >= bbox[0]) &
+                             (env[:, 2] <= bbox[3]) &
+                             (env[:, 3] >= bbox[2]))[0]
+            np.testing.assert_array_equal(index.query(bbox), ref)
+        self.assertEqual(len(zonalstats._GridIndex(np.zeros((0, 4))).query(
+            (0., 1., 0., 1.))), 0)
+
     def test_angle_between(self):
         self.assertAlmostEqual(zonalstats.angle_between(355., 5.), 10.)
         self.assertAlmostEqual(zonalstats.angle_between(5., 355.), -10.)
@@ -542,6 +759,137 @@ class ZonalStatsUtilTest(unittest.TestCase):
         out = np.array([True, True, True, False, False])
         np.testing.assert_array_equal(mask, out)
 
+    def test_get_clip_mask_holes(self):
+        ext = np.array([[0., 0.], [4., 0.], [4., 4.], [0., 4.], [0., 0.]])
+        hole = np.array([[1., 1.], [1., 3.], [3., 3.], [3., 1.]])
+        other = np.array([[5., 0.], [6., 0.], [6., 1.], [5., 1.]])
+        coords = np.array([[[0.5, 0.5], [2., 2.], [1., 2.]],
+                           [[5.5, 0.5], [4., 2.], [4.5, 0.5]]])
+        mask = zonalstats.get_clip_mask(coords, [[ext, hole], other])
+        out = np.array([[True, False, True],
+                        [True, True, False]])
+        np.testing.assert_array_equal(mask, out)
+        mask = zonalstats.get_clip_mask(coords, ext)
+        np.testing.assert_array_equal(mask, [[True, True, True],
+                                             [False, True, False]])
+
+    def test_mask_from_bbox(self):
+        x, y = np.meshgrid(np.arange(10.), np.arange(20., 0., -2.))
+        bbox = dict(left=2.2, right=5.6, bottom=7.1, top=12.8)
+        self.assertEqual(zonalstats._regular_grid_spacing(x, y),
+                         (0., 1., 20., -2.))
+        self.assertIsNone(zonalstats._regular_grid_spacing(x, y + x))
+        mask, shape = zonalstats.mask_from_bbox(x, y, bbox)
+        self.assertEqual(shape, (4, 6))
+        np.testing.assert_array_equal(np.nonzero(mask.any(axis=1))[0],
+                                      np.arange(3, 7))
+        np.testing.assert_array_equal(np.nonzero(mask.any(axis=0))[0],
+                                      np.arange(1, 7))
+        # same result as with a KD-tree on the irregular (jittered) grid
+        mask2, shape2 = zonalstats.mask_from_bbox(x + 1e-3 * y, y, bbox)
+        np.testing.assert_array_equal(mask, mask2)
+        self.assertEqual(shape, shape2)
+        index, shape3 = zonalstats.mask_from_bbox(x, y, bbox, slices=True)
+        self.assertEqual(shape3, shape)
+        np.testing.assert_array_equal(x[index], x[mask].reshape(shape))
+        # bbox at the grid boundary
+        bbox = dict(left=-5., right=2., bottom=15.2, top=30.)
+        mask, shape = zonalstats.mask_from_bbox(x, y, bbox)
+        self.assertEqual(shape, (3, 3))
+        self.assertEqual(mask[:3, :3].sum(), 9)
+        self.assertEqual(mask.sum(), 9)
+
+    def test_mask_from_bbox_polar(self):
+        r = np.arange(50., 5000., 100.)
+        az = np.arange(0.5, 360., 1.)
+        site = (1000., 2000.)
+        x = site[0] + r * np.sin(np.radians(az))[:, np.newaxis]
+        y = site[1] + r * np.cos(np.radians(az))[:, np.newaxis]
+        # the first bbox crosses azimuth 0
+        for bbox, north in [(dict(left=600., right=1800., bottom=3000.,
+                                  top=4500.), True),
+                            (dict(left=1300., right=3100., bottom=500.,
+                                  top=2700.), False)]:
+            # analytic lookup gives the same result as the KD-tree
+            mask, shape = zonalstats.mask_from_bbox(x, y, bbox, polar=True)
+            mask2, shape2 = zonalstats.mask_from_bbox(x, y, bbox, polar=True,
+                                                      r=r, az=az, site=site)
+            np.testing.assert_array_equal(mask2, mask)
+            self.assertEqual(shape2, shape)
+            index, shape3 = zonalstats.mask_from_bbox(x, y, bbox, polar=True,
+                                                      slices=True, r=r,
+                                                      az=az, site=site)
+            self.assertEqual(shape3, shape)
+            self.assertEqual(x[index].shape, shape)
+            mask3 = np.zeros_like(mask)
+            mask3[index] = True
+            np.testing.assert_array_equal(mask3, mask)
+            # selected rows wrap around north
+            self.assertEqual(mask[0].any() and mask[-1].any(), north)
+            self.assertFalse(mask[180].any())
+        self.assertEqual(zonalstats._polar_grid_spacing(x, y, r, az, site),
+                         (50., 100., 0.5, 1.))
+        # sector scans, uneven ranges and elevated beams use the KD-tree
+        self.assertIsNone(zonalstats._polar_grid_spacing(
+            x[:180], y[:180], r, az[:180], site))
+        self.assertIsNone(zonalstats._polar_grid_spacing(
+            x, y, r ** 1.01, az, site))
+        gx = site[0] + (x - site[0]) * np.cos(np.radians(10.))
+        gy = site[1] + (y - site[1]) * np.cos(np.radians(10.))
+        self.assertIsNone(zonalstats._polar_grid_spacing(gx, gy, r, az,
+                                                         site))
+        bbox = dict(left=600., right=1800., bottom=3000., top=4500.)
+        for args in [(gx, gy, r, az), (x[:180], y[:180], r, az[:180])]:
+            mask, shape = zonalstats.mask_from_bbox(args[0], args[1], bbox,
+                                                    polar=True)
+            mask2, shape2 = zonalstats.mask_from_bbox(
+                args[0], args[1], bbox, polar=True, r=args[2], az=args[3],
+                site=site)
+            np.testing.assert_array_equal(mask2, mask)
+            self.assertEqual(shape2, shape)
+
+    def test_get_regular_grid_weights(self):
+        x = np.arange(5.)
+        y = np.arange(4., -1., -1.)
+        # square with square hole, clockwise exterior
+        exterior = np.array([[0.5, 0.5], [0.5, 3.5], [3.5, 3.5], [3.5, 0.5],
+                             [0.5, 0.5]])
+        hole = np.array([[1., 1.], [3., 1.], [3., 3.], [1., 3.], [1., 1.]])
+        ix, w = zonalstats.get_regular_grid_weights(
+            [exterior, [exterior, hole]], x, y)
+        self.assertEqual(len(ix), 2)
+        self.assertAlmostEqual(w[0].sum(), 9.)
+        self.assertAlmostEqual(w[1].sum(), 5.)
+        # rows run from top to bottom
+        np.testing.assert_array_equal(ix[0], [0, 1, 2, 3, 4, 5, 6, 7, 8, 9,
+                                              10, 11, 12, 13, 14, 15])
+        np.testing.assert_allclose(w[0][[0, 1, 5]], [0.25, 0.5, 1.])
+        np.testing.assert_array_equal(ix[1], [0, 1, 2, 3, 4, 7, 8, 11, 12,
+                                              13, 14, 15])
+        # result can be used for zonal statistics
+        obj = zonalstats.ZonalStatsPoly(ix=ix, w=w)
+        np.testing.assert_allclose(obj.mean(np.ones(16)), [1., 1.])
+
+    def test_get_polar_grid_weights(self):
+        r = np.arange(0., 11., 2.)
+        az = np.arange(0., 361., 30.)
+        center = (10., 20.)
+        cells = np.array([[0., 2.], [0., 4.], [30., 4.], [30., 2.]])
+        corners = np.column_stack(
+            (center[0] + cells[:, 1] * np.sin(np.radians(cells[:, 0])),
+             center[1] + cells[:, 1] * np.cos(np.radians(cells[:, 0]))))
+        # bin polygon and a square around the whole sweep
+        square = np.array([[-20., -20.], [20., -20.], [20., 20.],
+                           [-20., 20.]]) + center
+        ix, w = zonalstats.get_polar_grid_weights([corners, square], r, az,
+                                                  center=center)
+        np.testing.assert_array_equal(ix[0], [1])
+        area = 0.5 * (16. - 4.) * np.sin(np.radians(30.))
+        np.testing.assert_allclose(w[0], [area])
+        self.assertEqual(len(ix[1]), 60)
+        np.testing.assert_allclose(w[1].sum(),
+                                   0.5 * 100. * np.sin(np.radians(30.)) * 12)
+
 
 if __name__ == '__main__':
     unittest.main()
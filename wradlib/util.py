@@ -21,16 +21,27 @@ attributable to the other modules
    find_bbox_indices
    get_raster_origin
    calculate_polynomial
+   make_tree
+   query_tree
 """
 import datetime as dt
 from datetime import tzinfo, timedelta
 import os
+import struct
+import zipfile
 
 import numpy as np
+import scipy
 from scipy.ndimage import filters
+from scipy.spatial import cKDTree
 from osgeo import ogr
 from scipy.signal import medfilt
 
+# keyword for parallel KD-tree queries (``n_jobs`` before scipy 1.6)
+_TREE_WORKERS_KW = ('workers' if tuple(int(v) for v in
+                                       scipy.__version__.split('.')[:2]) >=
+                    (1, 6) else 'n_jobs')
+
 
 class OptionalModuleStub(object):
     """Stub class for optional imports.
@@ -162,18 +173,34 @@ def _idvalid(data, isinvalid=None, minval=None, maxval=None):
     data : :class:`numpy:numpy.ndarray` of floats
     isinvalid : list of what is considered an invalid value
 
+    """
+    return np.where(_validmask(data, isinvalid=isinvalid, minval=minval,
+                               maxval=maxval))[0]
+
+
+def _validmask(data, isinvalid=None, minval=None, maxval=None):
+    """Identifies valid entries in an array and returns a boolean array of
+    the same shape which is True for valid entries
+
+    See :func:`~wradlib.util._idvalid` for the definition of invalid values.
+
+    Parameters
+    ----------
+    data : :class:`numpy:numpy.ndarray` of floats
+    isinvalid : list of what is considered an invalid value
+
     """
     if isinvalid is None:
         isinvalid = [-99., 99, -9999., -9999]
-    ix = np.ma.masked_invalid(data).mask
+    ix = np.ma.getmaskarray(np.ma.masked_invalid(data))
     for el in isinvalid:
-        ix = np.logical_or(ix, np.ma.masked_where(data == el, data).mask)
+        ix = np.logical_or(ix, data == el)
     if minval is not None:
         ix = np.logical_or(ix, np.ma.masked_less(data, minval).mask)
     if maxval is not None:
         ix = np.logical_or(ix, np.ma.masked_greater(data, maxval).mask)
 
-    return np.where(np.logical_not(ix))[0]
+    return np.logical_not(ix)
 
 
 def meshgrid_n(*arrs):
@@ -686,6 +713,132 @@ def find_bbox_indices(coords, bbox):
     return bbind
 
 
+def _npz_memmap(filename, f, info, mmap_mode):
+    """Memory-map the array of the uncompressed npz member ``info``.
+
+    The data offset is taken from the local file header of the member
+    (which may hold zip64 or other extra fields). Returns None if the
+    member is compressed, encrypted or its layout can't be verified.
+    """
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    f.seek(info.header_offset)
+    header = f.read(30)
+    if len(header) != 30 or header[:4] != b'PK\x03\x04':
+        return None
+    namelen, extralen = struct.unpack('<HH', header[26:30])
+    start = info.header_offset + 30 + namelen + extralen
+    f.seek(start)
+    try:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+    except ValueError:
+        return None
+    offset = f.tell()
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    # the array has to fill the member exactly
+    if dtype.hasobject or not nbytes or \
+            offset - start + nbytes != info.file_size:
+        return None
+    return np.memmap(filename, dtype=dtype, mode=mmap_mode, shape=shape,
+                     order='F' if fortran else 'C', offset=offset)
+
+
+def _load_npz(filename, mmap_mode=None):
+    """Load all arrays of an npz file into a dictionary.
+
+    With ``mmap_mode``, arrays stored uncompressed (as written by
+    :func:`numpy:numpy.savez`) are memory-mapped directly from the zip
+    archive instead of being read into memory. All other arrays are read
+    as with :func:`numpy:numpy.load`.
+
+    Parameters
+    ----------
+    filename : string
+        path of the npz file
+    mmap_mode : {None, 'r', 'r+', 'c'}
+        see :func:`numpy:numpy.load`
+
+    Returns
+    -------
+    arrays : dict
+        arrays keyed by their names
+    """
+    arrays = {}
+    with zipfile.ZipFile(filename) as zf, open(filename, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') \
+                else info.filename
+            arr = None
+            if mmap_mode is not None:
+                arr = _npz_memmap(filename, f, info, mmap_mode)
+            if arr is None:
+                arr = np.lib.format.read_array(zf.open(info),
+                                               allow_pickle=False)
+            arrays[name] = arr
+    return arrays
+
+
+def make_tree(coords, leafsize=16):
+    """Build a KD-tree for neighbour searches.
+
+    This is the common entry point for all neighbour searches in wradlib.
+    The coordinates are converted to a contiguous float64 array before the
+    tree is planted.
+
+    Parameters
+    ----------
+    coords : :class:`numpy:numpy.ndarray`
+        array of floats of shape (num points, ndim)
+    leafsize : int
+        number of points at which the tree switches to brute force,
+        defaults to 16 like :class:`scipy:scipy.spatial.cKDTree`, which
+        keeps the order of equidistant neighbours unchanged
+
+    Returns
+    -------
+    tree : :class:`scipy:scipy.spatial.cKDTree`
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    if coords.ndim == 1:
+        coords = coords.reshape((-1, 1))
+    return cKDTree(coords, leafsize=leafsize)
+
+
+def query_tree(tree, coords, k=1, maxdist=None, workers=-1):
+    """Query a KD-tree for the ``k`` nearest neighbours of ``coords``.
+
+    Parameters
+    ----------
+    tree : :class:`scipy:scipy.spatial.cKDTree`
+        tree as returned by :func:`~wradlib.util.make_tree`
+    coords : :class:`numpy:numpy.ndarray`
+        array of floats of shape (..., ndim)
+    k : int
+        number of neighbours
+    maxdist : float
+        only neighbours within this distance are returned, missing
+        neighbours are flagged by an infinite distance and an index equal to
+        the number of points in the tree. Defaults to None (no limit).
+    workers : int
+        number of parallel worker threads, -1 (default) uses all cores
+
+    Returns
+    -------
+    dists, ix : :class:`numpy:numpy.ndarray`
+        distances and indices of the neighbours, see
+        :meth:`scipy:scipy.spatial.cKDTree.query`
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    kwargs = {_TREE_WORKERS_KW: workers}
+    if maxdist is not None:
+        kwargs['distance_upper_bound'] = maxdist
+    return tree.query(coords, k=k, **kwargs)
+
+
 def has_geos():
     pnt1 = ogr.CreateGeometryFromWkt('POINT(10 20)')
     pnt2 = ogr.CreateGeometryFromWkt('POINT(30 20)')
@@ -19,7 +19,6 @@ estimates to ground truth.
 """
 # site packages
 import numpy as np
-from scipy.spatial import KDTree
 from scipy import stats
 from pprint import pprint
 import warnings
@@ -61,6 +60,19 @@ class PolarNeighbours():
         corresponding to proj
     nnear : int
         number of neighbouring radar bins you would like to find
+    stencil : bool
+        if True, look up the neighbours analytically from the sweep geometry
+        (see :func:`wradlib.georef.polar_neighbours_stencil`) instead of
+        searching a KD-tree of all bin centroids, defaults to False
+
+    Note
+    ----
+    By default, the neighbours are selected by their distance in the map
+    projection `proj` and the attribute ``dist`` holds these distances in the
+    units of `proj`. With ``stencil=True``, neighbours are selected by their
+    distance in the radar centred azimuthal equidistant projection and
+    ``dist`` is given in metres. For strongly distorting or geographic map
+    projections, the selected bins may therefore differ.
 
     Examples
     --------
@@ -69,22 +81,46 @@ class PolarNeighbours():
 
     """
 
-    def __init__(self, r, az, sitecoords, proj, x, y, nnear=9):
+    def __init__(self, r, az, sitecoords, proj, x, y, nnear=9,
+                 stencil=False):
         self.nnear = nnear
         self.az = az
         self.r = r
         self.x = x
         self.y = y
-        # compute the centroid coordinates in proj
-        bin_coords = georef.spherical_to_centroids(r, az, 0,
-                                                   sitecoords,
-                                                   proj=proj)
-        self.binx = bin_coords[..., 0].ravel()
-        self.biny = bin_coords[..., 1].ravel()
-        # compute the KDTree
-        tree = KDTree(list(zip(self.binx, self.biny)))
-        # query the tree for nearest neighbours
-        self.dist, self.ix = tree.query(list(zip(x, y)), k=nnear)
+        self.sitecoords = sitecoords
+        self.proj = proj
+        self._bincoords = None
+        if stencil:
+            # look up the neighbouring bins directly from the sweep geometry
+            self.dist, self.ix = georef.polar_neighbours_stencil(
+                np.ravel(x), np.ravel(y), r, az, sitecoords, k=nnear,
+                proj=proj)
+        else:
+            # compute the KDTree
+            tree = util.make_tree(np.column_stack((self.binx, self.biny)))
+            # query the tree for nearest neighbours
+            self.dist, self.ix = util.query_tree(
+                tree, np.column_stack((np.ravel(x), np.ravel(y))), k=nnear)
+
+    @property
+    def binx(self):
+        return self._get_bincoords()[0]
+
+    @property
+    def biny(self):
+        return self._get_bincoords()[1]
+
+    def _get_bincoords(self):
+        # the centroid coordinates in proj are only computed on demand for
+        # the stencil lookup
+        if self._bincoords is None:
+            bin_coords = georef.spherical_to_centroids(self.r, self.az, 0,
+                                                       self.sitecoords,
+                                                       proj=self.proj)
+            self._bincoords = (bin_coords[..., 0].ravel(),
+                               bin_coords[..., 1].ravel())
+        return self._bincoords
 
     def extract(self, vals):
         """Extracts the values from an array of shape (azimuth angles, \
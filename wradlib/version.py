@@ -0,0 +1,4 @@
+git_revision = 'unknown'
+version = '1.0.0'
+full_version = '1.0.0'
+release = False
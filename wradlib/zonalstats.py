@@ -46,6 +46,8 @@ Calling the objects with actual data, however, will be very fast.
    ZonalStatsBase
    ZonalStatsPoly
    ZonalStatsPoint
+   get_regular_grid_weights
+   get_polar_grid_weights
    mask_from_bbox
    get_bbox
    grid_centers_to_vertices
@@ -54,19 +56,29 @@ Calling the objects with actual data, however, will be very fast.
 """
 
 import numpy as np
-from scipy.spatial import cKDTree
+from scipy import sparse
 from matplotlib.path import Path
 import matplotlib.patches as patches
 from osgeo import gdal, ogr
 import warnings
+import multiprocessing
+import hashlib
 
 from .io import open_vector, gdal_create_dataset, write_raster_dataset
-from .georef import (numpy_to_ogr, ogr_add_feature, ogr_copy_layer,
-                     ogr_create_layer, ogr_to_numpy, ogr_copy_layer_by_name)
+from .georef import (numpy_to_ogr, ogr_add_feature, ogr_add_geometry,
+                     ogr_copy_layer, ogr_create_layer, ogr_to_numpy,
+                     ogr_copy_layer_by_name)
+from .util import make_tree, query_tree, _load_npz
 
 ogr.UseExceptions()
 gdal.UseExceptions()
 
+_INTERSECTION_OPTIONS = ['SKIP_FAILURES=YES',
+                         'INPUT_PREFIX=trg_',
+                         'METHOD_PREFIX=src_',
+                         'PROMOTE_TO_MULTI=YES',
+                         'PRETEST_CONTAINMENT=YES']
+
 
 class DataSource(object):
     """ DataSource class for handling ogr/gdal vector data
@@ -82,6 +94,15 @@ class DataSource(object):
     srs : object
         ogr.SpatialReferenceSystem SRS describing projection of given data
 
+    Keyword Arguments
+    -----------------
+    name : string
+        layer name, defaults to 'layer'
+    index : bool
+        if True, geometry and attribute queries are pre-selected with numpy
+        indices (a grid bucket index over the feature envelopes and sorted
+        attribute values), which are built on first use
+
     Warning
     -------
     Writing shapefiles with the wrong locale settings can have impact on the
@@ -96,6 +117,9 @@ class DataSource(object):
     def __init__(self, data=None, srs=None, **kwargs):
         self._srs = srs
         self._name = kwargs.get('name', 'layer')
+        self.use_index = kwargs.get('index', False)
+        self._index = None
+        self._attr_index = {}
         if data is not None:
             self._ds = self._check_src(data)
 
@@ -108,6 +132,59 @@ class DataSource(object):
     @ds.setter
     def ds(self, value):
         self._ds = value
+        self._index = None
+        self._attr_index = {}
+
+    @property
+    def index(self):
+        """ Returns grid bucket index over the feature envelopes
+
+        The index is built on first access.
+        """
+        if self._index is None:
+            lyr = self.ds.GetLayer()
+            lyr.ResetReading()
+            lyr.SetSpatialFilter(None)
+            lyr.SetAttributeFilter(None)
+            fids = []
+            env = []
+            for feature in lyr:
+                fids.append(feature.GetFID())
+                env.append(feature.GetGeometryRef().GetEnvelope())
+            self._index = (np.array(fids, dtype=np.intp), _GridIndex(env))
+        return self._index[1]
+
+    def _get_fids_by_geom(self, geom):
+        """ Returns FIDs of features whose envelope overlaps geom
+        """
+        index = self.index
+        return self._index[0][index.query(geom.GetEnvelope())]
+
+    def _get_fids_by_att(self, attr, value):
+        """ Returns FIDs of features with attribute attr equal to value
+        """
+        if attr not in self._attr_index:
+            lyr = self.ds.GetLayer()
+            lyr.ResetReading()
+            lyr.SetSpatialFilter(None)
+            lyr.SetAttributeFilter(None)
+            fids = []
+            values = []
+            for feature in lyr:
+                fids.append(feature.GetFID())
+                values.append(feature.GetField(attr))
+            values = np.array(values)
+            order = np.argsort(values, kind='mergesort')
+            self._attr_index[attr] = (values[order],
+                                      np.array(fids, dtype=np.intp)[order])
+        values, fids = self._attr_index[attr]
+        # keep the type of value, casting it to the field type would
+        # truncate e.g. longer strings or fractional numbers
+        value = np.asarray(value)
+        lo = np.searchsorted(values, value, side='left')
+        hi = np.searchsorted(values, value, side='right')
+        match = values[lo:hi] == value
+        return np.sort(fids[lo:hi][match])
 
     @property
     def data(self):
@@ -148,7 +225,7 @@ class DataSource(object):
         lyr.SetAttributeFilter(None)
         sources = []
         for i in idx:
-            feature = lyr.GetFeature(i)
+            feature = lyr.GetFeature(int(i))
             geom = feature.GetGeometryRef()
             poly = ogr_to_numpy(geom)
             sources.append(poly)
@@ -164,6 +241,8 @@ class DataSource(object):
         value : string
             attribute value
         """
+        if self.use_index:
+            return self.get_data_by_idx(self._get_fids_by_att(attr, value))
         lyr = self.ds.GetLayer()
         lyr.ResetReading()
         lyr.SetSpatialFilter(None)
@@ -180,8 +259,18 @@ class DataSource(object):
         lyr = self.ds.GetLayer()
         lyr.ResetReading()
         lyr.SetAttributeFilter(None)
-        lyr.SetSpatialFilter(geom)
-        return self._get_data()
+        if not self.use_index or geom is None:
+            lyr.SetSpatialFilter(geom)
+            return self._get_data()
+        # exact test only for the candidates from the index
+        lyr.SetSpatialFilter(None)
+        sources = []
+        for fid in self._get_fids_by_geom(geom):
+            feature = lyr.GetFeature(int(fid))
+            other = feature.GetGeometryRef()
+            if other.Intersects(geom):
+                sources.append(ogr_to_numpy(other))
+        return np.array(sources)
 
     def _check_src(self, src):
         """Basic check of source elements (sequence of points or polygons).
@@ -297,12 +386,16 @@ class DataSource(object):
     def set_attribute(self, name, values):
         """Add/Set given Attribute with given values
 
+        Several attributes are written in one pass over the features if a
+        sequence of names is given.
+
         Parameters
         ----------
-        name : string
-            Attribute Name
+        name : string | sequence of strings
+            Attribute Name(s)
         values : :class:`numpy:numpy.ndarray`
-            Values to fill in attributes
+            Values to fill in attributes, of shape (num features,) or
+            (num features, num names)
         """
 
         lyr = self.ds.GetLayerByIndex(0)
@@ -310,11 +403,19 @@ class DataSource(object):
         # todo: automatically check for value type
         defn = lyr.GetLayerDefn()
 
-        if defn.GetFieldIndex(name) == -1:
-            lyr.CreateField(ogr.FieldDefn(name, ogr.OFTReal))
+        names = [name] if np.isscalar(name) else list(name)
+        values = np.asarray(values).reshape(len(values), len(names))
+        for nm in names:
+            self._attr_index.pop(nm, None)
+
+        for nm in names:
+            if defn.GetFieldIndex(nm) == -1:
+                lyr.CreateField(ogr.FieldDefn(nm, ogr.OFTReal))
+        fields = [defn.GetFieldIndex(nm) for nm in names]
 
         for i, item in enumerate(lyr):
-            item.SetField(name, values[i])
+            for field, value in zip(fields, values[i]):
+                item.SetField(field, float(value))
             lyr.SetFeature(item)
 
     def get_attributes(self, attrs, filt=None):
@@ -401,15 +502,40 @@ class ZonalDataBase(object):
         will be used for DataSource object.
         src and trg data have to be in the same srs-format
 
+    processes : int
+        If given, the targets are split into spatially coherent chunks,
+        which are intersected with the overlapping sources only, using a
+        pool of ``processes`` worker processes (1 runs the chunks in the
+        calling process). Only the index fields are kept on the
+        destination layer. Defaults to None, one OGR Intersection over all
+        targets.
+
+    chunksize : int
+        maximum number of targets per chunk, defaults to 500
+
+    maxbytes : int
+        memory bound for the (WKB) geometries handed to one worker at a time,
+        larger chunks are split, defaults to 64 MiB
+
+    callback : callable
+        progress callback with the signature of GDAL progress functions
+        (e.g. gdal.TermProgress), called with the fraction of finished
+        chunks
+
     Examples
     --------
     See \
     :ref:`/notebooks/zonalstats/wradlib_zonalstats_classes.ipynb#ZonalData`.
 
     """
-    def __init__(self, src, trg=None, buf=0., srs=None, **kwargs):
+    def __init__(self, src, trg=None, buf=0., srs=None, processes=None,
+                 chunksize=500, maxbytes=2 ** 26, callback=None, **kwargs):
         self._buffer = buf
         self._srs = srs
+        self._processes = processes
+        self._chunksize = chunksize
+        self._maxbytes = maxbytes
+        self._callback = callback
         if trg is None:
             self.load_vector(src)
         else:
@@ -417,6 +543,8 @@ class ZonalDataBase(object):
             self.trg = DataSource(trg, name='trg', srs=srs, **kwargs)
             self.dst = DataSource(name='dst')
             self.dst.ds = self._create_dst_datasource()
+        for ds in [self.src, self.trg, self.dst]:
+            ds.use_index = kwargs.get('index', False)
         self._count_intersections = self.dst.ds.GetLayer().GetFeatureCount()
 
     @property
@@ -431,6 +559,21 @@ class ZonalDataBase(object):
         """
         return self._srs
 
+    @property
+    def fingerprint(self):
+        """Returns a hexadecimal digest of the source and target geometries
+        and the buffer
+        """
+        sha = hashlib.sha1()
+        for lyr in [self.src.ds.GetLayerByName('src'),
+                    self.trg.ds.GetLayer()]:
+            wkb = _layer_to_wkb(lyr)[0]
+            sha.update(repr(len(wkb)).encode())
+            for item in wkb:
+                sha.update(item)
+        sha.update(repr(float(self._buffer)).encode())
+        return sha.hexdigest()
+
     @property
     def isecs(self):
         """Returns intersections
@@ -486,6 +629,9 @@ class ZonalDataBase(object):
         ds_mem : object
             gdal.Dataset object
         """
+        if self._processes is not None:
+            return self._create_dst_datasource_chunked()
+
         # create intermediate mem dataset
         ds_mem = gdal_create_dataset('Memory', 'dst',
                                      gdal_type=gdal.OF_VECTOR)
@@ -516,21 +662,80 @@ class ZonalDataBase(object):
 
         try:
             tmp_trg_lyr.Intersection(src_lyr, self.tmp_lyr,
-                                     options=['SKIP_FAILURES=YES',
-                                              'INPUT_PREFIX=trg_',
-                                              'METHOD_PREFIX=src_',
-                                              'PROMOTE_TO_MULTI=YES',
-                                              'PRETEST_CONTAINMENT=YES'],
+                                     options=_INTERSECTION_OPTIONS,
                                      callback=gdal.TermProgress)
         except RuntimeError:
             # Catch RuntimeError that was reported on gdal 1.11.1
             # on Windows systems
             tmp_trg_lyr.Intersection(src_lyr, self.tmp_lyr,
-                                     options=['SKIP_FAILURES=YES',
-                                              'INPUT_PREFIX=trg_',
-                                              'METHOD_PREFIX=src_',
-                                              'PROMOTE_TO_MULTI=YES',
-                                              'PRETEST_CONTAINMENT=YES'])
+                                     options=_INTERSECTION_OPTIONS)
+
+        return ds_mem
+
+    def _create_dst_datasource_chunked(self):
+        """Create destination target gdal.Dataset chunk by chunk
+
+        The targets are partitioned into spatially coherent chunks, each chunk
+        is intersected with the sources overlapping its extent in a pool of
+        worker processes. The intersections are merged in target order.
+
+        Returns
+        -------
+        ds_mem : object
+            gdal.Dataset object
+        """
+        src_lyr = self.src.ds.GetLayerByName('src')
+        geom_type = src_lyr.GetGeomType()
+        src_wkb, src_env = _layer_to_wkb(src_lyr)
+        trg_wkb, trg_env = _layer_to_wkb(self.trg.ds.GetLayer())
+        trg_env = trg_env + np.array([-1., 1., -1., 1.]) * self._buffer
+
+        src_index = _GridIndex(src_env)
+        tasks = []
+        for chunk in _spatial_chunks(trg_env, self._chunksize):
+            for idx, cand in _split_chunk(chunk, trg_env, src_index,
+                                          [len(w) for w in trg_wkb],
+                                          [len(w) for w in src_wkb],
+                                          self._maxbytes):
+                tasks.append((idx, [trg_wkb[i] for i in idx],
+                              cand, [src_wkb[i] for i in cand],
+                              self._buffer, geom_type))
+
+        if self._processes == 1:
+            pool = None
+            results = map(_intersect_chunk, tasks)
+        else:
+            pool = multiprocessing.Pool(self._processes)
+            results = pool.imap(_intersect_chunk, tasks)
+
+        trg_index, src_index, wkb = [], [], []
+        try:
+            for i, (trg_ix, src_ix, isec) in enumerate(results):
+                trg_index.append(trg_ix)
+                src_index.append(src_ix)
+                wkb.extend(isec)
+                if self._callback is not None:
+                    self._callback(float(i + 1) / len(tasks), '', None)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        ds_mem = gdal_create_dataset('Memory', 'dst',
+                                     gdal_type=gdal.OF_VECTOR)
+        fields = [('trg_index', ogr.OFTInteger),
+                  ('src_index', ogr.OFTInteger)]
+        self.tmp_lyr = ogr_create_layer(ds_mem, 'dst', srs=self._srs,
+                                        geom_type=geom_type, fields=fields)
+        if not wkb:
+            return ds_mem
+
+        trg_index = np.concatenate(trg_index)
+        src_index = np.concatenate(src_index)
+        # stable sort keeps the intersection order within each target
+        for i in np.argsort(trg_index, kind='mergesort'):
+            ogr_add_geometry(self.tmp_lyr, ogr.CreateGeometryFromWkb(wkb[i]),
+                             [int(trg_index[i]), int(src_index[i])])
 
         return ds_mem
 
@@ -552,6 +757,34 @@ class ZonalDataBase(object):
         self.trg.dump_vector(filename, driver, remove=False)
         self.dst.dump_vector(filename, driver, remove=False)
 
+    def dump_weights(self, filename, ids=None, geometries=False):
+        """Save the zonal index and weights to an uncompressed npz file
+
+        Only the weights in compressed sparse row format, the target ids and
+        the :attr:`fingerprint` of the geometries are stored, the file can
+        be loaded with :meth:`ZonalStatsBase.load_weights`.
+
+        Parameters
+        ----------
+        filename : string
+            path of the output file
+        ids : sequence
+            target ids, defaults to the target indices
+        geometries : bool
+            if True, also store the intersection geometries as WKB
+            (arrays ``isec_wkb`` and ``isec_offsets``)
+        """
+        indptr, indices, weights = self._get_csr_idx_weights()
+        isecs = None
+        if geometries:
+            lyr = self.dst.ds.GetLayer()
+            wkb = _layer_to_wkb(lyr)[0]
+            trg_index = np.array([feat.GetField('trg_index')
+                                  for feat in lyr], dtype=np.intp)
+            isecs = [wkb[i] for i in np.argsort(trg_index, kind='mergesort')]
+        _save_weights(filename, indptr, indices, weights, ids=ids,
+                      fingerprint=self.fingerprint, isecs=isecs)
+
     def load_vector(self, filename):
         """Load source/target grid points/polygons into in-memory Shapefile
 
@@ -590,9 +823,67 @@ class ZonalDataBase(object):
 
     def _get_idx_weights(self):
         """Retrieve index and weight from dst DataSource
+
+        Returns
+        -------
+        ret : tuple
+            (index, weight) lists with one array per target
+        """
+        indptr, indices, weights = self._get_csr_idx_weights()
+        return (np.split(indices, indptr[1:-1]),
+                np.split(weights, indptr[1:-1]))
+
+    def _get_csr_idx_weights(self):
+        """Retrieve index and weight from dst DataSource in compressed sparse
+        row format
+
+        Returns
+        -------
+        ret : tuple
+            (indptr, indices, weights) arrays, the source indices and weights
+            of target ``i`` are ``indices[indptr[i]:indptr[i + 1]]`` and
+            ``weights[indptr[i]:indptr[i + 1]]``
         """
         raise NotImplementedError
 
+    def _get_dst_columns(self, area=False):
+        """Read target and source indices (and areas) of all intersections
+        from the dst DataSource in one sequential pass
+
+        Parameters
+        ----------
+        area : bool
+            if True, also retrieve the areas of the intersection geometries
+
+        Returns
+        -------
+        indptr, indices, areas : tuple
+            CSR offsets per target and source indices (and areas) of the
+            intersections sorted by target index, areas is None if not
+            requested
+        """
+        lyr = self.dst.ds.GetLayer()
+        lyr.ResetReading()
+        lyr.SetSpatialFilter(None)
+        lyr.SetAttributeFilter(None)
+        cnt = lyr.GetFeatureCount()
+        trg_index = np.empty(cnt, dtype=np.intp)
+        src_index = np.empty(cnt, dtype=np.intp)
+        areas = np.empty(cnt) if area else None
+        for i, feat in enumerate(lyr):
+            trg_index[i] = feat.GetField('trg_index')
+            src_index[i] = feat.GetField('src_index')
+            if area:
+                areas[i] = feat.GetGeometryRef().Area()
+        # stable sort keeps the layer order within each target
+        order = np.argsort(trg_index, kind='mergesort')
+        ntrg = self.trg.ds.GetLayer().GetFeatureCount()
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(trg_index,
+                                                            minlength=ntrg))))
+        if area:
+            areas = areas[order]
+        return indptr, src_index[order], areas
+
     def _get_intersection(self, trg=None, idx=None, buf=0.):
         """Just a toy function if you want to inspect the intersection
         points/polygons of an arbitrary target or an target by index.
@@ -659,28 +950,18 @@ class ZonalDataPoly(ZonalDataBase):
     See \
     :ref:`/notebooks/zonalstats/wradlib_zonalstats_classes.ipynb#ZonalData`.
     """
-    def _get_idx_weights(self):
-        """Retrieve index and weight from dst DataSource
+    def _get_csr_idx_weights(self):
+        """Retrieve index and weight from dst DataSource in compressed sparse
+        row format
 
-        Iterates over all trg DataSource Polygons
+        The weights are the areas of the intersections.
 
         Returns
         -------
         ret : tuple
-            (index, weight) arrays
-       """
-        trg = self.trg.ds.GetLayer()
-        cnt = trg.GetFeatureCount()
-        ret = [[] for _ in range(2)]
-        for index in range(cnt):
-            arr = self.dst.get_attributes(['src_index'],
-                                          filt=('trg_index', index))
-            w = self.dst.get_geom_properties(['Area'],
-                                             filt=('trg_index', index))
-            arr.append(w[0])
-            for i, l in enumerate(arr):
-                ret[i].append(np.array(l))
-        return tuple(ret)
+            (indptr, indices, weights) arrays
+        """
+        return self._get_dst_columns(area=True)
 
 
 class ZonalDataPoint(ZonalDataBase):
@@ -710,26 +991,318 @@ class ZonalDataPoint(ZonalDataBase):
     See \
     :ref:`/notebooks/zonalstats/wradlib_zonalstats_classes.ipynb#ZonalData`.
     """
-    def _get_idx_weights(self):
-        """Retrieve index and weight from dst DataSource
+    def _get_csr_idx_weights(self):
+        """Retrieve index and weight from dst DataSource in compressed sparse
+        row format
 
-        Iterates over all trg DataSource Polygons
+        All points within a target get the same weight.
 
         Returns
         -------
         ret : tuple
-            (index, weight) arrays
+            (indptr, indices, weights) arrays
+        """
+        indptr, indices, _ = self._get_dst_columns()
+        counts = np.diff(indptr)
+        weights = np.repeat(1. / np.maximum(counts, 1), counts)
+        return indptr, indices, weights
+
+
+def _layer_to_wkb(lyr):
+    """Returns the geometries of all features of an OGR.Layer as WKB and
+    their envelopes
+
+    Parameters
+    ----------
+    lyr : OGR.Layer
+        object
+
+    Returns
+    -------
+    wkb : list
+        WKB (bytes) of the geometries
+    env : :class:`numpy:numpy.ndarray`
+        array of shape (num features, 4) holding xmin, xmax, ymin, ymax
+    """
+    lyr.ResetReading()
+    lyr.SetSpatialFilter(None)
+    lyr.SetAttributeFilter(None)
+    wkb = []
+    env = []
+    for feat in lyr:
+        geom = feat.GetGeometryRef()
+        wkb.append(bytes(geom.ExportToWkb()))
+        env.append(geom.GetEnvelope())
+    return wkb, np.array(env, dtype=np.float64).reshape(-1, 4)
+
+
+class _GridIndex(object):
+    """Uniform grid bucket index over bounding boxes
+
+    Every bounding box is registered in all grid cells it overlaps, the
+    cell contents are held in compressed sparse row format.
+
+    Parameters
+    ----------
+    env : :class:`numpy:numpy.ndarray`
+        bounding boxes of shape (num items, 4) holding xmin, xmax, ymin, ymax
+    nitems : int
+        targeted mean number of items per cell
+    """
+    def __init__(self, env, nitems=4):
+        self.env = np.asarray(env, dtype=np.float64).reshape(-1, 4)
+        num = len(self.env)
+        if num:
+            xmin, xmax = self.env[:, 0].min(), self.env[:, 1].max()
+            ymin, ymax = self.env[:, 2].min(), self.env[:, 3].max()
+        else:
+            xmin = xmax = ymin = ymax = 0.
+        # cells of the typical item size, but not (much) more cells than
+        # num / nitems
+        size = max(np.median(self.env[:, 1] - self.env[:, 0]) if num else 0,
+                   np.median(self.env[:, 3] - self.env[:, 2]) if num else 0,
+                   np.sqrt((xmax - xmin) * (ymax - ymin) * nitems /
+                           max(num, 1)))
+        if not size > 0:
+            size = max(xmax - xmin, ymax - ymin, 1.)
+        self.origin = (xmin, ymin)
+        self.size = size
+        self.shape = (int((ymax - ymin) // size) + 1,
+                      int((xmax - xmin) // size) + 1)
+
+        ix0, ix1, iy0, iy1 = self._cells(self.env)
+        width = ix1 - ix0 + 1
+        counts = width * (iy1 - iy0 + 1)
+        item = np.repeat(np.arange(num), counts)
+        # position within the block of cells of each item
+        pos = (np.arange(counts.sum()) -
+               np.repeat(np.cumsum(counts) - counts, counts))
+        width = np.repeat(width, counts)
+        cell = ((np.repeat(iy0, counts) + pos // width) * self.shape[1] +
+                np.repeat(ix0, counts) + pos % width)
+        self.items = item[np.argsort(cell, kind='mergesort')]
+        self.indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(cell, minlength=self.shape[0] *
+                                        self.shape[1]))))
+
+    def _cells(self, env):
+        """Returns the (clipped) cell ranges ix0, ix1, iy0, iy1 of bounding
+        boxes
+        """
+        ny, nx = self.shape
+        ix = np.floor((env[:, :2] - self.origin[0]) / self.size)
+        iy = np.floor((env[:, 2:] - self.origin[1]) / self.size)
+        ix = np.clip(ix, 0, nx - 1).astype(np.intp)
+        iy = np.clip(iy, 0, ny - 1).astype(np.intp)
+        return ix[:, 0], ix[:, 1], iy[:, 0], iy[:, 1]
+
+    def query(self, bbox):
+        """Returns the sorted indices of the items overlapping bbox
+
+        Parameters
+        ----------
+        bbox : tuple
+            xmin, xmax, ymin, ymax
+
+        Returns
+        -------
+        index : :class:`numpy:numpy.ndarray`
         """
-        trg = self.trg.ds.GetLayer()
-        cnt = trg.GetFeatureCount()
-        ret = [[] for _ in range(2)]
-        for index in range(cnt):
-            arr = self.dst.get_attributes(['src_index'],
-                                          filt=('trg_index', index))
-            arr.append([1. / len(arr[0])] * len(arr[0]))
-            for i, l in enumerate(arr):
-                ret[i].append(np.array(l))
-        return tuple(ret)
+        bbox = np.asarray(bbox, dtype=np.float64).reshape(1, 4)
+        if not len(self.env):
+            return np.zeros(0, dtype=np.intp)
+        ix0, ix1, iy0, iy1 = [int(i[0]) for i in self._cells(bbox)]
+        nx = self.shape[1]
+        # the cells of one row of the query are contiguous
+        cand = np.unique(np.concatenate(
+            [self.items[self.indptr[iy * nx + ix0]:
+                        self.indptr[iy * nx + ix1 + 1]]
+             for iy in range(iy0, iy1 + 1)]))
+        env = self.env[cand]
+        bbox = bbox[0]
+        return cand[(env[:, 0] <= bbox[1]) & (env[:, 1] >= bbox[0]) &
+                    (env[:, 2] <= bbox[3]) & (env[:, 3] >= bbox[2])]
+
+
+def _part1by1(n):
+    """Spreads the lower 16 bits of n to the even bits
+    """
+    n = n.astype(np.uint32) & 0x0000ffff
+    n = (n | (n << 8)) & 0x00ff00ff
+    n = (n | (n << 4)) & 0x0f0f0f0f
+    n = (n | (n << 2)) & 0x33333333
+    n = (n | (n << 1)) & 0x55555555
+    return n
+
+
+def _spatial_chunks(env, chunksize):
+    """Partitions geometries into spatially coherent chunks
+
+    The geometries are ordered along a Z-order (Morton) curve of their
+    envelope centers and split into consecutive chunks.
+
+    Parameters
+    ----------
+    env : :class:`numpy:numpy.ndarray`
+        array of shape (num geometries, 4) holding xmin, xmax, ymin, ymax
+    chunksize : int
+        maximum number of geometries per chunk
+
+    Returns
+    -------
+    chunks : list
+        list of index arrays
+    """
+    if not len(env):
+        return []
+    center = np.stack([env[:, 0] + env[:, 1], env[:, 2] + env[:, 3]]) / 2.
+    lo = center.min(axis=1, keepdims=True)
+    extent = center.max(axis=1, keepdims=True) - lo
+    scaled = (center - lo) / np.where(extent > 0, extent, 1.) * 65535
+    code = _part1by1(scaled[0]) | (_part1by1(scaled[1]) << 1)
+    order = np.argsort(code, kind='mergesort')
+    return np.array_split(order, np.arange(chunksize, len(order), chunksize))
+
+
+def _split_chunk(idx, trg_env, src_index, trg_size, src_size, maxbytes):
+    """Finds the sources overlapping a chunk of targets and halves the
+    chunk until the geometries fit into maxbytes
+
+    Parameters
+    ----------
+    idx : :class:`numpy:numpy.ndarray`
+        target indices of the chunk
+    trg_env : :class:`numpy:numpy.ndarray`
+        target envelopes of shape (num targets, 4)
+    src_index : :class:`_GridIndex`
+        index over the source envelopes
+    trg_size, src_size : sequence
+        (WKB) sizes of the targets and sources
+    maxbytes : int
+        memory bound
+
+    Returns
+    -------
+    tasks : list
+        list of (target index, source index) tuples
+    """
+    env = trg_env[idx]
+    cand = src_index.query((env[:, 0].min(), env[:, 1].max(),
+                            env[:, 2].min(), env[:, 3].max()))
+    size = (np.sum(np.take(trg_size, idx)) +
+            np.sum(np.take(src_size, cand)))
+    if size > maxbytes and len(idx) > 1:
+        half = len(idx) // 2
+        return (_split_chunk(idx[:half], trg_env, src_index, trg_size,
+                             src_size, maxbytes) +
+                _split_chunk(idx[half:], trg_env, src_index, trg_size,
+                             src_size, maxbytes))
+    return [(idx, cand)]
+
+
+def _intersect_chunk(task):
+    """Intersects a chunk of targets with the given sources (worker function)
+
+    Parameters
+    ----------
+    task : tuple
+        (target index, target WKB, source index, source WKB, buffer,
+        geometry type)
+
+    Returns
+    -------
+    trg_index, src_index, wkb : tuple
+        target and source index and WKB of the intersections
+    """
+    trg_index, trg_wkb, src_index, src_wkb, buf, geom_type = task
+    ds = gdal_create_dataset('Memory', 'chunk', gdal_type=gdal.OF_VECTOR)
+    fields = [('index', ogr.OFTInteger)]
+    trg_lyr = ogr_create_layer(ds, 'trg', geom_type=ogr.wkbUnknown,
+                               fields=fields)
+    for i, wkb in zip(trg_index, trg_wkb):
+        geom = ogr.CreateGeometryFromWkb(wkb).Buffer(buf)
+        ogr_add_geometry(trg_lyr, geom, [int(i)])
+    src_lyr = ogr_create_layer(ds, 'src', geom_type=ogr.wkbUnknown,
+                               fields=fields)
+    for i, wkb in zip(src_index, src_wkb):
+        ogr_add_geometry(src_lyr, ogr.CreateGeometryFromWkb(wkb), [int(i)])
+
+    dst_lyr = ogr_create_layer(ds, 'dst', geom_type=geom_type)
+    trg_lyr.Intersection(src_lyr, dst_lyr, options=_INTERSECTION_OPTIONS)
+
+    dst_lyr.ResetReading()
+    trg_ix, src_ix, wkb = [], [], []
+    for feat in dst_lyr:
+        trg_ix.append(feat.GetField('trg_index'))
+        src_ix.append(feat.GetField('src_index'))
+        wkb.append(bytes(feat.GetGeometryRef().ExportToWkb()))
+    return (np.array(trg_ix, dtype=np.intp), np.array(src_ix, dtype=np.intp),
+            wkb)
+
+
+def _save_weights(filename, indptr, indices, weights, ids=None,
+                  fingerprint=None, isecs=None):
+    """Save zonal weights in compressed sparse row format to an
+    uncompressed npz file
+
+    Parameters
+    ----------
+    filename : string
+        path of the output file
+    indptr, indices, weights : :class:`numpy:numpy.ndarray`
+        zonal weights in compressed sparse row format
+    ids : sequence
+        target ids, defaults to the target indices
+    fingerprint : string
+        digest of the source and target geometries
+    isecs : list
+        WKB of the intersection geometries in CSR order
+    """
+    ntrg = len(indptr) - 1
+    arrays = dict(indptr=np.asarray(indptr, dtype=np.int64),
+                  indices=np.asarray(indices, dtype=np.int64),
+                  weights=np.asarray(weights, dtype=np.float64),
+                  ids=np.arange(ntrg) if ids is None else np.asarray(ids),
+                  fingerprint=np.array(fingerprint or ''))
+    if len(arrays['ids']) != ntrg:
+        raise ValueError('ids must be of length %d' % ntrg)
+    if isecs is not None:
+        arrays['isec_offsets'] = np.concatenate(
+            ([0], np.cumsum([len(item) for item in isecs]))).astype(np.int64)
+        arrays['isec_wkb'] = np.frombuffer(b''.join(isecs), dtype=np.uint8)
+    with open(filename, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _segment_reduce(ufunc, data, indptr, empty=np.nan):
+    """Reduce data along its first axis over the segments of a compressed
+    sparse row layout
+
+    Parameters
+    ----------
+    ufunc : :class:`numpy:numpy.ufunc`
+        binary ufunc, e.g. np.add or np.fmin
+    data : :class:`numpy:numpy.ndarray`
+        array of shape (nnz, ...) in CSR order
+    indptr : :class:`numpy:numpy.ndarray`
+        CSR offsets, segment ``i`` is ``data[indptr[i]:indptr[i + 1]]``
+    empty : scalar
+        value for empty segments
+
+    Returns
+    -------
+    out : :class:`numpy:numpy.ndarray`
+        array of shape (len(indptr) - 1, ...)
+    """
+    start = indptr[:-1]
+    nonempty = start < indptr[1:]
+    out = np.empty((len(start),) + data.shape[1:],
+                   dtype=np.result_type(data, np.asarray(empty)))
+    out[~nonempty] = empty
+    if nonempty.any():
+        # the starts of the non-empty segments delimit them completely
+        out[nonempty] = ufunc.reduceat(data, start[nonempty], axis=0)
+    return out
 
 
 class ZonalStatsBase(object):
@@ -758,6 +1331,10 @@ class ZonalStatsBase(object):
 
         self._ix = None
         self._w = None
+        self._csr = None
+        self._weights = None
+        self.ids = None
+        self.fingerprint = None
 
         if src is not None:
             if isinstance(src, ZonalDataBase):
@@ -767,7 +1344,11 @@ class ZonalStatsBase(object):
                 self._zdata = src
             else:
                 raise TypeError('Parameter mismatch in calling ZonalDataBase')
-            self.ix, self.w = self._check_ix_w(*self.zdata._get_idx_weights())
+            indptr, indices, weights = self.zdata._get_csr_idx_weights()
+            self.ix, self.w = self._check_ix_w(
+                np.split(indices, indptr[1:-1]),
+                np.split(weights, indptr[1:-1]))
+            self._csr = (indptr, indices, weights)
         else:
             self._zdata = None
             self.ix, self.w = self._check_ix_w(ix, w)
@@ -783,28 +1364,141 @@ class ZonalStatsBase(object):
 
     @property
     def ix(self):
+        if self._ix is None and self._csr is not None:
+            indptr, indices, _ = self._csr
+            self._ix = np.array(np.split(indices, indptr[1:-1]))
         return self._ix
 
     @ix.setter
     def ix(self, value):
         self._ix = value
+        self._csr = None
+        self._weights = None
 
     @property
     def w(self):
+        if self._w is None and self._csr is not None:
+            indptr, _, weights = self._csr
+            self._w = np.array(np.split(weights, indptr[1:-1]))
         return self._w
 
     @w.setter
     def w(self, value):
         self._w = value
+        self._csr = None
+        self._weights = None
 
-    def check_empty(self):
+    def _get_csr(self):
+        """Returns the zonal index and weights in compressed sparse row format
+
+        Returns
+        -------
+        ret : tuple
+            (indptr, indices, weights) arrays
         """
+        if self._csr is None:
+            ix = [np.asarray(i).ravel() for i in self.ix]
+            w = [np.asarray(i, dtype=np.float64).ravel() for i in self.w]
+            counts = np.array([len(i) for i in ix], dtype=np.intp)
+            indptr = np.concatenate(([0], np.cumsum(counts)))
+            if indptr[-1]:
+                indices = np.concatenate(ix).astype(np.intp)
+                weights = np.concatenate(w)
+            else:
+                indices = np.zeros(0, dtype=np.intp)
+                weights = np.zeros(0)
+            self._csr = (indptr, indices, weights)
+        return self._csr
+
+    def get_weights(self, nsrc=None):
+        """Returns the zonal weights as sparse matrix
+
+        Parameters
+        ----------
+        nsrc : int
+            number of source elements (columns), defaults to the largest
+            source index + 1
+
+        Returns
+        -------
+        weights : :class:`scipy:scipy.sparse.csr_matrix`
+            sparse matrix of shape (num targets, nsrc), row ``i`` holds the
+            weights of the source elements associated with target ``i``
+        """
+        indptr, indices, weights = self._get_csr()
+        if nsrc is None:
+            nsrc = indices.max() + 1 if len(indices) else 0
+        if self._weights is None or self._weights.shape[1] != nsrc:
+            self._weights = sparse.csr_matrix((weights, indices, indptr),
+                                              shape=(len(indptr) - 1, nsrc))
+        return self._weights
+
+    def dump_weights(self, filename, ids=None, geometries=False):
+        """Save the zonal index and weights to an uncompressed npz file
+
+        See :meth:`ZonalDataBase.dump_weights`, the intersection geometries
+        are only available with ``zdata``.
+
+        Parameters
+        ----------
+        filename : string
+            path of the output file
+        ids : sequence
+            target ids, defaults to :attr:`ids` or the target indices
+        geometries : bool
+            if True, also store the intersection geometries
+        """
+        if ids is None:
+            ids = self.ids
+        if self.zdata is not None:
+            self.zdata.dump_weights(filename, ids=ids, geometries=geometries)
+        else:
+            indptr, indices, weights = self._get_csr()
+            _save_weights(filename, indptr, indices, weights, ids=ids,
+                          fingerprint=self.fingerprint)
+
+    @classmethod
+    def load_weights(cls, filename, fingerprint=None, mmap_mode='r'):
+        """Create an instance from zonal weights saved by
+        :meth:`~ZonalStatsBase.dump_weights`
+
+        The instance has no ``zdata``, the stored target ids and geometry
+        fingerprint are available as :attr:`ids` and :attr:`fingerprint`.
+
+        Parameters
+        ----------
+        filename : string
+            path of the npz file
+        fingerprint : string
+            if given, must match the stored fingerprint of the geometries
+            (see :attr:`ZonalDataBase.fingerprint`)
+        mmap_mode : {None, 'r', 'r+', 'c'}
+            memory-map the stored arrays, defaults to 'r'
+
+        Returns
+        -------
+        obj : instance of cls
+        """
+        arrays = _load_npz(filename, mmap_mode=mmap_mode)
+        stored = str(arrays['fingerprint'])
+        if fingerprint is not None and fingerprint != stored:
+            raise ValueError('Zonal weights in %s were computed for other '
+                             'geometries.' % filename)
+        obj = cls.__new__(cls)
+        ZonalStatsBase.__init__(obj, ix=[], w=[])
+        obj._ix = None
+        obj._w = None
+        obj._csr = (arrays['indptr'], arrays['indices'], arrays['weights'])
+        obj.ids = arrays['ids']
+        obj.fingerprint = stored
+        return obj
+
+    def check_empty(self):
+        """Returns True for targets without (valid) weights
         """
-        isempty = np.repeat(False, len(self.w))
-        for i, weights in enumerate(self.w):
-            if np.sum(weights) == 0 or np.isnan(np.sum(weights)):
-                isempty[i] = True
-        return isempty
+        indptr, _, weights = self._get_csr()
+        wsum = _segment_reduce(np.add, weights, indptr, empty=0.)
+        return (wsum == 0) | np.isnan(wsum)
 
     def _check_ix_w(self, ix, w):
         """TODO Basic check of target attributes (sequence of values).
@@ -830,36 +1524,71 @@ class ZonalStatsBase(object):
             assert len(vals) == src_len, \
                 "Argument vals must be of length %d" % src_len
         else:
-            imax = 0
-            for i in self.ix:
-                mx = np.nanmax(i)
-                if imax < mx:
-                    imax = mx
+            indices = self._get_csr()[1]
+            imax = indices.max() if len(indices) else 0
             assert len(vals) > imax, \
                 "Argument vals cannot be subscripted by given index values"
 
         return vals
 
+    def _set_attribute(self, name, out):
+        """Writes zonal statistics to the target layer of zdata
+
+        Only results of shape (num targets,) are written, multi-dimensional
+        results are returned to the caller but not stored as attributes.
+        """
+        if self.zdata is not None and out.ndim == 1:
+            self.zdata.trg.set_attribute(name, out)
+
+    def _segments(self, vals):
+        """Returns CSR offsets, source values in CSR order and the
+        matching weights (broadcastable to the values)
+        """
+        vals = np.asarray(vals, dtype=np.float64)
+        indptr, indices, weights = self._get_csr()
+        weights = weights.reshape((-1,) + (1,) * (vals.ndim - 1))
+        return indptr, vals[indices], weights
+
+    def _mean(self, vals):
+        """Returns the weighted zonal mean and the weights of the valid
+        source values per target and time step
+        """
+        vals = np.asarray(vals, dtype=np.float64)
+        weights = self.get_weights(len(vals))
+        self.isempty = self.check_empty()
+        # sparse products only handle 2-d operands
+        shape = (weights.shape[0],) + vals.shape[1:]
+        vals = vals.reshape(len(vals), -1)
+        valid = ~np.isnan(vals)
+        wsum = weights.dot(valid.astype(np.float64))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = weights.dot(np.where(valid, vals, 0.)) / wsum
+        out[self.isempty] = np.nan
+        return out.reshape(shape), wsum.reshape(shape)
+
     def mean(self, vals):
         """Evaluate (weighted) zonal mean for values given at the source \
         points.
 
+        NaN source values are ignored, the weights of the remaining values
+        are renormalised for each target and time step.
+
         Parameters
         ----------
         vals : :class:`numpy:numpy.ndarray`
-            1-d array of type float with the same length as self.src
+            array of type float of shape (num source elements, ...)
             Values at the source element for which to compute zonal statistics
 
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
         """
         self._check_vals(vals)
-        self.isempty = self.check_empty()
-        out = np.zeros(len(self.ix)) * np.nan
-        out[~self.isempty] = np.array(
-            [np.average(vals[self.ix[i]], weights=self.w[i])
-             for i in np.arange(len(self.ix))[~self.isempty]])
+        out = self._mean(vals)[0]
 
-        if self.zdata is not None:
-            self.zdata.trg.set_attribute('mean', out)
+        self._set_attribute('mean', out)
 
         return out
 
@@ -867,24 +1596,246 @@ class ZonalStatsBase(object):
         """Evaluate (weighted) zonal variance for values given at the source \
         points.
 
+        NaN source values are ignored, the weights of the remaining values
+        are renormalised for each target and time step.
+
         Parameters
         ----------
         vals : :class:`numpy:numpy.ndarray`
-            1-d  array of type float with the same length as self.src
+            array of type float of shape (num source elements, ...)
             Values at the source element for which to compute
             zonal statistics
 
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
         """
         self._check_vals(vals)
-        mean = self.mean(vals)
-        out = np.zeros(len(self.ix)) * np.nan
-        out[~self.isempty] = np.array(
-            [np.average((vals[self.ix[i]] - mean[i])**2, weights=self.w[i])
-             for i in np.arange(len(self.ix))[~self.isempty]])
+        vals = np.asarray(vals, dtype=np.float64)
+        mean, wsum = self._mean(vals)
+        indptr, indices, weights = self._get_csr()
+        # squared deviations of every (target, source) pair from the mean
+        # of its target, summed up with a sparse matrix acting on the
+        # pairs instead of the source elements
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        dev = (vals.reshape(len(vals), -1)[indices] -
+               mean.reshape(len(mean), -1)[rows]) ** 2
+        pairs = sparse.csr_matrix((weights, np.arange(len(indices)), indptr),
+                                  shape=(len(indptr) - 1, len(indices)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = (pairs.dot(np.where(np.isnan(dev), 0., dev)) /
+                   wsum.reshape(len(wsum), -1)).reshape(mean.shape)
+        out[self.isempty] = np.nan
+
+        self._set_attribute('var', out)
 
-        if self.zdata is not None:
-            self.zdata.trg.set_attribute('var', out)
+        return out
+
+    def min(self, vals):
+        """Evaluate zonal minimum for values given at the source points.
+
+        NaN source values are ignored.
 
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
+        """
+        self._check_vals(vals)
+        indptr, vals, _ = self._segments(vals)
+        out = _segment_reduce(np.fmin, vals, indptr)
+        self._set_attribute('min', out)
+        return out
+
+    def max(self, vals):
+        """Evaluate zonal maximum for values given at the source points.
+
+        NaN source values are ignored.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
+        """
+        self._check_vals(vals)
+        indptr, vals, _ = self._segments(vals)
+        out = _segment_reduce(np.fmax, vals, indptr)
+        self._set_attribute('max', out)
+        return out
+
+    def sum(self, vals):
+        """Evaluate zonal (unweighted) sum for values given at the source \
+        points.
+
+        NaN source values are ignored, targets without valid values are NaN.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
+        """
+        self._check_vals(vals)
+        indptr, vals, _ = self._segments(vals)
+        valid = ~np.isnan(vals)
+        out = _segment_reduce(np.add, np.where(valid, vals, 0.), indptr)
+        out[~_segment_reduce(np.logical_or, valid, indptr, empty=False)] = \
+            np.nan
+        self._set_attribute('sum', out)
+        return out
+
+    def count(self, vals):
+        """Count valid (non-NaN) source values per target.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            integer array of shape (num targets, ...)
+
+        """
+        self._check_vals(vals)
+        indptr, vals, _ = self._segments(vals)
+        out = _segment_reduce(np.add, (~np.isnan(vals)).astype(np.intp),
+                              indptr, empty=0)
+        self._set_attribute('count', out)
+        return out
+
+    def coverage(self, vals):
+        """Evaluate the fraction of the zonal weight covered by valid \
+        (non-NaN) source values.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...) with values between 0 and 1
+
+        """
+        self._check_vals(vals)
+        indptr, vals, weights = self._segments(vals)
+        wvalid = _segment_reduce(np.add, np.where(np.isnan(vals), 0., weights),
+                                 indptr)
+        wall = _segment_reduce(np.add, weights, indptr)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = wvalid / wall
+        self._set_attribute('coverage', out)
+        return out
+
+    def exceedance(self, vals, threshold):
+        """Evaluate the (weighted) fraction of valid source values exceeding \
+        a threshold.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+        threshold : float
+            values greater than threshold count as exceedance
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...) with values between 0 and 1
+
+        """
+        self._check_vals(vals)
+        indptr, vals, weights = self._segments(vals)
+        valid = ~np.isnan(vals)
+        with np.errstate(invalid='ignore'):
+            exceed = vals > threshold
+        wexceed = _segment_reduce(np.add, np.where(exceed, weights, 0.),
+                                  indptr)
+        wvalid = _segment_reduce(np.add, np.where(valid, weights, 0.), indptr)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = wexceed / wvalid
+        self._set_attribute('exceedance', out)
+        return out
+
+    def quantile(self, vals, q):
+        """Evaluate (weighted) zonal quantile for values given at the source \
+        points.
+
+        The quantile is the smallest source value for which the cumulative
+        weight of all values not greater than it reaches the fraction ``q``
+        of the zonal weight. NaN source values are ignored.
+
+        Parameters
+        ----------
+        vals : :class:`numpy:numpy.ndarray`
+            array of type float of shape (num source elements, ...)
+            Values at the source element for which to compute zonal statistics
+        q : float
+            quantile between 0 and 1
+
+        Returns
+        -------
+        out : :class:`numpy:numpy.ndarray`
+            array of shape (num targets, ...)
+
+        """
+        self._check_vals(vals)
+        indptr, vals, weights = self._segments(vals)
+        shape = vals.shape
+        nnz = len(vals)
+        ntrg = len(indptr) - 1
+        vals = vals.reshape(nnz, -1)
+        cols = np.arange(vals.shape[1])
+        rows = np.repeat(np.arange(ntrg), np.diff(indptr))[:, np.newaxis]
+        # sort values within each target, NaN last
+        rank = np.argsort(np.argsort(vals, axis=0, kind='mergesort'), axis=0)
+        order = np.argsort(rows * nnz + rank, axis=0, kind='mergesort')
+        vals = vals[order, cols]
+        weights = np.where(np.isnan(vals), 0.,
+                           np.broadcast_to(weights.reshape(-1, 1),
+                                           (nnz, len(cols)))[order, cols])
+        # cumulative weight within each target
+        cumw = np.concatenate([np.zeros((1, len(cols))),
+                               np.cumsum(weights, axis=0)])
+        offset = cumw[indptr[:-1]]
+        total = cumw[indptr[1:]] - offset
+        cumw = cumw[1:] - offset[rows[:, 0]]
+        target = (q - 1e-12) * total[rows[:, 0]]
+        # first position within each target reaching the quantile
+        pos = np.where((weights > 0) & (cumw >= target),
+                       np.arange(nnz)[:, np.newaxis], nnz)
+        pos = _segment_reduce(np.minimum, pos, indptr, empty=nnz)
+        vals = np.concatenate([vals, np.full((1, len(cols)), np.nan)])
+        out = vals[pos, cols].reshape((ntrg,) + shape[1:])
+        self._set_attribute('quantile', out)
         return out
 
 
@@ -938,6 +1889,396 @@ class ZonalStatsPoint(ZonalStatsBase):
         super(ZonalStatsPoint, self).__init__(src, **kwargs)
 
 
+# -----------------------------------------------------------------------------
+# Polygon-grid intersection without OGR
+# -----------------------------------------------------------------------------
+def _polygon_rings(poly):
+    """Returns the closed rings of a polygon, exterior counter-clockwise and
+    holes clockwise.
+
+    Parameters
+    ----------
+    poly : :class:`numpy:numpy.ndarray` | sequence
+        polygon vertices of shape (num vertices, 2) or sequence of such arrays
+        with the exterior ring first, followed by the holes
+
+    Returns
+    -------
+    rings : list
+        list of closed rings of shape (num vertices, 2)
+    """
+    try:
+        if np.asarray(poly, dtype=np.float64).ndim == 2:
+            poly = [poly]
+    except ValueError:
+        # rings of different length
+        pass
+    rings = []
+    for i, ring in enumerate(poly):
+        ring = np.asarray(ring, dtype=np.float64)[:, :2]
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack((ring, ring[:1]))
+        area = _shoelace(ring[np.newaxis, :-1])[0]
+        # exterior counter-clockwise, holes clockwise
+        if (area < 0) == (i == 0):
+            ring = ring[::-1]
+        rings.append(ring)
+    return rings
+
+
+def _shoelace(poly):
+    """Returns the signed areas of polygons of shape (num polygons,
+    num vertices, 2), positive for counter-clockwise orientation.
+    """
+    x, y = poly[..., 0], poly[..., 1]
+    return 0.5 * np.sum(x * np.roll(y, -1, axis=-1) -
+                        np.roll(x, -1, axis=-1) * y, axis=-1)
+
+
+def _mean_positive(u0, u1):
+    """Returns the mean of max(u, 0) for u varying linearly from u0 to u1.
+    """
+    lo, hi = np.minimum(u0, u1), np.maximum(u0, u1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(lo >= 0, (u0 + u1) / 2.,
+                        np.where(hi <= 0, 0., hi ** 2 / (2. * (hi - lo))))
+
+
+def _edge_cell_areas(start, end, cells):
+    """Returns the contributions of polygon edges to the intersection areas
+    with convex cells.
+
+    Each edge contributes the signed area between the edge and the lower
+    boundary of the cell, limited by the upper boundary of the cell. Summed
+    over all edges of a closed counter-clockwise ring, this gives the
+    intersection area of ring and cell.
+
+    Parameters
+    ----------
+    start, end : :class:`numpy:numpy.ndarray`
+        start and end points of non-vertical edges of shape (num pairs, 2)
+    cells : :class:`numpy:numpy.ndarray`
+        convex cell vertices of shape (num pairs, num cell vertices, 2)
+
+    Returns
+    -------
+    area : :class:`numpy:numpy.ndarray`
+        signed area contributions of shape (num pairs,)
+    """
+    x0, y0 = start[:, 0, np.newaxis], start[:, 1, np.newaxis]
+    x1, y1 = end[:, 0, np.newaxis], end[:, 1, np.newaxis]
+    # the cell boundaries are linear between the x-coordinates of the
+    # cell vertices, clipped to the extent of the edge
+    xs = np.sort(cells[..., 0], axis=1)
+    a = np.clip(xs[:, :-1], np.minimum(x0, x1), np.maximum(x0, x1))
+    b = np.clip(xs[:, 1:], np.minimum(x0, x1), np.maximum(x0, x1))
+    mid = (a + b) / 2.
+    # cell edges crossing each interval
+    qa = cells[:, np.newaxis]
+    qb = np.roll(cells, -1, axis=1)[:, np.newaxis]
+    crosses = ((np.minimum(qa[..., 0], qb[..., 0]) < mid[..., np.newaxis]) &
+               (np.maximum(qa[..., 0], qb[..., 0]) > mid[..., np.newaxis]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        qslope = (qb[..., 1] - qa[..., 1]) / (qb[..., 0] - qa[..., 0])
+
+        def cell_y(x):
+            return qa[..., 1] + (x[..., np.newaxis] - qa[..., 0]) * qslope
+
+        ymid = cell_y(mid)
+        ilo = np.argmin(np.where(crosses, ymid, np.inf), axis=-1)
+        ihi = np.argmax(np.where(crosses, ymid, -np.inf), axis=-1)
+        ya, yb = cell_y(a), cell_y(b)
+        rows = np.arange(len(cells))[:, np.newaxis]
+        cols = np.arange(a.shape[1])[np.newaxis]
+        lo_a, lo_b = ya[rows, cols, ilo], yb[rows, cols, ilo]
+        hi_a, hi_b = ya[rows, cols, ihi], yb[rows, cols, ihi]
+        slope = (y1 - y0) / (x1 - x0)
+    line_a = y0 + (a - x0) * slope
+    line_b = y0 + (b - x0) * slope
+    # integral of min(max(line - lo, 0), hi - lo) along the edge
+    dx = np.sign(x1 - x0) * (b - a)
+    contrib = -dx * (_mean_positive(line_a - lo_a, line_b - lo_b) -
+                     _mean_positive(line_a - hi_a, line_b - hi_b))
+    valid = np.any(crosses, axis=-1) & (b > a)
+    return np.sum(np.where(valid, contrib, 0.), axis=1)
+
+
+def _convex_cell_areas(rings, cells, maxitems=2 ** 20):
+    """Returns the intersection areas of a polygon with convex cells.
+
+    Exact area accumulation over all pairs of polygon edges and cells whose
+    bounding boxes overlap, where the bounding box of an edge extends down
+    to the lowest polygon vertex.
+
+    Parameters
+    ----------
+    rings : list
+        closed polygon rings as returned by `_polygon_rings`
+    cells : :class:`numpy:numpy.ndarray`
+        convex cell vertices of shape (num cells, num cell vertices, 2)
+
+    Returns
+    -------
+    area : :class:`numpy:numpy.ndarray`
+        intersection area per cell of shape (num cells,)
+    """
+    start = np.concatenate([ring[:-1] for ring in rings])
+    end = np.concatenate([ring[1:] for ring in rings])
+    # vertical edges do not contribute
+    keep = start[:, 0] != end[:, 0]
+    start, end = start[keep], end[keep]
+    base = min(start[:, 1].min(), end[:, 1].min())
+    emin = np.column_stack((np.minimum(start[:, 0], end[:, 0]),
+                            np.full(len(start), base)))
+    emax = np.maximum(start, end)
+    cmin, cmax = cells.min(axis=1), cells.max(axis=1)
+    area = np.zeros(len(cells))
+    step = max(1, maxitems // max(1, len(cells)))
+    size = max(1, maxitems // cells.shape[1] ** 2)
+    for i in range(0, len(start), step):
+        overlap = np.all((emin[i:i + step, np.newaxis] <= cmax) &
+                         (emax[i:i + step, np.newaxis] >= cmin), axis=-1)
+        iedge, icell = np.nonzero(overlap)
+        iedge += i
+        for j in range(0, len(iedge), size):
+            sub = slice(j, j + size)
+            area += np.bincount(icell[sub],
+                                weights=_edge_cell_areas(start[iedge[sub]],
+                                                         end[iedge[sub]],
+                                                         cells[icell[sub]]),
+                                minlength=len(cells))
+    return area
+
+
+def _strip_cell_areas(rings, xedges, yedges):
+    """Returns the intersection areas of a polygon with rectilinear cells.
+
+    Exact area accumulation: within each column of cells, the clipped area
+    below every polygon edge is integrated analytically against the row
+    boundaries.
+
+    Parameters
+    ----------
+    rings : list
+        closed polygon rings as returned by `_polygon_rings`
+    xedges : :class:`numpy:numpy.ndarray`
+        ascending column boundaries of shape (num columns + 1,)
+    yedges : :class:`numpy:numpy.ndarray`
+        ascending row boundaries of shape (num rows + 1,)
+
+    Returns
+    -------
+    area : :class:`numpy:numpy.ndarray`
+        intersection area per cell of shape (num rows, num columns)
+    """
+    nx, ny = len(xedges) - 1, len(yedges) - 1
+    area = np.zeros((ny, nx))
+    start = np.concatenate([ring[:-1] for ring in rings])
+    end = np.concatenate([ring[1:] for ring in rings])
+    # vertical edges do not contribute
+    keep = start[:, 0] != end[:, 0]
+    start, end = start[keep], end[keep]
+    lo = np.minimum(start[:, 0], end[:, 0])
+    hi = np.maximum(start[:, 0], end[:, 0])
+    c0 = np.clip(np.searchsorted(xedges, lo, side='right') - 1, 0, nx - 1)
+    c1 = np.clip(np.searchsorted(xedges, hi, side='left') - 1, 0, nx - 1)
+    keep = (hi > xedges[0]) & (lo < xedges[-1])
+    start, end, c0, c1 = start[keep], end[keep], c0[keep], c1[keep]
+    if not len(start):
+        return area
+    # rows within the bounding box of the polygon
+    ymin = min(start[:, 1].min(), end[:, 1].min())
+    ymax = max(start[:, 1].max(), end[:, 1].max())
+    r0 = max(np.searchsorted(yedges, ymin, side='right') - 1, 0)
+    r1 = min(np.searchsorted(yedges, ymax, side='left'), ny)
+    if r1 <= r0:
+        return area
+    t = yedges[r0:r1 + 1]
+    # one item per edge and column
+    ncols = c1 - c0 + 1
+    iedge = np.repeat(np.arange(len(start)), ncols)
+    col = c0[iedge] + (np.arange(len(iedge)) -
+                       np.repeat(np.cumsum(ncols) - ncols, ncols))
+    (x0, y0), (x1, y1) = start[iedge].T, end[iedge].T
+    slope = (y1 - y0) / (x1 - x0)
+    xa = np.clip(x0, xedges[col], xedges[col + 1])
+    xb = np.clip(x1, xedges[col], xedges[col + 1])
+    ya = y0 + (xa - x0) * slope
+    yb = y0 + (xb - x0) * slope
+    dx = (xb - xa)[:, np.newaxis]
+    # integral of max(y - t, 0) along the clipped edge
+    above = _mean_positive(ya[:, np.newaxis] - t, yb[:, np.newaxis] - t)
+    contrib = -dx * (above[:, :-1] - above[:, 1:])
+    rows = np.arange(r0, r1)
+    cells = (rows[np.newaxis, :] * nx + col[:, np.newaxis]).ravel()
+    area += np.bincount(cells, weights=contrib.ravel(),
+                        minlength=nx * ny).reshape((ny, nx))
+    return area
+
+
+def _area_weights(areas, index, cellarea):
+    """Returns indices and areas of the cells with non-zero intersection.
+    """
+    valid = areas > cellarea * 1e-10
+    return index[valid], areas[valid]
+
+
+def get_regular_grid_weights(trg, x, y):
+    """Returns source indices and intersection areas of target polygons with
+    a rectilinear grid.
+
+    This computes the same zonal data as
+    :class:`~wradlib.zonalstats.ZonalDataPoly` with grid cell polygons as
+    source, but uses the grid topology instead of OGR. The areas are
+    computed exactly. The result can be passed to
+    :class:`~wradlib.zonalstats.ZonalStatsPoly` via the ``ix`` and ``w``
+    keyword arguments.
+
+    Parameters
+    ----------
+    trg : sequence
+        target polygons, each of shape (num vertices, 2) or a sequence of
+        rings (exterior ring followed by holes)
+    x : :class:`numpy:numpy.ndarray`
+        monotonic cell boundaries in x direction of shape (num columns + 1,)
+    y : :class:`numpy:numpy.ndarray`
+        monotonic cell boundaries in y direction of shape (num rows + 1,)
+
+    Returns
+    -------
+    ix, w : tuple
+        lists with an array of source indices (flat indices into the grid
+        of shape (num rows, num columns)) and an array of intersection areas
+        for each target polygon
+
+    Examples
+    --------
+    >>> x = np.arange(4.)
+    >>> y = np.arange(3.)
+    >>> ix, w = get_regular_grid_weights([[[0.5, 0.5], [2., 0.5], [2., 1.5],
+    ...                                    [0.5, 1.5]]], x, y)
+    >>> print(ix[0], w[0])
+    [0 1 3 4] [0.25 0.5  0.25 0.5 ]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    nx, ny = len(x) - 1, len(y) - 1
+    index = np.arange(nx * ny).reshape((ny, nx))
+    # work on ascending boundaries
+    if x[-1] < x[0]:
+        x, index = x[::-1], index[:, ::-1]
+    if y[-1] < y[0]:
+        y, index = y[::-1], index[::-1]
+    cellarea = np.max(np.diff(x)) * np.max(np.diff(y))
+    ix, w = [], []
+    for poly in trg:
+        areas = _strip_cell_areas(_polygon_rings(poly), x, y)
+        idx, weights = _area_weights(areas.ravel(), index.ravel(), cellarea)
+        order = np.argsort(idx)
+        ix.append(idx[order])
+        w.append(weights[order])
+    return ix, w
+
+
+def get_polar_grid_weights(trg, r, az, center=(0., 0.)):
+    """Returns source indices and intersection areas of target polygons with
+    a polar grid.
+
+    The radar bins are quadrilaterals spanned by their corners like the
+    polygons from :func:`~wradlib.georef.spherical_to_polyvert`, located in
+    a plane with the radar at ``center``. Candidate bins are found from the
+    range and azimuth extent of each polygon, the intersection areas are
+    accumulated exactly from the polygon edges with numpy instead of OGR. The
+    result can be passed to :class:`~wradlib.zonalstats.ZonalStatsPoly` via
+    the ``ix`` and ``w`` keyword arguments.
+
+    Parameters
+    ----------
+    trg : sequence
+        target polygons, each of shape (num vertices, 2) or a sequence of
+        rings (exterior ring followed by holes)
+    r : :class:`numpy:numpy.ndarray`
+        ascending range bin boundaries of shape (num ranges + 1,)
+    az : :class:`numpy:numpy.ndarray`
+        azimuth bin boundaries in degrees (clockwise from north) of shape
+        (num azimuths + 1,)
+    center : tuple
+        x and y coordinates of the radar site
+
+    Returns
+    -------
+    ix, w : tuple
+        lists with an array of source indices (flat indices into the polar
+        grid of shape (num azimuths, num ranges)) and an array of
+        intersection areas for each target polygon
+    """
+    r = np.asarray(r, dtype=np.float64)
+    az = np.asarray(az, dtype=np.float64)
+    center = np.asarray(center, dtype=np.float64)
+    nr, naz = len(r) - 1, len(az) - 1
+    # azimuth bins as center and half width
+    az_width = (az[1:] - az[:-1]) % 360.
+    az_width[az_width == 0] = 360.
+    az_mid = (az[:-1] + az_width / 2.) % 360.
+    chord = np.cos(np.radians(min(np.max(az_width) / 2., 90.)))
+    ix, w = [], []
+    for poly in trg:
+        rings = _polygon_rings(poly)
+        start = np.concatenate([ring[:-1] for ring in rings]) - center
+        end = np.concatenate([ring[1:] for ring in rings]) - center
+        # range extent of the polygon
+        dist = np.hypot(start[:, 0], start[:, 1])
+        d = end - start
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.clip(-np.sum(start * d, axis=1) / np.sum(d * d, axis=1),
+                        0, 1)
+        t[~np.isfinite(t)] = 0.
+        near = start + t[:, np.newaxis] * d
+        rmin = np.min(np.hypot(near[:, 0], near[:, 1]))
+        # the radar site lies within the polygon for an odd number of
+        # crossings of a ray
+        crossing = ((start[:, 1] > 0) != (end[:, 1] > 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xcross = start[:, 0] - start[:, 1] * d[:, 0] / d[:, 1]
+        if np.sum(crossing & (xcross > 0)) % 2:
+            rmin = 0.
+        # the inner chord of a bin is closer to the site than its range
+        rmax = np.max(dist) / chord
+        j0 = max(np.searchsorted(r, rmin, side='right') - 1, 0)
+        j1 = min(np.searchsorted(r, rmax, side='left'), nr)
+        # azimuth extent from the angular extent of the edges
+        if rmin == 0:
+            iaz = np.arange(naz)
+        else:
+            a0 = np.degrees(np.arctan2(start[:, 0], start[:, 1]))
+            delta = np.degrees(np.arctan2(end[:, 0], end[:, 1])) - a0
+            delta = (delta + 180.) % 360. - 180.
+            e_mid = (a0 + delta / 2.) % 360.
+            diff = np.abs((e_mid[:, np.newaxis] - az_mid + 180.) % 360. -
+                          180.)
+            iaz = np.nonzero(np.any(
+                diff <= (np.abs(delta)[:, np.newaxis] + az_width) / 2.,
+                axis=0))[0]
+        if j1 <= j0 or not len(iaz):
+            ix.append(np.array([], dtype=np.intp))
+            w.append(np.array([]))
+            continue
+        jr = np.arange(j0, j1)
+        ia, jj = np.repeat(iaz, len(jr)), np.tile(jr, len(iaz))
+        corners = [(az[ia], r[jj]), (az[ia], r[jj + 1]),
+                   (az[ia + 1], r[jj + 1]), (az[ia + 1], r[jj])]
+        cells = np.stack([np.column_stack((rr * np.sin(np.radians(aa)),
+                                           rr * np.cos(np.radians(aa))))
+                          for aa, rr in corners], axis=1) + center
+        areas = _convex_cell_areas(rings, cells)
+        idx, weights = _area_weights(areas, ia * nr + jj,
+                                     np.max(np.abs(_shoelace(cells))))
+        order = np.argsort(idx)
+        ix.append(idx[order])
+        w.append(weights[order])
+    return ix, w
+
+
 def numpy_to_pathpatch(arr):
     """Returns PathPatches from nested array
 
@@ -967,12 +2308,124 @@ def numpy_to_pathpatch(arr):
     return np.array(paths)
 
 
-def mask_from_bbox(x, y, bbox, polar=False):
+def _regular_grid_spacing(x, y):
+    """Returns origin and spacing of a regular grid
+
+    Parameters
+    ----------
+    x : :class:`numpy:numpy.ndarray`
+        x coordinates of shape (num rows, num columns)
+    y : :class:`numpy:numpy.ndarray`
+        y coordinates of shape (num rows, num columns)
+
+    Returns
+    -------
+    spacing : tuple
+        (x0, dx, y0, dy) if x only varies equidistantly along the columns and
+        y only along the rows, else None
+    """
+    if x.ndim != 2 or min(x.shape) < 2:
+        return None
+    dx = np.diff(x[0])
+    dy = np.diff(y[:, 0])
+    xtol = 1e-6 * abs(dx[0])
+    ytol = 1e-6 * abs(dy[0])
+    if (not xtol or not ytol or
+            np.any(np.abs(dx - dx[0]) > xtol) or
+            np.any(np.abs(dy - dy[0]) > ytol) or
+            np.any(np.abs(x - x[0]) > xtol) or
+            np.any(np.abs(y - y[:, :1]) > ytol)):
+        return None
+    return x[0, 0], dx[0], y[0, 0], dy[0]
+
+
+def _polar_grid_spacing(x, y, r, az, site):
+    """Returns origin and spacing of a simple polar grid
+
+    Parameters
+    ----------
+    x : :class:`numpy:numpy.ndarray`
+        x coordinates of shape (num azimuths, num ranges)
+    y : :class:`numpy:numpy.ndarray`
+        y coordinates of shape (num azimuths, num ranges)
+    r : :class:`numpy:numpy.ndarray`
+        ranges of the grid
+    az : :class:`numpy:numpy.ndarray`
+        azimuths of the grid (degrees)
+    site : tuple
+        x and y coordinates of the grid center
+
+    Returns
+    -------
+    spacing : tuple
+        (r0, dr, az0, daz) if the ranges are equidistant, the azimuths cover
+        the full circle equidistantly and x, y are located at the planar
+        distance r from site (no elevation angle or earth curvature), else
+        None
+    """
+    r = np.asarray(r, dtype=np.float64)
+    az = np.asarray(az, dtype=np.float64)
+    if x.shape != (len(az), len(r)) or len(r) < 2 or len(az) < 2:
+        return None
+    dr = np.diff(r)
+    daz = np.diff(az) % 360.
+    if (dr[0] <= 0 or np.any(np.abs(dr - dr[0]) > 1e-6 * dr[0]) or
+            np.any(np.abs(daz - 360. / len(az)) > 1e-6)):
+        return None
+    # check the first and the last range bin of every ray
+    sin = np.sin(np.radians(az))[:, np.newaxis]
+    cos = np.cos(np.radians(az))[:, np.newaxis]
+    rr = r[[0, -1]]
+    tol = 1e-3 * dr[0]
+    if (np.any(np.abs(x[:, [0, -1]] - (site[0] + rr * sin)) > tol) or
+            np.any(np.abs(y[:, [0, -1]] - (site[1] + rr * cos)) > tol)):
+        return None
+    return r[0], dr[0], az[0], 360. / len(az)
+
+
+def _nearest_grid_index(x, y, points, polar=False, r=None, az=None,
+                        site=(0., 0.)):
+    """Returns the flat indices of the grid points nearest to points
+
+    Regular grids and (with ``r`` and ``az``) simple polar grids are handled
+    analytically, all other grids with a KD-tree.
+    """
+    ny, nx = x.shape
+    spacing = None
+    if polar and r is not None and az is not None:
+        spacing = _polar_grid_spacing(x, y, r, az, site)
+    if spacing is not None:
+        r0, dr, az0, daz = spacing
+        dxy = points - np.asarray(site, dtype=np.float64)[:2]
+        rng = np.hypot(dxy[:, 0], dxy[:, 1])
+        azi = np.degrees(np.arctan2(dxy[:, 0], dxy[:, 1])) % 360.
+        j = np.clip(np.rint((rng - r0) / dr), 0, nx - 1)
+        i = np.rint((azi - az0) / daz) % ny
+        return (i * nx + j).astype(np.intp)
+    spacing = None if polar else _regular_grid_spacing(x, y)
+    if spacing is not None:
+        x0, dx, y0, dy = spacing
+        j = np.clip(np.rint((points[:, 0] - x0) / dx), 0, nx - 1)
+        i = np.clip(np.rint((points[:, 1] - y0) / dy), 0, ny - 1)
+        return (i * nx + j).astype(np.intp)
+    tree = make_tree(np.column_stack((x.ravel(), y.ravel())))
+    return query_tree(tree, points, k=1)[1]
+
+
+def mask_from_bbox(x, y, bbox, polar=False, slices=False, r=None, az=None,
+                   site=(0., 0.)):
     """Return 2-d index array based on spatial selection from a bounding box.
 
     Use this function to create a 2-d boolean mask from 2-d arrays of grids
     points.
 
+    The grid points nearest to the bbox corners are computed directly for
+    regular grids (x equidistant along the columns, y along the rows) and
+    for polar grids with given equidistant ``r`` and ``az`` covering the full
+    circle, with x, y at the planar distance ``r`` from ``site``. Other grids
+    (e.g. sector scans or ranges along an elevated beam) are searched with a
+    KD-tree.
+
     Parameters
     ----------
     x : :class:`numpy:numpy.ndarray`
@@ -984,48 +2437,56 @@ def mask_from_bbox(x, y, bbox, polar=False):
         These must refer to the same Cartesian reference system as x and y
     polar : bool
         if True, x, y are aligned polar (azimuth x range)
+    slices : bool
+        if True, return a tuple usable as index into the grid instead of the
+        boolean mask, ``data[index]`` is the selected subgrid
+    r : :class:`numpy:numpy.ndarray`
+        ranges of the polar grid (same units as x and y)
+    az : :class:`numpy:numpy.ndarray`
+        azimuths of the polar grid (degrees)
+    site : tuple
+        x and y coordinates of the polar grid center
 
     Returns
     -------
     mask, shape : :class:`numpy:numpy.ndarray`, tuple
               mask is a boolean array that is True if the point is inside the
-              bbox, shape is the shape of the True subgrid
+              bbox (or a tuple of slices/indices if ``slices`` is True),
+              shape is the shape of the True subgrid
 
     """
     ny, nx = x.shape
 
-    ix = np.arange(x.size).reshape(x.shape)
-
     # Find bbox corners
-    #    Plant a tree
-    tree = cKDTree(np.vstack((x.ravel(), y.ravel())).transpose())
+    # query lower left, upper right, upper left and lower right corners
+    # at once
+    corners = np.array([[bbox["left"], bbox["bottom"]],
+                        [bbox["right"], bbox["top"]],
+                        [bbox["left"], bbox["top"]],
+                        [bbox["right"], bbox["bottom"]]], dtype=np.float64)
+    ixll, ixur, ixul, ixlr = _nearest_grid_index(x, y, corners, polar=polar,
+                                                 r=r, az=az, site=site)
     # find lower left corner index
-    dists, ixll = tree.query([bbox["left"], bbox["bottom"]], k=1)
     ill = (ixll // nx) - 1
     jll = (ixll % nx) - 1
     # find upper right corner index
-    dists, ixur = tree.query([bbox["right"], bbox["top"]], k=1)
     iur = int(ixur / nx) + 1
     jur = (ixur % nx) + 1
 
     # for polar grids we need all 4 corners
     if polar:
         # find upper left corner index
-        dists, ixul = tree.query([bbox["left"], bbox["top"]], k=1)
         iul = (ixul // nx) - 1
         jul = (ixul % nx) - 1
         # find lower right corner index
-        dists, ixlr = tree.query([bbox["right"], bbox["bottom"]], k=1)
         ilr = (ixlr // nx) + 1
         jlr = (ixlr % nx) + 1
 
-    mask = np.repeat(False, ix.size).reshape(ix.shape)
-
     # for polar grids we have to handle the azimuth carefully
     if polar:
         # ranges are not problematic, just get min and max
-        jmin = min(jll, jul, jur, jlr)
-        jmax = max(jll, jul, jur, jlr)
+        jmin = max(min(jll, jul, jur, jlr), 0)
+        jmax = min(max(jll, jul, jur, jlr), nx)
         # azimuth array for angle_between calculation
         ax = np.array([[ill, ilr],
                        [ill, iur],
@@ -1036,24 +2497,31 @@ def mask_from_bbox(x, y, bbox, polar=False):
         ar = angle_between(ax[:, 0], ax[:, 1])
         maxind = int(np.argmax(ar))
         imin, imax = ax[maxind, :]
+        shape = (int(ar[maxind]), jmax - jmin)
 
         # if catchment extends over zero angle
         if imin > imax:
-            mask[:imax, jmin:jmax] = True
-            mask[imin:, jmin:jmax] = True
-            shape = (int(ar[maxind]), jmax - jmin)
+            rows = np.arange(ny)
+            index = (np.concatenate((rows[imin:], rows[:imax])),
+                     slice(jmin, jmax))
         else:
-            mask[imin:imax, jmin:jmax] = True
-            shape = (int(ar[maxind]), jmax - jmin)
+            index = (slice(imin, imax), slice(jmin, jmax))
 
     else:
+        # corner rows/columns in ascending order (grids may be flipped),
+        # kept within the grid
+        i0 = max(min(ixll // nx, ixur // nx) - 1, 0)
+        i1 = min(max(ixll // nx, ixur // nx) + 1, ny)
+        j0 = max(min(ixll % nx, ixur % nx) - 1, 0)
+        j1 = min(max(ixll % nx, ixur % nx) + 1, nx)
+        index = (slice(i0, i1), slice(j0, j1))
+        shape = (i1 - i0, j1 - j0)
 
-        if iur > ill:
-            mask[ill:iur, jll:jur] = True
-            shape = (iur - ill, jur - jll)
-        else:
-            mask[iur:ill, jll:jur] = True
-            shape = (ill - iur, jur - jll)
+    if slices:
+        return index, shape
+
+    mask = np.zeros((ny, nx), dtype=np.bool_)
+    mask[index] = True
 
     return mask, shape
 
@@ -1128,18 +2596,109 @@ def grid_centers_to_vertices(x, y, dx, dy):
     return verts
 
 
+def _flatten_rings(poly):
+    """Returns all rings of a (nested) sequence of polygons as a list of
+    closed rings of shape (num vertices, 2)
+    """
+    try:
+        arr = np.asarray(poly, dtype=np.float64)
+        if arr.ndim == 2:
+            rings = [arr[:, :2]]
+        elif arr.ndim == 3:
+            rings = list(arr[..., :2])
+        else:
+            rings = [ring for item in arr for ring in _flatten_rings(item)]
+    except ValueError:
+        # rings of different length
+        rings = [ring for item in poly for ring in _flatten_rings(item)]
+    return [ring if np.array_equal(ring[0], ring[-1])
+            else np.vstack((ring, ring[:1])) for ring in rings]
+
+
+def _points_on_edges(points, start, end):
+    """Returns True for points with an odd number of edge crossings of a
+    ray in positive x direction or lying on an edge
+    """
+    px = points[:, 0:1]
+    py = points[:, 1:2]
+    x0, y0 = start[:, 0], start[:, 1]
+    x1, y1 = end[:, 0], end[:, 1]
+    straddle = (y0 > py) != (y1 > py)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xint = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+    odd = np.sum(straddle & (px < xint), axis=1) % 2 == 1
+    onedge = (((x1 - x0) * (py - y0) == (y1 - y0) * (px - x0)) &
+              (px >= np.minimum(x0, x1)) & (px <= np.maximum(x0, x1)) &
+              (py >= np.minimum(y0, y1)) & (py <= np.maximum(y0, y1)))
+    return odd | onedge.any(axis=1)
+
+
+def _points_in_rings(points, rings, chunksize=1024, maxitems=2 ** 19):
+    """Tests points against rings with the even-odd rule, points on a ring
+    count as inside.
+
+    Parameters
+    ----------
+    points : :class:`numpy:numpy.ndarray`
+        array of shape (num points, 2)
+    rings : list
+        closed rings of shape (num vertices, 2)
+    chunksize : int
+        number of points (sorted by y) sharing one edge pre-selection
+    maxitems : int
+        maximum number of point-edge pairs evaluated at once
+
+    Returns
+    -------
+    inside : :class:`numpy:numpy.ndarray`
+        boolean array of shape (num points,)
+    """
+    start = np.concatenate([ring[:-1] for ring in rings])
+    end = np.concatenate([ring[1:] for ring in rings])
+    xmin = np.minimum(start[:, 0], end[:, 0])
+    xmax = np.maximum(start[:, 0], end[:, 0])
+    ymin = np.minimum(start[:, 1], end[:, 1])
+    ymax = np.maximum(start[:, 1], end[:, 1])
+
+    inside = np.zeros(len(points), dtype=np.bool_)
+    # bounding box pre-filter
+    cand = np.nonzero((points[:, 0] >= xmin.min()) &
+                      (points[:, 0] <= xmax.max()) &
+                      (points[:, 1] >= ymin.min()) &
+                      (points[:, 1] <= ymax.max()))[0]
+    # points sorted by y, so that each chunk only meets the edges
+    # spanning its y-range
+    cand = cand[np.argsort(points[cand, 1], kind='mergesort')]
+    for i in range(0, len(cand), chunksize):
+        chunk = cand[i:i + chunksize]
+        edges = np.nonzero((ymax >= points[chunk[0], 1]) &
+                           (ymin <= points[chunk[-1], 1]))[0]
+        block = max(1, maxitems // max(len(edges), 1))
+        for j in range(0, len(chunk), block):
+            idx = chunk[j:j + block]
+            inside[idx] = _points_on_edges(points[idx], start[edges],
+                                           end[edges])
+    return inside
+
+
 def get_clip_mask(coords, clippoly, srs=None):
     """Returns boolean mask of points ``coords`` inside polygon ``clippoly``
 
+    Points on the polygon boundary are considered inside. The test is done
+    in numpy with the even-odd rule, so holes and several (non-overlapping)
+    polygons are supported.
+
     Parameters
     ----------
     coords : :class:`numpy:numpy.ndarray`
         array of xy coords with shape [...,2]
-    clippoly : :class:`numpy:numpy.ndarray`
+    clippoly : :class:`numpy:numpy.ndarray` | sequence
         array of xy coords with shape (N,2) representing closed
-        polygon coordinates
+        polygon coordinates, or a (nested) sequence of such rings, e.g.
+        exterior and holes of one or more polygons
     srs: object
-        osr.SpatialReference
+        osr.SpatialReference, not used anymore, kept for backwards
+        compatibility
 
     Returns
     -------
@@ -1147,27 +2706,14 @@ def get_clip_mask(coords, clippoly, srs=None):
         boolean array of shape coords.shape[0:-1]
 
     """
-    clip = [clippoly]
-
-    zd = ZonalDataPoint(coords.reshape(-1, coords.shape[-1]),
-                        clip, srs=srs)
-
-    # Subsetting in order to use only precipitating profiles
-    src_mask = np.zeros(coords.shape[0:-1], dtype=np.bool)
-
-    try:
-        obj = ZonalStatsPoint(zd)
-
-        # Get source indices within polygon from zonal object
-        # (0 because we have only one zone)
-        pr_idx = obj.zdata.get_source_index(0)
-        mask = np.unravel_index(pr_idx, coords.shape[0:-1])
-        src_mask[mask] = True
+    coords = np.asarray(coords)
+    points = coords.reshape(-1, coords.shape[-1])[:, :2]
+    src_mask = _points_in_rings(points, _flatten_rings(clippoly))
 
-    except ValueError as err:
-        warnings.warn("{0}".format(err))
+    if not src_mask.any():
+        warnings.warn("No points found inside clip polygon.")
 
-    return src_mask
+    return src_mask.reshape(coords.shape[0:-1])
 
 
 if __name__ == '__main__':